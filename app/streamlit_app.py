@@ -10,15 +10,39 @@ if _REPO_ROOT not in sys.path:
 import json
 import uuid
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-from qldrevenue.constants import GOLD_TABLE_ACTIVE, OFFICER_RULES_TABLE, SILVER_TABLE
-from qldrevenue.formatting import format_abn
-from qldrevenue.dbsql import dataframe_from_statement_response, state_str
-from qldrevenue.metrics import kpis
+from qldrevenue.caselist import CaseListPager, CasePage, PageCursor, local_page, page_bounds
+from qldrevenue.casewrites import CaseAction, CaseWriter, add_note, assign, set_status, unassign
+from qldrevenue.constants import (
+    CASE_HISTORY_CHECKPOINT_TABLE,
+    CASE_MGMT_EVENTS_TABLE,
+    CASE_ROLLUP_TABLE,
+    CASE_MGMT_STATE_TABLE,
+    GOLD_REFRESH_WATERMARK_TABLE,
+    GOLD_TABLE_ACTIVE,
+    OFFICER_RULES_TABLE,
+    RULE_MATCHES_TABLE,
+    SILVER_TABLE,
+)
+from qldrevenue.eventspool import EventSpool, get_event_spool
+from qldrevenue.formatting import as_float, format_abn
+from qldrevenue.gold import derive_columns
+from qldrevenue.goldrefresh import GoldRefresher
+from qldrevenue.history import SOURCE_EVENT, SOURCE_SILVER, CaseHistoryIndex, as_history_frame
+from qldrevenue.executor import SqlExecutor, get_executor
+from qldrevenue.matchstore import RuleMatchStore
+from qldrevenue.metrics import kpi_statement, kpis, kpis_from_row
+from qldrevenue.querycache import QueryCache, get_query_cache
+from qldrevenue.replica import CaseReplica, get_replica
+from qldrevenue.rollup import CaseRollup
+from qldrevenue.rules import OfficerRule
+from qldrevenue.ruleusage import RuleUsageTracker, get_rule_usage_tracker
+from qldrevenue.sqlbuilder import Where, params_key
 
 
 APP_TITLE = "Queensland Revenue Office — Revenue Case Management"
@@ -32,8 +56,21 @@ QRO_TEXT = "#111827"
 # Prefer using Databricks SQL warehouse for all querying
 DEFAULT_WAREHOUSE_ID = "4b9b953939869799"
 
-CASE_MGMT_EVENTS_TABLE = "qldrevenue.qro_fraud_detection.case_management_events"
-CASE_MGMT_STATE_TABLE = "qldrevenue.qro_fraud_detection.case_management_state"
+# Interactive reads that take longer than this are cancelled on the warehouse.
+QUERY_LATENCY_BUDGET_S = 60
+
+# Serve filters/KPIs/pages from the in-process CDF replica instead of Gold queries.
+USE_LOCAL_REPLICA = os.environ.get("QRO_LOCAL_REPLICA", "") == "1"
+# Arrow snapshot of the replica on local disk, so new worker processes start without a full Silver read.
+REPLICA_SNAPSHOT_DIR = os.environ.get("QRO_SNAPSHOT_DIR") or None
+
+# Write-behind spool for audit events; it must be on a persistent volume. Unset: events are written synchronously.
+EVENT_SPOOL_PATH = os.environ.get("QRO_EVENT_SPOOL") or None
+# Spool backlog older than this is flagged in the sidebar.
+EVENT_SPOOL_LAG_WARN_S = 60
+
+# Largest filtered selection a bulk action applies to.
+BULK_MAX_CASES = 1000
 
 
 def _apply_branding() -> None:
@@ -95,226 +132,388 @@ def _apply_branding() -> None:
     )
 
 
-def _sql_quote(val: str) -> str:
-    return "'" + str(val).replace("'", "''") + "'"
-
+def _executor() -> SqlExecutor:
+    # One shared client (auth + pooled HTTP session) per process, reused by every session.
+    return get_executor(DEFAULT_WAREHOUSE_ID)
 
 
+def _sql_fetch_df(statement: str, params: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """Execute SELECT and return a pandas DataFrame (all result chunks)."""
+    return _executor().fetch(statement, params)
 
-def _state_str(state) -> str | None:
-    """Normalize Databricks SDK enum/string state values to plain strings (e.g., 'SUCCEEDED')."""
-    if state is None:
-        return None
-    if isinstance(state, str):
-        return state
-    # Databricks SDK uses enums for status.state
-    if hasattr(state, 'value'):
-        try:
-            return str(state.value)
-        except Exception:
-            pass
-    if hasattr(state, 'name'):
-        try:
-            return str(state.name)
-        except Exception:
-            pass
-    s = str(state)
-    # e.g. 'StatementState.SUCCEEDED' -> 'SUCCEEDED'
-    return s.split('.')[-1]
-
-def _get_ws_client():
-    from databricks.sdk import WorkspaceClient
-
-    return WorkspaceClient()
-
-
-def _wait_for_statement(w, statement_id: str, timeout_s: int = 180):
-    import time
-
-    deadline = time.time() + timeout_s
-    while True:
-        resp = w.statement_execution.get_statement(statement_id)
-        state = state_str(resp.status.state) if resp.status else None
-        if state in ("SUCCEEDED", "FAILED", "CANCELED"):
-            return resp
-        if time.time() > deadline:
-            raise TimeoutError(f"SQL statement timed out (state={state})")
-        time.sleep(1)
-
-
-def _sql_fetch_df(statement: str, warehouse_id: str = DEFAULT_WAREHOUSE_ID) -> pd.DataFrame:
-    """Execute SELECT and return a pandas DataFrame."""
-    w = _get_ws_client()
-    resp = w.statement_execution.execute_statement(
-        warehouse_id=warehouse_id,
-        statement=statement,
-        wait_timeout="50s",
-    )
-    st_id = resp.statement_id
-    if not st_id:
-        return pd.DataFrame()
-
-    if (not resp.status) or (state_str(resp.status.state) in ("PENDING", "RUNNING")):
-        resp = _wait_for_statement(w, st_id)
-
-    state = state_str(resp.status.state) if resp.status else None
-    if state != "SUCCEEDED":
-        msg = resp.status.error.message if (resp.status and resp.status.error) else f"Statement failed: {state}"
-        raise RuntimeError(msg)
 
-    return dataframe_from_statement_response(resp)
-
-
-def _sql_exec(statement: str, warehouse_id: str = DEFAULT_WAREHOUSE_ID) -> None:
+def _sql_exec(statement: str, params: Optional[Dict[str, Any]] = None) -> None:
     """Execute INSERT/UPDATE/DDL. Raises on failure."""
-    w = _get_ws_client()
-    resp = w.statement_execution.execute_statement(
-        warehouse_id=warehouse_id,
-        statement=statement,
-        wait_timeout="50s",
-    )
-    st_id = resp.statement_id
-    if not st_id:
-        return
+    _executor().exec(statement, params)
 
-    if (not resp.status) or (state_str(resp.status.state) in ("PENDING", "RUNNING")):
-        resp = _wait_for_statement(w, st_id)
 
-    state = state_str(resp.status.state) if resp.status else None
-    if state != "SUCCEEDED":
-        msg = resp.status.error.message if (resp.status and resp.status.error) else f"Statement failed: {state}"
-        raise RuntimeError(msg)
+def _query_cache() -> QueryCache:
+    # Shared by every session; entries are dropped per written table, never wholesale.
+    return get_query_cache(executor=_executor())
 
 
-@st.cache_data(ttl=10)
-def _load_cases(limit: int = 2000) -> pd.DataFrame:
-    stmt = f"""
-      SELECT *
-      FROM {GOLD_TABLE_ACTIVE}
-      LIMIT {int(limit)}
-    """
-    return _sql_fetch_df(stmt)
+def _cached_fetch_df(statement: str, params: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """`_sql_fetch_df` through the shared cache (result is shared: do not mutate)."""
+    return _query_cache().fetch(_executor(), statement, params)
 
 
-@st.cache_data(ttl=10)
 def _load_rules(officer_email: str) -> pd.DataFrame:
     stmt = f"""
+      SELECT rule_id, officer_email, rule_name, filter_conditions, last_used_at, use_count
+      FROM {OFFICER_RULES_TABLE}
+      WHERE officer_email = :officer_email AND is_active = true
+    """
+    try:
+        return _cached_fetch_df(stmt, {"officer_email": officer_email})
+    except Exception:
+        pass
+    # Before sql/10_rule_usage.sql: no use_count column yet.
+    stmt2 = f"""
       SELECT rule_id, officer_email, rule_name, filter_conditions, last_used_at
       FROM {OFFICER_RULES_TABLE}
-      WHERE officer_email = {_sql_quote(officer_email)} AND is_active = true
+      WHERE officer_email = :officer_email AND is_active = true
     """
     try:
-        return _sql_fetch_df(stmt)
+        return _cached_fetch_df(stmt2, {"officer_email": officer_email})
     except Exception:
         return pd.DataFrame(columns=["rule_id", "officer_email", "rule_name", "filter_conditions", "last_used_at"])
 
 
 def _save_rule(officer_email: str, rule_name: str, conds: Dict[str, Any]) -> str:
     rule_id = str(uuid.uuid4())
-    now = datetime.utcnow().isoformat()
+    now = datetime.utcnow()
     stmt = f"""
       INSERT INTO {OFFICER_RULES_TABLE}
       (rule_id, officer_email, rule_name, filter_conditions, created_at, is_active, last_used_at)
-      VALUES (
-        {_sql_quote(rule_id)},
-        {_sql_quote(officer_email)},
-        {_sql_quote(rule_name)},
-        {_sql_quote(json.dumps(conds))},
-        {_sql_quote(now)},
-        true,
-        NULL
-      )
+      VALUES (:rule_id, :officer_email, :rule_name, :filter_conditions, :created_at, true, NULL)
     """
-    _sql_exec(stmt)
+    _sql_exec(
+        stmt,
+        {
+            "rule_id": rule_id,
+            "officer_email": officer_email,
+            "rule_name": rule_name,
+            "filter_conditions": json.dumps(conds),
+            "created_at": now,
+        },
+    )
     return rule_id
 
 
-def _mark_rule_used(rule_id: str) -> None:
-    stmt = f"""
-      UPDATE {OFFICER_RULES_TABLE}
-      SET last_used_at = current_timestamp()
-      WHERE rule_id = {_sql_quote(rule_id)}
+def _rule_usage() -> RuleUsageTracker:
+    # Usage is recorded in memory and MERGEd into officer_case_rules once a minute.
+    return get_rule_usage_tracker(_executor(), on_flush=lambda _: _query_cache().invalidate(OFFICER_RULES_TABLE))
+
+
+def _record_rule_use(rule_id: str) -> None:
+    """Counts a use when the session switches to `rule_id`; reruns only refresh last_used_at."""
+    new_use = st.session_state.get("_used_rule_id") != rule_id
+    st.session_state["_used_rule_id"] = rule_id
+    _rule_usage().record(rule_id, new_use=new_use)
+
+
+def _gold_refresher() -> GoldRefresher:
+    # Used here only to read/advance `gold_refresh_watermark` marks; the scheduled job runs `refresh`.
+    return GoldRefresher(_executor(), match_store=RuleMatchStore(_executor()), rollup=CaseRollup(_executor()))
+
+
+def _rule_match_counts(rules_df: pd.DataFrame) -> Dict[str, int]:
+    """Per-rule match counts: at most one query against `rule_matches` and one against Gold.
+
+    Rules whose matches reflect Gold's current watermark are counted in
+    `rule_matches` (one GROUP BY); the others (never synced by the Gold
+    refresh job, or edited since) are counted with their predicate over Gold,
+    all in one UNION ALL. Returns {} when the tables are not deployed yet
+    (sql/08_rule_matches.sql, sql/11_gold_refresh.sql).
+    """
+    if rules_df.empty:
+        return {}
+    refresher = _gold_refresher()
+    store = refresher.match_store
+    rules = [OfficerRule.from_json_row(r) for r in rules_df.to_dict("records")]
+    rule_ids = [str(r.rule_id) for r in rules]
+
+    def compute() -> Dict[str, int]:
+        fresh = refresher.fresh([store.mark_target(rid) for rid in rule_ids])
+        counts = store.counts([rid for rid in rule_ids if store.mark_target(rid) in fresh])
+        counts.update(store.predicate_counts([r for r in rules if store.mark_target(str(r.rule_id)) not in fresh]))
+        return counts
+
+    try:
+        return _query_cache().get_or_compute(
+            "rule_match_counts",
+            {"rule_ids": json.dumps(rule_ids)},
+            compute,
+            tables=[RULE_MATCHES_TABLE, GOLD_REFRESH_WATERMARK_TABLE, GOLD_TABLE_ACTIVE, OFFICER_RULES_TABLE],
+        )
+    except Exception:
+        return {}
+
+
+def _rollup_fresh() -> bool:
+    """True when `case_rollup` was last refreshed for Gold's current watermark (sql/11_gold_refresh.sql)."""
+    try:
+        fresh = _query_cache().get_or_compute(
+            "rollup_fresh",
+            {},
+            lambda: _gold_refresher().fresh([CASE_ROLLUP_TABLE]),
+            tables=[GOLD_REFRESH_WATERMARK_TABLE],
+        )
+    except Exception:
+        return False
+    return CASE_ROLLUP_TABLE in fresh
+
+
+def _session_key(slot: str) -> str:
+    """Per-browser-session key used to cancel a superseded read on rerun."""
+    if "_sql_session_id" not in st.session_state:
+        st.session_state["_sql_session_id"] = str(uuid.uuid4())
+    return f"{st.session_state['_sql_session_id']}:{slot}"
+
+
+def _yield_to_rerun(slot: Any) -> Callable[[], bool]:
+    """`should_abort` for `SqlExecutor.gather` that lets a queued rerun interrupt the wait.
+
+    Streamlit only reruns once the current run yields, and it yields when an
+    element is written. Clearing `slot` (an `st.empty()` placeholder) between
+    poll rounds is such a write: with a rerun pending, Streamlit raises its
+    rerun exception here, `gather` cancels the statements still running and
+    the new run starts straight away instead of after the latency budget.
     """
-    _sql_exec(stmt)
 
+    def check() -> bool:
+        slot.empty()
+        return False
 
+    return check
 
 
-def _upsert_case_state(case_id: str, status: Optional[str] = None, assigned_to: Optional[str] = None, compliance_officer: Optional[str] = None) -> None:
-    """Upsert current operational state for a case."""
-    # Build a MERGE that only updates provided fields (keeps existing state otherwise)
-    status_sql = 'NULL' if status is None else _sql_quote(status)
-    assigned_sql = 'NULL' if assigned_to is None else _sql_quote(assigned_to)
-    officer_sql = 'NULL' if compliance_officer is None else _sql_quote(compliance_officer)
+def _case_pager() -> CaseListPager:
+    # Per session: holds this session's prefetched next page.
+    if "_case_pager" not in st.session_state:
+        st.session_state["_case_pager"] = CaseListPager(_executor())
+    return st.session_state["_case_pager"]
 
-    stmt = f"""
-      MERGE INTO {CASE_MGMT_STATE_TABLE} AS t
-      USING (SELECT {_sql_quote(case_id)} AS case_id,
-                    {status_sql} AS status,
-                    {assigned_sql} AS assigned_to,
-                    {officer_sql} AS compliance_officer) AS s
-      ON t.case_id = s.case_id
-      WHEN MATCHED THEN UPDATE SET
-        t.status = COALESCE(s.status, t.status),
-        t.assigned_to = COALESCE(s.assigned_to, t.assigned_to),
-        t.compliance_officer = COALESCE(s.compliance_officer, t.compliance_officer),
-        t.updated_at = current_timestamp()
-      WHEN NOT MATCHED THEN INSERT (case_id, status, assigned_to, compliance_officer, updated_at)
-      VALUES (s.case_id, s.status, s.assigned_to, s.compliance_officer, current_timestamp())
+
+def _load_case(case_id: str) -> Optional[Dict[str, Any]]:
+    """Full Gold row for Case Details (the grid only carries display columns).
+
+    Age, SLA and overdue columns are re-derived for today: Gold's are as of
+    its last rebuild.
     """
-    _sql_exec(stmt)
+    row = _query_cache().get_or_compute(
+        "case_detail", {"case_id": case_id}, lambda: CaseListPager(_executor()).fetch_case(case_id), tables=[GOLD_TABLE_ACTIVE]
+    )
+    if row is None:
+        return None
+    return derive_columns(pd.DataFrame([row])).iloc[0].to_dict()
 
 
-def _insert_case_event(
-    case_id: str,
+def _fetch_page(
+    where: Where, after: Optional[PageCursor], kpi_query: Tuple[str, Dict[str, Any]]
+) -> Tuple[CasePage, Optional[Dict[str, Any]]]:
+    """Run the page's independent statements concurrently; returns (case page, KPIs).
+
+    The case-list page and the KPI aggregate (`kpi_query`) do not depend
+    on each other, so both are submitted up front and awaited together. The page read is keyed per
+    session, so a rerun (e.g. typing in Search) cancels the previous run's
+    still-running query; a rerun queued while this run is waiting ends the
+    wait (`_yield_to_rerun`). KPIs are None if the aggregate failed.
+    """
+    ex = _executor()
+    pager = _case_pager()
+    handles = [
+        pager.submit_page(where, after, supersede_key=_session_key("gold")),
+        ex.submit(*kpi_query, supersede_key=_session_key("kpis")),
+    ]
+    results = ex.gather(
+        handles,
+        timeout_s=QUERY_LATENCY_BUDGET_S,
+        return_exceptions=True,
+        should_abort=_yield_to_rerun(st.empty()),
+    )
+    if isinstance(results[0], Exception):
+        raise results[0]
+    kpi_row = results[1]
+    return pager.page_from_frame(results[0]), (None if isinstance(kpi_row, Exception) else kpis_from_row(kpi_row))
+
+
+def _local_view(
+    frame: pd.DataFrame,
+    rule: Optional[Any],
+    q_domain: List[str],
+    q_type: List[str],
+    q_status: List[str],
+    q_min_risk: int,
+    q_min_shortfall: float,
+    q_assignment: str,
     officer_email: str,
-    event_type: str,
-    new_status: Optional[str] = None,
-    assigned_to: Optional[str] = None,
-    note: Optional[str] = None,
-) -> None:
-    event_id = str(uuid.uuid4())
-    now = datetime.utcnow().isoformat()
+    q_search: str,
+) -> pd.DataFrame:
+    """Apply the page's rule and quick filters to a replica snapshot (same semantics as the SQL Where)."""
+    if frame.empty:
+        return frame
+    m = rule.mask(frame) if rule is not None else np.ones(len(frame), dtype=bool)
+    if q_domain:
+        m &= frame["case_domain"].isin(q_domain).to_numpy()
+    if q_type:
+        m &= frame["case_type"].isin(q_type).to_numpy()
+    if q_status:
+        m &= frame["status"].isin(q_status).to_numpy()
+    if q_min_risk > 0:
+        m &= (pd.to_numeric(frame["risk_score"], errors="coerce") >= q_min_risk).to_numpy()
+    if q_min_shortfall > 0:
+        m &= (pd.to_numeric(frame["tax_shortfall"], errors="coerce") >= q_min_shortfall).to_numpy()
+    if q_assignment == "Unassigned":
+        m &= frame["assigned_to"].isna().to_numpy() | (frame["assigned_to"] == "").to_numpy()
+    elif q_assignment == "Assigned to me":
+        m &= (frame["assigned_to"] == officer_email).to_numpy()
+    if q_search:
+        needle = q_search.lower()
+        m &= (
+            frame["case_id"].astype(str).str.lower().str.contains(needle, regex=False).to_numpy()
+            | frame["taxpayer_name"].astype(str).str.lower().str.contains(needle, regex=False).to_numpy()
+        )
+    return frame.loc[m]
+
+
+def _page_cursors(where: Where) -> List[Optional[PageCursor]]:
+    """Cursor stack for the current filter (index = page number); reset when filters change."""
+    signature = (where.sql(), params_key(where.params))
+    if st.session_state.get("_case_list_signature") != signature:
+        st.session_state["_case_list_signature"] = signature
+        st.session_state["_case_list_cursors"] = [None]
+    return st.session_state["_case_list_cursors"]
+
+
+def _event_spool() -> Optional[EventSpool]:
+    # Events are acknowledged once spooled locally; the flusher MERGEs them in batches.
+    if EVENT_SPOOL_PATH is None:
+        return None
+    return get_event_spool(_executor(), EVENT_SPOOL_PATH, on_flush=lambda _: _query_cache().invalidate(CASE_MGMT_EVENTS_TABLE))
+
+
+def _spool_health() -> None:
+    """Sidebar notice when audit events are backing up, failing, or dead-lettered."""
+    spool = _event_spool()
+    if spool is None:
+        return
+    status = spool.status()
+    if status.dead_letters:
+        st.error(f"{status.dead_letters:,} audit events could not be written and are held in the spool's dead-letter table.")
+    if status.last_error and status.pending:
+        st.warning(f"{status.pending:,} audit events waiting (oldest {status.lag_s:,.0f}s): {status.last_error}")
+    elif status.lag_s > EVENT_SPOOL_LAG_WARN_S:
+        st.caption(f"{status.pending:,} audit events waiting to be written (oldest {status.lag_s:,.0f}s).")
+
+
+def _write_actions(actions: List[CaseAction]) -> None:
+    """One MERGE into case state, then the audit events (through the write-behind spool when configured)."""
+    CaseWriter(_executor(), spool=_event_spool()).apply(actions)
+    _after_case_write()
+
+
+def _filtered_case_ids(where: Where, local_cases: Optional[pd.DataFrame]) -> List[str]:
+    """case_ids of the current filtered selection (capped at BULK_MAX_CASES) for bulk actions."""
+    if local_cases is not None:
+        return local_cases["case_id"].astype(str).head(BULK_MAX_CASES).tolist()
     stmt = f"""
-      INSERT INTO {CASE_MGMT_EVENTS_TABLE}
-      (event_id, case_id, officer_email, event_type, new_status, assigned_to, note, created_at)
-      VALUES (
-        {_sql_quote(event_id)},
-        {_sql_quote(case_id)},
-        {_sql_quote(officer_email)},
-        {_sql_quote(event_type)},
-        {('NULL' if new_status is None else _sql_quote(new_status))},
-        {('NULL' if assigned_to is None else _sql_quote(assigned_to))},
-        {('NULL' if note is None else _sql_quote(note))},
-        {_sql_quote(now)}
-      )
+      SELECT case_id
+      FROM {GOLD_TABLE_ACTIVE}
+      WHERE {where.sql()}
+      ORDER BY case_id
+      LIMIT {int(BULK_MAX_CASES)}
     """
-    _sql_exec(stmt)
-@st.cache_data(ttl=30)
+    return _sql_fetch_df(stmt, where.params)["case_id"].astype(str).tolist()
+
+
+def _replica() -> CaseReplica:
+    # Interest and exposure are re-evaluated daily in-process; Silver's are as of its load date.
+    return get_replica(_executor(), snapshot_dir=REPLICA_SNAPSHOT_DIR, live_exposure=True)
+
+
+def _after_case_write() -> None:
+    # Only entries reading case-management tables are dropped; other officers' rules, pages and history stay cached.
+    _query_cache().invalidate(CASE_MGMT_STATE_TABLE, CASE_MGMT_EVENTS_TABLE)
+    if USE_LOCAL_REPLICA:
+        _replica().mark_stale()
+
+
+def _history_current() -> Set[str]:
+    """Sources (Silver, events) the case_history index has synced up to their latest version."""
+    try:
+        return _query_cache().get_or_compute(
+            "history_current",
+            {},
+            lambda: CaseHistoryIndex(_executor()).current_sources(),
+            tables=[CASE_HISTORY_CHECKPOINT_TABLE, SILVER_TABLE, CASE_MGMT_EVENTS_TABLE],
+        )
+    except Exception:
+        return set()
+
+
+def _indexed_history(case_id: str, source_table: str) -> Optional[pd.DataFrame]:
+    """`source_table`'s rows for one case from the clustered case_history index.
+
+    None when the index is not deployed (sql/12_case_history.sql) or lags
+    `source_table`, so callers read the source instead of showing stale history.
+    """
+    if source_table not in _history_current():
+        return None
+    try:
+        return as_history_frame(_cached_fetch_df(*CaseHistoryIndex(_executor()).lookup_stmt([case_id])))
+    except Exception:
+        return None
+
+
 def _case_history(case_id: str) -> pd.DataFrame:
+    hist = _indexed_history(case_id, SILVER_TABLE)
+    if hist is not None:
+        silver = hist[hist["source"] == SOURCE_SILVER].rename(
+            columns={"commit_version": "_commit_version", "changed_at": "_commit_timestamp"}
+        )
+        cols = ["_commit_version", "_commit_timestamp", "status", "risk_score", "assigned_to", "compliance_officer", "changed_fields"]
+        return silver[cols].reset_index(drop=True)
+    # Index not deployed or behind Silver: scan Silver's change feed.
     stmt = f"""
       SELECT _commit_version, _commit_timestamp, status, risk_score, assigned_to, compliance_officer
       FROM table_changes('{SILVER_TABLE}', 0)
-      WHERE case_id = {_sql_quote(case_id)}
+      WHERE case_id = :case_id
       ORDER BY _commit_version DESC
       LIMIT 200
     """
     try:
-        return _sql_fetch_df(stmt)
+        return _cached_fetch_df(stmt, {"case_id": case_id})
     except Exception:
         stmt2 = f"""
       SELECT _commit_version, _commit_timestamp, status, risk_score, assigned_to
       FROM table_changes('{SILVER_TABLE}', 0)
-      WHERE case_id = {_sql_quote(case_id)}
+      WHERE case_id = :case_id
       ORDER BY _commit_version DESC
       LIMIT 200
     """
-        return _sql_fetch_df(stmt2)
+        return _cached_fetch_df(stmt2, {"case_id": case_id})
 
 
-def _kpis(df: pd.DataFrame) -> Dict[str, Any]:
-    # Backwards-compatible wrapper
-    return kpis(df)
+def _case_activity(case_id: str) -> pd.DataFrame:
+    cols = ["changed_at", "change_type", "officer_email", "status", "assigned_to", "note"]
+    hist = _indexed_history(case_id, CASE_MGMT_EVENTS_TABLE)
+    if hist is not None:
+        return hist.loc[hist["source"] == SOURCE_EVENT, cols].reset_index(drop=True)
+    # Index not deployed or behind the events table: read the events directly.
+    stmt = f"""
+      SELECT created_at AS changed_at, event_type AS change_type, officer_email,
+             new_status AS status, assigned_to, note
+      FROM {CASE_MGMT_EVENTS_TABLE}
+      WHERE case_id = :case_id
+      ORDER BY created_at DESC
+      LIMIT 200
+    """
+    try:
+        df = _cached_fetch_df(stmt, {"case_id": case_id})
+    except Exception:
+        return pd.DataFrame(columns=cols)
+    return df if not df.empty else pd.DataFrame(columns=cols)
 
 
 def main() -> None:
@@ -339,12 +538,17 @@ def main() -> None:
         st.markdown("---")
         st.markdown("### Officer")
         officer_email = st.text_input("Email", value="revenue.officer1@qro.qld.gov.au")
+        _spool_health()
         st.markdown("---")
         st.markdown("### My Rules")
 
         rules_df = _load_rules(officer_email)
+        match_counts = _rule_match_counts(rules_df)
         if not rules_df.empty:
-            st.dataframe(rules_df[["rule_name", "last_used_at"]], use_container_width=True, height=160)
+            rules_view = rules_df[[c for c in ("rule_name", "last_used_at", "use_count") if c in rules_df.columns]].copy()
+            if match_counts:
+                rules_view.insert(1, "matches", rules_df["rule_id"].map(match_counts))
+            st.dataframe(rules_view, use_container_width=True, height=160)
 
         rule_id_to_name = {}
         if not rules_df.empty:
@@ -354,7 +558,11 @@ def main() -> None:
                 if isinstance(rid, str) and rid:
                     rule_id_to_name[rid] = str(nm) if nm is not None else rid
 
-        sorted_rule_ids = sorted(rule_id_to_name.keys(), key=lambda rid: rule_id_to_name[rid].lower())
+        # Most-used rules first (once use_count exists), then by name.
+        use_counts = {}
+        if "use_count" in rules_df.columns:
+            use_counts = dict(zip(rules_df["rule_id"], pd.to_numeric(rules_df["use_count"], errors="coerce").fillna(0)))
+        sorted_rule_ids = sorted(rule_id_to_name.keys(), key=lambda rid: (-use_counts.get(rid, 0), rule_id_to_name[rid].lower()))
         selected_rule_id = st.selectbox(
             "Select rule",
             options=[None] + sorted_rule_ids,
@@ -379,9 +587,13 @@ def main() -> None:
                 "risk_score_min": int(risk_score_min),
             }
             rid = _save_rule(officer_email, new_rule_name, conds)
+            try:
+                _gold_refresher().rematch_rule(OfficerRule(rule_id=rid, officer_email=officer_email, rule_name=new_rule_name, filter_conditions=conds))
+            except Exception:
+                pass  # not deployed or failed; the rule is applied via its WHERE clause until the next Gold refresh
             st.success(f"Saved rule: {new_rule_name} ({rid})")
             st.session_state["selected_rule_id"] = rid
-            st.cache_data.clear()
+            _query_cache().invalidate(OFFICER_RULES_TABLE, RULE_MATCHES_TABLE, GOLD_REFRESH_WATERMARK_TABLE)
 
 
     # Quick filters (always applied on top of either rule filters or default view)
@@ -404,69 +616,88 @@ def main() -> None:
     with g2:
         q_assignment = st.selectbox("Assignment", ["Any", "Unassigned", "Assigned to me"], index=0)
 
-    where = ["1=1"]
+    where = Where()
+    used_rule_id = None
+    compiled_rule = None
 
     # Rule filters (saved)
     if selected_rule_id and not rules_df.empty:
         row = rules_df[rules_df["rule_id"] == selected_rule_id]
         if not row.empty:
-            r0 = row.iloc[0].to_dict()
-            conds = json.loads(r0.get("filter_conditions") or "{}")
-
-            if conds.get("case_domains"):
-                vals = ",".join(_sql_quote(x) for x in conds["case_domains"])
-                where.append(f"case_domain IN ({vals})")
-            if conds.get("case_types"):
-                vals = ",".join(_sql_quote(x) for x in conds["case_types"])
-                where.append(f"case_type IN ({vals})")
-            if conds.get("industry_codes"):
-                ct = set(conds.get("case_types") or [])
-                if not ct or ("Payroll Tax" in ct):
-                    vals = ",".join(_sql_quote(x) for x in conds["industry_codes"])
-                    where.append(f"industry_code IN ({vals})")
-                else:
-                    st.warning("Industry code filter applies to Payroll Tax cases in this demo; skipping industry filter for this rule.")
-            if conds.get("tax_shortfall_min") is not None:
-                where.append(f"tax_shortfall >= {float(conds['tax_shortfall_min'])}")
-            if conds.get("risk_score_min") is not None:
-                where.append(f"risk_score >= {int(conds['risk_score_min'])}")
-
-            _mark_rule_used(selected_rule_id)
+            rule = OfficerRule.from_json_row(row.iloc[0].to_dict()).compile()
+            if selected_rule_id in match_counts:
+                # Matches current with Gold: a lookup on the clustered rule_id instead of a Gold scan.
+                RuleMatchStore.cases_where(where, selected_rule_id)
+            else:
+                rule.where(where)
+            if rule.industry_codes_skipped:
+                st.warning("Industry code filter applies to Payroll Tax cases in this demo; skipping industry filter for this rule.")
+
+            used_rule_id = selected_rule_id
+            compiled_rule = rule
+            _record_rule_use(selected_rule_id)
 
     # Quick filters (ad hoc)
     if q_domain:
-        vals = ",".join(_sql_quote(x) for x in q_domain)
-        where.append(f"case_domain IN ({vals})")
+        where.isin("case_domain", q_domain, name="case_domain")
     if q_type:
-        vals = ",".join(_sql_quote(x) for x in q_type)
-        where.append(f"case_type IN ({vals})")
+        where.isin("case_type", q_type, name="case_type")
     if q_status:
-        vals = ",".join(_sql_quote(x) for x in q_status)
-        where.append(f"status IN ({vals})")
+        where.isin("status", q_status, name="status")
     if q_min_risk and int(q_min_risk) > 0:
-        where.append(f"risk_score >= {int(q_min_risk)}")
+        where.gte("risk_score", int(q_min_risk), name="risk_min")
     if q_min_shortfall and float(q_min_shortfall) > 0:
-        where.append(f"tax_shortfall >= {float(q_min_shortfall)}")
+        where.gte("tax_shortfall", float(q_min_shortfall), name="shortfall_min")
     if q_assignment == "Unassigned":
-        where.append("(assigned_to IS NULL OR assigned_to = '')")
+        where.add("(assigned_to IS NULL OR assigned_to = '')")
     elif q_assignment == "Assigned to me":
-        where.append(f"assigned_to = {_sql_quote(officer_email)}")
+        where.eq("assigned_to", officer_email, name="officer_email")
     if q_search.strip():
-        s = q_search.strip().lower().replace("'", "''")
-        where.append(f"(lower(case_id) LIKE '%{s}%' OR lower(taxpayer_name) LIKE '%{s}%')")
-
-    stmt = f"""
-      SELECT *
-      FROM {GOLD_TABLE_ACTIVE}
-      WHERE {' AND '.join(where)}
-      LIMIT 5000
-    """
-    applied = _sql_fetch_df(stmt)
-
-    if applied is None:
-        applied = _load_cases()
+        pattern = where.param("search", f"%{q_search.strip().lower()}%")
+        where.add(f"(lower(case_id) LIKE {pattern} OR lower(taxpayer_name) LIKE {pattern})")
+
+    # KPIs come from the pre-aggregated case_rollup when only dimension filters
+    # are active and the rollup reflects Gold as it is now.
+    rollup_filters = {"case_domain": q_domain, "case_type": q_type, "status": q_status}
+    other_filters = (
+        used_rule_id
+        or int(q_min_risk or 0) > 0
+        or float(q_min_shortfall or 0) > 0
+        or q_assignment != "Any"
+        or q_search.strip()
+    )
+    use_rollup = not other_filters and CaseRollup.can_serve(rollup_filters) and _rollup_fresh()
+    if use_rollup:
+        kpi_query = CaseRollup(_executor()).kpi_statement(rollup_filters)
+    else:
+        kpi_query = kpi_statement(GOLD_TABLE_ACTIVE, where)
+    cursors = _page_cursors(where)
+    local_cases = None
+    if USE_LOCAL_REPLICA:
+        # Only the changes since the last sync cross the wire; everything below runs in-process.
+        replica = _replica()
+        replica.sync_if_stale(10.0)
+        local_cases = _local_view(
+            replica.snapshot(),
+            compiled_rule,
+            q_domain,
+            q_type,
+            q_status,
+            int(q_min_risk or 0),
+            float(q_min_shortfall or 0),
+            q_assignment,
+            officer_email,
+            q_search.strip(),
+        )
+        page, k = local_page(local_cases, cursors[-1], _case_pager().page_size), kpis(local_cases)
+    else:
+        page, k = _fetch_page(where, cursors[-1], kpi_query)
+    applied = page.frame
+    approx_taxpayers = use_rollup and local_cases is None and k is not None
 
-    k = kpis(applied)
+    if k is None:
+        # Local fallback over the fetched page only.
+        k = kpis(applied)
 
     c1, c2, c3, c4 = st.columns(4)
     with c1:
@@ -490,9 +721,11 @@ def main() -> None:
     with c4:
         st.markdown(
             '<div class="qro-card"><div class="qro-kpi">Unique Taxpayers</div>'
-            f'<div class="qro-kpi-value">{k["unique_taxpayers"]}</div></div>',
+            f'<div class="qro-kpi-value">{"≈" if approx_taxpayers else ""}{k["unique_taxpayers"]}</div></div>',
             unsafe_allow_html=True,
         )
+        if approx_taxpayers:
+            st.caption("Approximate: estimated from the HLL sketches in case_rollup.")
 
     st.markdown("### Active Cases")
     if applied.empty:
@@ -523,19 +756,85 @@ def main() -> None:
     if "taxpayer_abn" in d.columns:
         d["taxpayer_abn"] = d["taxpayer_abn"].map(format_abn)
     if "tax_shortfall" in d.columns:
-        d["tax_shortfall"] = pd.to_numeric(d["tax_shortfall"], errors="coerce").fillna(0).map(lambda x: f"${float(x):,.0f}")
+        d["tax_shortfall"] = d["tax_shortfall"].map(lambda x: f"${as_float(x):,.0f}")
     st.dataframe(d, use_container_width=True, height=360)
 
+    with st.expander("Bulk actions (current filtered selection)", expanded=False):
+        st.caption(f"Applies to every case matching the filters above (up to {BULK_MAX_CASES:,}), not just this page.")
+        b1, b2, b3 = st.columns([1, 1, 1])
+        with b1:
+            bulk_assign = st.button("Assign all to me")
+        with b2:
+            bulk_status = st.selectbox(
+                "Bulk status",
+                options=["Open", "Under Review", "Investigation", "Compliance Action", "Closed"],
+                key="bulk_status",
+                label_visibility="collapsed",
+            )
+        with b3:
+            bulk_set_status = st.button("Set status for all")
+        selection = (where.sql(), params_key(where.params))
+        if bulk_assign or bulk_set_status:
+            # Nothing is written until the officer confirms the count below.
+            st.session_state["_bulk_pending"] = {
+                "selection": selection,
+                "status": None if bulk_assign else bulk_status,
+                "case_ids": _filtered_case_ids(where, local_cases),
+            }
+        pending = st.session_state.get("_bulk_pending")
+        if pending is not None and pending["selection"] != selection:
+            # Filters changed since the button was pressed: the counted selection is gone.
+            st.session_state.pop("_bulk_pending")
+            pending = None
+        if pending is not None:
+            case_ids = pending["case_ids"]
+            what = f"Set status to {pending['status']}" if pending["status"] else f"Assign to {officer_email}"
+            st.warning(f"{what} for {len(case_ids):,} cases?")
+            c_ok, c_cancel, _ = st.columns([1, 1, 4])
+            with c_ok:
+                confirmed = st.button(f"Confirm ({len(case_ids):,})", type="primary", disabled=not case_ids)
+            with c_cancel:
+                cancelled = st.button("Cancel", key="bulk_cancel")
+            if confirmed:
+                if pending["status"]:
+                    actions = [set_status(cid, officer_email, pending["status"]) for cid in case_ids]
+                else:
+                    actions = [assign(cid, officer_email, officer_email) for cid in case_ids]
+                _write_actions(actions)
+                st.session_state.pop("_bulk_pending")
+                st.success(f"Updated {len(case_ids):,} cases.")
+            elif cancelled:
+                st.session_state.pop("_bulk_pending")
+                st.rerun()
+
+    page_index = len(cursors) - 1
+    first, last = page_bounds(page_index, page, _case_pager().page_size)
+    p1, p2, p3 = st.columns([1, 1, 4])
+    with p1:
+        if st.button("Previous", disabled=page_index == 0):
+            cursors.pop()
+            st.rerun()
+    with p2:
+        if st.button("Next", disabled=not page.has_more):
+            cursors.append(page.next_cursor)
+            st.rerun()
+    with p3:
+        st.caption(f"Cases {first:,}–{last:,} of {k['total_cases']:,}")
+    if local_cases is None:
+        # Start the next page on the warehouse while this one is being read
+        # (once per filter and cursor; a superseded prefetch is cancelled).
+        _case_pager().prefetch(where, page.next_cursor, supersede_key=_session_key("prefetch"))
+
     st.markdown("### Case Details")
 
     selected_case_id = st.text_input("Case ID", value=str(d.iloc[0]["case_id"]))
-    case_row = applied[applied["case_id"] == selected_case_id]
-    if case_row.empty:
-        st.warning("Case not found in current filtered view.")
+    r = _replica().get(selected_case_id.strip()) if local_cases is not None else None
+    if r is None:
+        r = _load_case(selected_case_id.strip())
+    if r is None:
+        st.warning("Case not found.")
         return
 
-    r = case_row.iloc[0].to_dict()
-
     # Drill-down header
     hdr_left, hdr_right = st.columns([3, 2])
     with hdr_left:
@@ -548,17 +847,9 @@ def main() -> None:
         with a1:
             st.metric("Risk", r.get("risk_score", "-"))
         with a2:
-            try:
-                shortfall = float(pd.to_numeric(pd.Series([r.get('tax_shortfall')]), errors='coerce').fillna(0).iloc[0])
-            except Exception:
-                shortfall = 0.0
-            st.metric("Shortfall", f"${shortfall:,.0f}")
+            st.metric("Shortfall", f"${as_float(r.get('tax_shortfall')):,.0f}")
         with a3:
-            try:
-                exposure = float(pd.to_numeric(pd.Series([r.get('total_exposure')]), errors='coerce').fillna(0).iloc[0])
-            except Exception:
-                exposure = 0.0
-            st.metric("Exposure", f"${exposure:,.0f}")
+            st.metric("Exposure", f"${as_float(r.get('total_exposure')):,.0f}")
 
     tab_overview, tab_fin, tab_risk, tab_history, tab_activity = st.tabs(
         ["Overview", "Financials", "Risk & Factors", "History", "Activity"]
@@ -587,16 +878,14 @@ def main() -> None:
 
     with tab_fin:
         f1, f2, f3, f4 = st.columns(4)
-        def _num(x):
-            return float(pd.to_numeric(pd.Series([x]), errors='coerce').fillna(0).iloc[0])
         with f1:
-            st.metric("Assessed", f"${_num(r.get('tax_amount_assessed')):,.0f}")
+            st.metric("Assessed", f"${as_float(r.get('tax_amount_assessed')):,.0f}")
         with f2:
-            st.metric("Paid", f"${_num(r.get('tax_amount_paid')):,.0f}")
+            st.metric("Paid", f"${as_float(r.get('tax_amount_paid')):,.0f}")
         with f3:
-            st.metric("Penalty", f"${_num(r.get('penalty_amount')):,.0f}")
+            st.metric("Penalty", f"${as_float(r.get('penalty_amount')):,.0f}")
         with f4:
-            st.metric("Interest", f"${_num(r.get('interest_amount')):,.0f}")
+            st.metric("Interest", f"${as_float(r.get('interest_amount')):,.0f}")
 
     with tab_risk:
         st.markdown("**Fraud suspected**")
@@ -614,11 +903,15 @@ def main() -> None:
             st.write("-")
 
     with tab_history:
-        st.caption("Delta history (table_changes on Silver)")
+        st.caption("Delta history of Silver (case_history index)")
         hist = _case_history(selected_case_id)
         st.dataframe(hist, use_container_width=True, height=260)
 
     with tab_activity:
+        activity = _case_activity(selected_case_id)
+        if not activity.empty:
+            st.markdown("#### Recent activity")
+            st.dataframe(activity, use_container_width=True, height=180)
         st.markdown("#### Case Management")
         new_status = st.selectbox(
             "Set status",
@@ -631,25 +924,22 @@ def main() -> None:
         cma, cmb, cmc = st.columns(3)
         with cma:
             if st.button("Assign to me"):
-                _upsert_case_state(selected_case_id, assigned_to=officer_email)
-                _insert_case_event(selected_case_id, officer_email, "ASSIGN", assigned_to=officer_email)
-                st.cache_data.clear()
+                _write_actions([assign(selected_case_id, officer_email, officer_email)])
                 st.success("Assigned.")
         with cmb:
             if st.button("Unassign"):
-                _upsert_case_state(selected_case_id, assigned_to="")
-                _insert_case_event(selected_case_id, officer_email, "UNASSIGN", assigned_to="")
-                st.cache_data.clear()
+                _write_actions([unassign(selected_case_id, officer_email)])
                 st.success("Unassigned.")
         with cmc:
             if st.button("Save status/note"):
                 status_val = None if new_status == "(no change)" else new_status
+                actions = []
                 if status_val is not None:
-                    _upsert_case_state(selected_case_id, status=status_val)
-                    _insert_case_event(selected_case_id, officer_email, "STATUS_CHANGE", new_status=status_val)
+                    actions.append(set_status(selected_case_id, officer_email, status_val))
                 if note.strip():
-                    _insert_case_event(selected_case_id, officer_email, "NOTE", note=note.strip())
-                st.cache_data.clear()
+                    actions.append(add_note(selected_case_id, officer_email, note.strip()))
+                if actions:
+                    _write_actions(actions)
                 st.success("Saved.")
 
         with st.expander("Prepare ServiceNow Incident (demo)", expanded=False):
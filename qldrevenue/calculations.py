@@ -1,6 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from datetime import date
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
 
 
 @dataclass(frozen=True)
@@ -19,3 +24,164 @@ def penalty_amount(tax_shortfall: float, is_fraud: bool) -> float:
 def interest_amount(tax_shortfall: float, days_overdue: int, annual_rate: float = 0.08) -> float:
     """Simple interest: shortfall * annual_rate * (days_overdue/365)."""
     return round(float(tax_shortfall) * float(annual_rate) * (int(days_overdue) / 365.0), 2)
+
+
+# --- Vectorised, exact (int64 cents) versions --------------------------------
+#
+# Mirrors the DECIMAL arithmetic of sql/04_populate_silver.sql. With s the
+# shortfall (DECIMAL(19,2)) and d = greatest(datediff(as_of, due), 0):
+#   penalty  = CAST(s * 0.75|0.20 AS DECIMAL(18,2))                    exact, then HALF_UP to cents
+#   interest = CAST(s * 0.08 * (d / 365.0) AS DECIMAL(18,2))
+#              d / 365.0 is DECIMAL(17,6) (HALF_UP); the product is DECIMAL(38,8) (HALF_UP)
+#   total    = CAST(s + s * rate + s * 0.08 * (d / 365.0) AS DECIMAL(18,2))
+#              the sum is DECIMAL(38,7) (HALF_UP), then HALF_UP to cents
+
+PENALTY_RATE_PCT = 20
+FRAUD_PENALTY_RATE_PCT = 75
+INTEREST_RATE_PCT = 8
+
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+def _half_up(n: np.ndarray, d: int) -> np.ndarray:
+    """n / d rounded half away from zero (Spark/Java HALF_UP), for int64 n and d > 0."""
+    q, r = np.divmod(np.abs(n), d)
+    q = q + (2 * r >= d)
+    return np.where(n < 0, -q, q)
+
+
+def _half_up_int(n: int, d: int) -> int:
+    q, r = divmod(abs(n), d)
+    q += 2 * r >= d
+    return -q if n < 0 else q
+
+
+def _as_int64(values: Any) -> np.ndarray:
+    return np.asarray(values, dtype=np.int64)
+
+
+def _like(result: np.ndarray, template: Any, name: Optional[str] = None) -> Any:
+    if isinstance(template, pd.Series):
+        return pd.Series(result, index=template.index, name=name)
+    return result
+
+
+def to_cents(amounts: Any) -> Any:
+    """DECIMAL(18,2) values (floats/Decimals/strings) -> int64 cents; NULL -> 0."""
+    values = pd.to_numeric(pd.Series(amounts) if not isinstance(amounts, pd.Series) else amounts, errors="coerce")
+    cents = np.rint(values.to_numpy(dtype="float64", na_value=0.0) * 100.0).astype(np.int64)
+    return _like(cents, amounts)
+
+
+def days_overdue(due_dates: Any, as_of: date) -> Any:
+    """`greatest(datediff(as_of, due), 0)`; a NULL due date gives 0."""
+    due = pd.to_datetime(pd.Series(due_dates) if not isinstance(due_dates, pd.Series) else due_dates, errors="coerce")
+    days = (pd.Timestamp(as_of) - due.dt.normalize()).dt.days.to_numpy(dtype="float64")
+    out = np.maximum(np.nan_to_num(days, nan=0.0), 0).astype(np.int64)
+    return _like(out, due_dates)
+
+
+def penalty_rate_pct(is_fraud: Any) -> np.ndarray:
+    return np.where(np.asarray(is_fraud, dtype=bool), FRAUD_PENALTY_RATE_PCT, PENALTY_RATE_PCT).astype(np.int64)
+
+
+def penalty_cents(shortfall_cents: Any, is_fraud: Any = False, rate_pct: Any = None) -> Any:
+    """Vectorised `penalty_amount` in cents (`rate_pct` overrides `is_fraud`)."""
+    c = _as_int64(shortfall_cents)
+    rate = penalty_rate_pct(np.broadcast_to(is_fraud, c.shape)) if rate_pct is None else _as_int64(rate_pct)
+    return _like(_half_up(c * rate, 100), shortfall_cents)
+
+
+def _interest_scale8(c: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """s * 0.08 * (d / 365.0) as DECIMAL(38,8), in units of 1e-8."""
+    q6 = _half_up(days * 1_000_000, 365)  # d / 365.0 at scale 6
+    b = INTEREST_RATE_PCT * q6  # 0.08 * (d / 365.0) at scale 8 (exact)
+    # c * b is at scale 10; rounded to scale 8. Rows whose product would not
+    # fit in int64 take the (exact) Python-int path.
+    safe = np.abs(c) <= _INT64_MAX // np.maximum(b, 1)
+    out = np.zeros(c.shape, dtype=object if not safe.all() else np.int64)
+    out[safe] = _half_up(c[safe] * b[safe], 100)
+    for i in np.flatnonzero(~safe):
+        out[i] = _half_up_int(int(c[i]) * int(b[i]), 100)
+    return out
+
+
+def _to_cents_from(scaled: np.ndarray, scale_digits: int) -> np.ndarray:
+    d = 10 ** scale_digits
+    if scaled.dtype != object:
+        return _half_up(scaled, d)
+    return np.array([_half_up_int(int(v), d) for v in scaled], dtype=np.int64)
+
+
+def interest_cents(shortfall_cents: Any, days: Any) -> Any:
+    """Vectorised `interest_amount` in cents: 8% p.a. simple interest for `days` days."""
+    c = _as_int64(shortfall_cents)
+    d = np.broadcast_to(_as_int64(days), c.shape)
+    return _like(_to_cents_from(_interest_scale8(c, d), 6), shortfall_cents)
+
+
+def total_exposure_cents(shortfall_cents: Any, days: Any, is_fraud: Any = False, rate_pct: Any = None) -> Any:
+    """Vectorised `total_exposure` in cents: shortfall + penalty + interest, rounded as the SQL does."""
+    c = _as_int64(shortfall_cents)
+    d = np.broadcast_to(_as_int64(days), c.shape)
+    rate = penalty_rate_pct(np.broadcast_to(is_fraud, c.shape)) if rate_pct is None else np.broadcast_to(_as_int64(rate_pct), c.shape)
+    interest8 = _interest_scale8(c, d)
+    # Sum at scale 8, rounded to DECIMAL(38,7); oversized rows take the Python-int path.
+    safe = np.abs(c) <= _INT64_MAX // 4_000_000
+    if interest8.dtype == object:
+        safe &= False
+    else:
+        safe &= np.abs(interest8) <= _INT64_MAX // 4
+    total7 = np.zeros(c.shape, dtype=object if not safe.all() else np.int64)
+    total7[safe] = _half_up(c[safe] * 1_000_000 + c[safe] * rate[safe] * 10_000 + interest8[safe].astype(np.int64), 10)
+    for i in np.flatnonzero(~safe):
+        ci = int(c[i])
+        total7[i] = _half_up_int(ci * 1_000_000 + ci * int(rate[i]) * 10_000 + int(interest8[i]), 10)
+    return _like(_to_cents_from(total7, 5), shortfall_cents)
+
+
+def infer_penalty_rate_pct(shortfall_cents: Any, penalty: Any) -> np.ndarray:
+    """The Silver penalty rate per row, guessed from stored shortfall/penalty cents.
+
+    Only for frames without `is_fraud_suspected` (see `recompute_exposure`).
+    The fraud rate applies where the stored penalty equals the 75% penalty;
+    anything else (including zero shortfall) gets the standard 20%.
+    """
+    c = _as_int64(shortfall_cents)
+    fraud = _half_up(c * FRAUD_PENALTY_RATE_PCT, 100)
+    return np.where((_as_int64(penalty) == fraud) & (c != 0), FRAUD_PENALTY_RATE_PCT, PENALTY_RATE_PCT).astype(np.int64)
+
+
+def _column_cents(column: pd.Series) -> pd.Series:
+    # Columns read with `decimal_as_cents` are already int cents.
+    if pd.api.types.is_integer_dtype(column):
+        return column.fillna(0).astype(np.int64)
+    return to_cents(column)
+
+
+def recompute_exposure(frame: pd.DataFrame, as_of: date, due_column: str = "lodgement_due_date") -> pd.DataFrame:
+    """Copy of Silver/Gold rows with `interest_amount` and `total_exposure` re-evaluated at `as_of`.
+
+    Amount columns keep their representation: int cents stay cents, anything
+    else comes back as float dollars. Penalty does not depend on the date and
+    is left as stored. Its rate follows `is_fraud_suspected`, which Silver sets
+    with the same CASE that picks the 75% rate (sql/04_populate_silver.sql);
+    only frames without that column fall back to `infer_penalty_rate_pct`.
+    """
+    if frame.empty:
+        return frame.copy()
+    shortfall = _column_cents(frame["tax_shortfall"])
+    if "is_fraud_suspected" in frame.columns:
+        rate = penalty_rate_pct(frame["is_fraud_suspected"].eq(True).to_numpy())
+    else:
+        rate = infer_penalty_rate_pct(shortfall, _column_cents(frame["penalty_amount"]))
+    days = days_overdue(frame[due_column], as_of)
+    interest = interest_cents(shortfall.to_numpy(), days.to_numpy())
+    total = total_exposure_cents(shortfall.to_numpy(), days.to_numpy(), rate_pct=rate)
+    out = frame.copy()
+    for column, cents in (("interest_amount", interest), ("total_exposure", total)):
+        if pd.api.types.is_integer_dtype(frame[column]):
+            out[column] = cents
+        else:
+            out[column] = cents / 100.0
+    return out
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from qldrevenue.constants import GOLD_TABLE_ACTIVE
+from qldrevenue.sqlbuilder import Where, params_key
+
+# Columns shown in the Active Cases grid. `allocation_priority` is the leading
+# sort key and is needed to build the next-page cursor.
+CASE_LIST_COLUMNS = (
+    "case_id",
+    "case_type",
+    "case_domain",
+    "taxpayer_name",
+    "taxpayer_abn",
+    "tax_shortfall",
+    "risk_score",
+    "status",
+    "severity",
+    "regional_office",
+    "financial_year",
+    "allocation_priority",
+)
+
+# NULL risk scores sort last within a priority band.
+_RISK_KEY = "COALESCE(risk_score, -1)"
+_ORDER_BY = f"allocation_priority ASC, {_RISK_KEY} DESC, case_id ASC"
+
+
+@dataclass(frozen=True)
+class PageCursor:
+    """Sort key of the last row of a page: `(allocation_priority, risk_score DESC, case_id)`."""
+
+    allocation_priority: int
+    risk_score: int
+    case_id: str
+
+    @staticmethod
+    def from_row(row: Dict[str, Any]) -> "PageCursor":
+        risk = row.get("risk_score")
+        if risk is None or (isinstance(risk, float) and math.isnan(risk)):
+            risk = -1
+        return PageCursor(int(row["allocation_priority"]), int(risk), str(row["case_id"]))
+
+    def where(self, where: Where) -> Where:
+        """Add the keyset predicate "strictly after this row" to `where`."""
+        p = where.param("after_priority", self.allocation_priority)
+        r = where.param("after_risk", self.risk_score)
+        c = where.param("after_case_id", self.case_id)
+        return where.add(
+            f"(allocation_priority > {p} OR (allocation_priority = {p} AND "
+            f"({_RISK_KEY} < {r} OR ({_RISK_KEY} = {r} AND case_id > {c}))))"
+        )
+
+
+@dataclass(frozen=True)
+class CasePage:
+    frame: pd.DataFrame
+    next_cursor: Optional[PageCursor]
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+class CaseListPager:
+    """Keyset-paginated, column-projected reads of the active case list.
+
+    Each page is `page_size` rows of `columns` only, ordered by a unique key,
+    so paging deeper costs the same as the first page and never skips or
+    repeats rows. `prefetch` starts the next page on the warehouse while the
+    current one is rendered; the full row of a case comes from `fetch_case`.
+    """
+
+    def __init__(
+        self,
+        executor: Any,
+        table: str = GOLD_TABLE_ACTIVE,
+        page_size: int = 50,
+        columns: Sequence[str] = CASE_LIST_COLUMNS,
+    ) -> None:
+        self.executor = executor
+        self.table = table
+        self.page_size = page_size
+        self.columns = tuple(columns)
+        # Single-slot prefetch: (statement key, handle)
+        self._prefetched: Optional[Tuple[Any, Any]] = None
+        # Key of the last page prefetched, kept after the prefetch is consumed.
+        self._last_prefetch_key: Any = None
+
+    def page_statement(self, where: Optional[Where] = None, after: Optional[PageCursor] = None) -> Tuple[str, Dict[str, Any]]:
+        page_where = Where()
+        if where is not None:
+            page_where.clauses = list(where.clauses)
+            page_where.params = dict(where.params)
+        if after is not None:
+            after.where(page_where)
+        # One extra row tells whether a next page exists.
+        stmt = f"""
+      SELECT {", ".join(self.columns)}
+      FROM {self.table}
+      WHERE {page_where.sql()}
+      ORDER BY {_ORDER_BY}
+      LIMIT {int(self.page_size) + 1}
+    """
+        return stmt, page_where.params
+
+    @staticmethod
+    def _key(stmt: str, params: Dict[str, Any]) -> Any:
+        return (stmt, params_key(params))
+
+    def submit_page(
+        self,
+        where: Optional[Where] = None,
+        after: Optional[PageCursor] = None,
+        supersede_key: Optional[str] = None,
+    ) -> Any:
+        """Start (or reuse the prefetched) page statement; await with `executor.gather`."""
+        stmt, params = self.page_statement(where, after)
+        key = self._key(stmt, params)
+        if self._prefetched is not None and self._prefetched[0] == key:
+            handle = self._prefetched[1]
+            self._prefetched = None
+            return handle
+        return self.executor.submit(stmt, params, supersede_key=supersede_key)
+
+    def page_from_frame(self, df: pd.DataFrame) -> CasePage:
+        """Trim the look-ahead row and derive the next cursor."""
+        return _page_from_frame(df, self.page_size, self.columns)
+
+    def fetch_page(self, where: Optional[Where] = None, after: Optional[PageCursor] = None) -> CasePage:
+        return self.page_from_frame(self.executor.gather([self.submit_page(where, after)])[0])
+
+    def prefetch(self, where: Optional[Where], after: Optional[PageCursor], supersede_key: Optional[str] = None) -> None:
+        """Submit the page after `after` without waiting; replaces any earlier prefetch.
+
+        Only the first call for a filter and cursor submits: reruns that leave
+        both unchanged (opening a case, writing a note) do not start the same
+        page again after its prefetch was consumed.
+        """
+        if after is None:
+            return
+        stmt, params = self.page_statement(where, after)
+        key = self._key(stmt, params)
+        if key == self._last_prefetch_key:
+            return
+        if self._prefetched is not None:
+            self._cancel_prefetch()
+        self._last_prefetch_key = key
+        self._prefetched = (key, self.executor.submit(stmt, params, supersede_key=supersede_key))
+
+    def _cancel_prefetch(self) -> None:
+        handle = self._prefetched[1] if self._prefetched else None
+        self._prefetched = None
+        statement_id = getattr(handle, "statement_id", None)
+        if not statement_id:
+            return
+        try:
+            self.executor.cancel(statement_id)
+        except Exception:
+            # Already finished; nothing left to stop.
+            pass
+
+    def fetch_case(self, case_id: str) -> Optional[Dict[str, Any]]:
+        """Full Gold row of one case (all columns), or None."""
+        df = self.executor.fetch(
+            f"""
+      SELECT *
+      FROM {self.table}
+      WHERE case_id = :case_id
+      LIMIT 1
+    """,
+            {"case_id": case_id},
+        )
+        if df is None or df.empty:
+            return None
+        return df.iloc[0].to_dict()
+
+
+def _page_from_frame(df: pd.DataFrame, page_size: int, columns: Sequence[str]) -> CasePage:
+    if df is None or df.empty:
+        return CasePage(pd.DataFrame(columns=list(columns)), None)
+    if len(df) <= page_size:
+        return CasePage(df.reset_index(drop=True), None)
+    page = df.iloc[:page_size].reset_index(drop=True)
+    return CasePage(page, PageCursor.from_row(page.iloc[-1].to_dict()))
+
+
+def local_page(
+    frame: pd.DataFrame,
+    after: Optional[PageCursor] = None,
+    page_size: int = 50,
+    columns: Sequence[str] = CASE_LIST_COLUMNS,
+) -> CasePage:
+    """The page `CaseListPager.fetch_page` would return, computed from an in-memory frame."""
+    if frame.empty:
+        return _page_from_frame(frame, page_size, columns)
+    priority = frame["allocation_priority"].to_numpy(dtype="int64")
+    risk = pd.to_numeric(frame["risk_score"], errors="coerce").fillna(-1).to_numpy(dtype="float64")
+    case_id = frame["case_id"].astype(str).to_numpy()
+    keep = np.ones(len(frame), dtype=bool)
+    if after is not None:
+        keep = (priority > after.allocation_priority) | (
+            (priority == after.allocation_priority)
+            & ((risk < after.risk_score) | ((risk == after.risk_score) & (case_id > after.case_id)))
+        )
+    rows = np.flatnonzero(keep)
+    # lexsort: last key is primary
+    order = rows[np.lexsort((case_id[rows], -risk[rows], priority[rows]))][: page_size + 1]
+    cols = [c for c in columns if c in frame.columns]
+    return _page_from_frame(frame[cols].take(order), page_size, columns)
+
+
+def page_bounds(page_index: int, page: CasePage, page_size: int) -> Tuple[int, int]:
+    """1-based (first, last) row numbers shown on a page."""
+    first = page_index * page_size + 1
+    return (first, first + len(page.frame) - 1) if len(page.frame) else (0, 0)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from qldrevenue.constants import CASE_MGMT_EVENTS_TABLE, CASE_MGMT_STATE_TABLE
+
+EVENT_ASSIGN = "ASSIGN"
+EVENT_UNASSIGN = "UNASSIGN"
+EVENT_STATUS_CHANGE = "STATUS_CHANGE"
+EVENT_NOTE = "NOTE"
+
+_STATE_FIELDS = ("status", "assigned_to", "compliance_officer")
+_STATE_SCHEMA = "ARRAY<STRUCT<case_id: STRING, status: STRING, assigned_to: STRING, compliance_officer: STRING>>"
+_EVENT_SCHEMA = (
+    "ARRAY<STRUCT<event_id: STRING, case_id: STRING, officer_email: STRING, event_type: STRING, "
+    "new_status: STRING, assigned_to: STRING, note: STRING, created_at: STRING>>"
+)
+
+
+@dataclass(frozen=True)
+class CaseAction:
+    """One officer action on one case: an audit event plus, optionally, a state change.
+
+    `status` / `assigned_to` / `compliance_officer` left as None keep the
+    current state (an empty string clears `assigned_to`, as "Unassign" does).
+    """
+
+    case_id: str
+    officer_email: str
+    event_type: str
+    status: Optional[str] = None
+    assigned_to: Optional[str] = None
+    compliance_officer: Optional[str] = None
+    note: Optional[str] = None
+    event_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    @property
+    def changes_state(self) -> bool:
+        return any(getattr(self, f) is not None for f in _STATE_FIELDS)
+
+    def event_row(self) -> Dict[str, Any]:
+        return {
+            "event_id": self.event_id,
+            "case_id": self.case_id,
+            "officer_email": self.officer_email,
+            "event_type": self.event_type,
+            "new_status": self.status,
+            "assigned_to": self.assigned_to,
+            "note": self.note,
+            "created_at": self.created_at.isoformat(sep=" "),
+        }
+
+
+def assign(case_id: str, officer_email: str, assignee: str) -> CaseAction:
+    return CaseAction(case_id, officer_email, EVENT_ASSIGN, assigned_to=assignee)
+
+
+def unassign(case_id: str, officer_email: str) -> CaseAction:
+    return CaseAction(case_id, officer_email, EVENT_UNASSIGN, assigned_to="")
+
+
+def set_status(case_id: str, officer_email: str, status: str) -> CaseAction:
+    return CaseAction(case_id, officer_email, EVENT_STATUS_CHANGE, status=status)
+
+
+def add_note(case_id: str, officer_email: str, note: str) -> CaseAction:
+    return CaseAction(case_id, officer_email, EVENT_NOTE, note=note)
+
+
+def coalesce_state(actions: Sequence[CaseAction]) -> List[Dict[str, Any]]:
+    """One state row per case: later actions' non-None fields win (MERGE needs unique keys)."""
+    rows: Dict[str, Dict[str, Any]] = {}
+    for a in actions:
+        if not a.changes_state:
+            continue
+        row = rows.setdefault(a.case_id, {"case_id": a.case_id, **{f: None for f in _STATE_FIELDS}})
+        for f in _STATE_FIELDS:
+            value = getattr(a, f)
+            if value is not None:
+                row[f] = value
+    return list(rows.values())
+
+
+class CaseWriter:
+    """Applies many case actions with one MERGE into state and one INSERT into events.
+
+    Rows travel as a single JSON parameter expanded with `inline(from_json(...))`,
+    so the statement text is the same for 1 or 1,000 cases. With `spool`
+    (an `EventSpool`), audit events are queued locally and written behind;
+    only the state MERGE runs on the caller's thread.
+    """
+
+    def __init__(
+        self,
+        executor: Any,
+        state_table: str = CASE_MGMT_STATE_TABLE,
+        events_table: str = CASE_MGMT_EVENTS_TABLE,
+        spool: Any = None,
+    ) -> None:
+        self.executor = executor
+        self.state_table = state_table
+        self.events_table = events_table
+        self.spool = spool
+
+    def state_statement(self, actions: Sequence[CaseAction]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        rows = coalesce_state(actions)
+        if not rows:
+            return None
+        stmt = f"""
+      MERGE INTO {self.state_table} AS t
+      USING (
+        SELECT inline(from_json(:state_rows, '{_STATE_SCHEMA}'))
+      ) AS s
+      ON t.case_id = s.case_id
+      WHEN MATCHED THEN UPDATE SET
+        t.status = COALESCE(s.status, t.status),
+        t.assigned_to = COALESCE(s.assigned_to, t.assigned_to),
+        t.compliance_officer = COALESCE(s.compliance_officer, t.compliance_officer),
+        t.updated_at = current_timestamp()
+      WHEN NOT MATCHED THEN INSERT (case_id, status, assigned_to, compliance_officer, updated_at)
+      VALUES (s.case_id, s.status, s.assigned_to, s.compliance_officer, current_timestamp())
+    """
+        return stmt, {"state_rows": json.dumps(rows)}
+
+    def events_statement(self, actions: Sequence[CaseAction]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        if not actions:
+            return None
+        stmt = f"""
+      INSERT INTO {self.events_table}
+      (event_id, case_id, officer_email, event_type, new_status, assigned_to, note, created_at)
+      SELECT event_id, case_id, officer_email, event_type, new_status, assigned_to, note, CAST(created_at AS TIMESTAMP)
+      FROM (SELECT inline(from_json(:events, '{_EVENT_SCHEMA}')))
+    """
+        return stmt, {"events": json.dumps([a.event_row() for a in actions])}
+
+    def apply(self, actions: Sequence[CaseAction]) -> int:
+        """Write all actions: the state MERGE, then the events; returns the action count.
+
+        In that order, so a failed MERGE writes (or spools) no events and the
+        audit log never records a change that state does not have.
+        """
+        if not actions:
+            return 0
+        state = self.state_statement(actions)
+        if state is not None:
+            self.executor.exec(*state)
+        if self.spool is not None:
+            self.spool.append([a.event_row() for a in actions])
+        else:
+            self.executor.exec(*self.events_statement(actions))
+        return len(actions)
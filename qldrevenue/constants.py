@@ -4,3 +4,10 @@ SCHEMA = "qro_fraud_detection"
 SILVER_TABLE = f"{CATALOG}.{SCHEMA}.revenue_cases_silver"
 GOLD_TABLE_ACTIVE = f"{CATALOG}.{SCHEMA}.revenue_cases_gold_active"
 OFFICER_RULES_TABLE = f"{CATALOG}.{SCHEMA}.officer_case_rules"
+RULE_MATCHES_TABLE = f"{CATALOG}.{SCHEMA}.rule_matches"
+CASE_ROLLUP_TABLE = f"{CATALOG}.{SCHEMA}.case_rollup"
+CASE_MGMT_STATE_TABLE = f"{CATALOG}.{SCHEMA}.case_management_state"
+CASE_MGMT_EVENTS_TABLE = f"{CATALOG}.{SCHEMA}.case_management_events"
+GOLD_REFRESH_WATERMARK_TABLE = f"{CATALOG}.{SCHEMA}.gold_refresh_watermark"
+CASE_HISTORY_TABLE = f"{CATALOG}.{SCHEMA}.case_history"
+CASE_HISTORY_CHECKPOINT_TABLE = f"{CATALOG}.{SCHEMA}.case_history_checkpoint"
@@ -1,10 +1,25 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Iterable, List, Optional
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Iterable, Iterator, List, Optional
 
+import numpy as np
 import pandas as pd
 
+# Databricks SQL `type_name` values, grouped by the dtype we decode them into.
+_INT_TYPES = {"BYTE", "SHORT", "INT", "LONG"}
+_FLOAT_TYPES = {"FLOAT", "DOUBLE"}
+_DATE_TYPES = {"DATE"}
+_TIMESTAMP_TYPES = {"TIMESTAMP", "TIMESTAMP_NTZ"}
+
+# Strings are stored as categoricals when the column has at least this many rows
+# and at most this fraction of distinct values (e.g. case_type, status, severity).
+CATEGORICAL_MIN_ROWS = 32
+CATEGORICAL_MAX_RATIO = 0.5
+
+_BOOL_MAP = {"true": True, "false": False, True: True, False: False}
+
 
 def state_str(state: Any) -> Optional[str]:
     """Normalize SDK enum/string state values to plain strings (e.g., 'SUCCEEDED')."""
@@ -26,14 +41,94 @@ def state_str(state: Any) -> Optional[str]:
     return s.split(".")[-1]
 
 
-def dataframe_from_statement_response(resp: Any) -> pd.DataFrame:
-    """Extract a pandas DataFrame from a databricks-sdk statement execution response.
+def _column_type(col: Any) -> Optional[str]:
+    type_name = state_str(getattr(col, "type_name", None))
+    return type_name.upper() if type_name else None
 
-    Newer SDK shape:
-      resp.manifest.schema.columns + resp.result.data_array
 
-    Older/alternate shapes are handled best-effort.
+def decode_column(
+    values: Any,
+    type_name: Optional[str],
+    type_scale: Optional[int] = None,
+    decimal_as_cents: bool = False,
+    categorize: bool = True,
+) -> pd.Series:
+    """Decode one JSON_ARRAY result column (strings/None) into a typed Series.
+
+    - BYTE/SHORT/INT/LONG -> int64 (nullable Int64 when NULLs are present)
+    - FLOAT/DOUBLE -> float64
+    - DECIMAL -> float64, or exact int64 cents when `decimal_as_cents` and scale is 2
+    - DATE/TIMESTAMP -> datetime64 (timestamps normalised to naive UTC)
+    - BOOLEAN -> bool (object True/False/None when NULLs are present)
+    - STRING -> categorical for low-cardinality columns without NULLs
+
+    Unknown types are returned unchanged (object dtype).
     """
+    s = pd.Series(values, dtype=object)
+    if not type_name or s.empty:
+        return s
+
+    if type_name in _INT_TYPES:
+        return _nullable_int(pd.to_numeric(s, errors="coerce", dtype_backend="numpy_nullable"))
+
+    if type_name in _FLOAT_TYPES:
+        return pd.to_numeric(s, errors="coerce").astype("float64")
+
+    if type_name == "DECIMAL":
+        if decimal_as_cents and (type_scale is None or int(type_scale) == 2):
+            return _decimal_cents(s)
+        return pd.to_numeric(s, errors="coerce").astype("float64")
+
+    if type_name in _DATE_TYPES:
+        return pd.to_datetime(s, format="%Y-%m-%d", errors="coerce")
+
+    if type_name in _TIMESTAMP_TYPES:
+        ts = pd.to_datetime(s, format="ISO8601", errors="coerce", utc=True)
+        return ts.dt.tz_convert(None)
+
+    if type_name == "BOOLEAN":
+        out = s.map(_BOOL_MAP)
+        if out.isna().any():
+            return out.astype(object).where(out.notna(), None)
+        return out.astype(bool)
+
+    if type_name == "STRING" and categorize:
+        return _maybe_categorical(s)
+
+    return s
+
+
+def _nullable_int(s: pd.Series) -> pd.Series:
+    """Plain int64 unless NULLs force pandas' nullable Int64."""
+    return s.astype("Int64" if s.isna().any() else "int64")
+
+
+def _decimal_cents(s: pd.Series) -> pd.Series:
+    """DECIMAL text to exact int cents (half-up past two places), without a float round trip."""
+    valid = s.notna().to_numpy()
+    text = s[valid].astype(str).str.strip()
+    parts = text.str.lstrip("+-").str.partition(".")
+    frac = parts[2].str.ljust(3, "0")
+    try:
+        whole = parts[0].replace("", "0").astype(np.int64).to_numpy()
+        cents = whole * 100 + frac.str[:2].astype(np.int64).to_numpy() + (frac.str[2].astype(np.int64).to_numpy() >= 5)
+    except ValueError:
+        # Exponent notation or similar: fall back to exact Decimal arithmetic.
+        cents = np.array([abs(int((Decimal(v) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))) for v in text], dtype=np.int64)
+    out = pd.Series(pd.NA, index=s.index, dtype="Int64")
+    out[valid] = np.where(text.str.startswith("-").to_numpy(), -cents, cents)
+    return _nullable_int(out)
+
+
+def _maybe_categorical(s: pd.Series) -> pd.Series:
+    if len(s) < CATEGORICAL_MIN_ROWS or s.isna().any():
+        return s
+    if s.nunique() > len(s) * CATEGORICAL_MAX_RATIO:
+        return s
+    return s.astype("category")
+
+
+def _manifest_columns(resp: Any) -> List[Any]:
     manifest = getattr(resp, "manifest", None)
     result = getattr(resp, "result", None)
 
@@ -43,16 +138,224 @@ def dataframe_from_statement_response(resp: Any) -> pd.DataFrame:
 
     schema = getattr(manifest, "schema", None) if manifest is not None else None
     columns = getattr(schema, "columns", None) if schema is not None else None
-    if not columns:
-        return pd.DataFrame()
+    return list(columns or [])
+
 
+def _column_names(columns: List[Any]) -> List[str]:
     col_names = [getattr(c, "name", None) for c in columns]
-    col_names = [c if c is not None else "" for c in col_names]
+    return [c if c is not None else "" for c in col_names]
+
+
+def dataframe_from_statement_response(
+    resp: Any,
+    decimal_as_cents: bool = False,
+    categorize: bool = True,
+) -> pd.DataFrame:
+    """Extract a pandas DataFrame from a databricks-sdk statement execution response.
+
+    Newer SDK shape:
+      resp.manifest.schema.columns + resp.result.data_array
+
+    Older/alternate shapes are handled best-effort.
+
+    When the manifest carries `type_name` for each column, values are decoded
+    column-by-column into native dtypes (see `decode_column`), so callers do not
+    need to re-coerce DECIMAL/INT/DATE/BOOLEAN strings.
+
+    Only the first (inline) chunk is read; use `collect_statement_result` for
+    results that may span several chunks.
+    """
+    columns = _manifest_columns(resp)
+    if not columns:
+        return pd.DataFrame()
 
+    result = getattr(resp, "result", None)
     rows = []
     if result is not None:
         rows = getattr(result, "data_array", None) or []
     if not rows:
         rows = getattr(resp, "data_array", None) or []
 
-    return pd.DataFrame(rows, columns=col_names)
+    return _frame_from_rows(rows, columns, _column_names(columns), decimal_as_cents=decimal_as_cents, categorize=categorize)
+
+
+def iter_statement_frames(
+    w: Any,
+    resp: Any,
+    decimal_as_cents: bool = False,
+    categorize: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """Yield one typed DataFrame per result chunk of a SUCCEEDED statement.
+
+    The first chunk comes inline with `resp`; subsequent chunks are fetched on
+    demand via `statement_execution.get_statement_result_chunk_n`, following
+    `next_chunk_index`. Only one chunk's JSON payload is held at a time.
+
+    `categorize` defaults to False because per-chunk categories differ and would
+    fall back to object dtype on concatenation; `collect_statement_result`
+    categorizes once over the combined frame instead.
+    """
+    columns = _manifest_columns(resp)
+    if not columns:
+        return
+    col_names = _column_names(columns)
+    statement_id = getattr(resp, "statement_id", None)
+
+    result = getattr(resp, "result", None)
+    while result is not None:
+        rows = getattr(result, "data_array", None) or []
+        if rows:
+            yield _frame_from_rows(rows, columns, col_names, decimal_as_cents=decimal_as_cents, categorize=categorize)
+        next_chunk = getattr(result, "next_chunk_index", None)
+        if next_chunk is None or not statement_id:
+            break
+        result = w.statement_execution.get_statement_result_chunk_n(statement_id, int(next_chunk))
+
+
+def collect_statement_result(
+    w: Any,
+    resp: Any,
+    decimal_as_cents: bool = False,
+    categorize: bool = True,
+) -> pd.DataFrame:
+    """Read every result chunk of a statement into a single typed DataFrame."""
+    columns = _manifest_columns(resp)
+    if not columns:
+        return pd.DataFrame()
+
+    frames = list(iter_statement_frames(w, resp, decimal_as_cents=decimal_as_cents))
+    if not frames:
+        return _frame_from_rows([], columns, _column_names(columns))
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    if categorize:
+        for i, col in enumerate(columns):
+            if _column_type(col) == "STRING":
+                df.isetitem(i, _maybe_categorical(df.iloc[:, i]))
+    return df
+
+
+def _frame_from_rows(
+    rows: List[List[Any]],
+    columns: List[Any],
+    col_names: List[str],
+    decimal_as_cents: bool = False,
+    categorize: bool = True,
+) -> pd.DataFrame:
+    types = [_column_type(c) for c in columns]
+    if not rows or not any(types):
+        return pd.DataFrame(rows, columns=col_names)
+
+    # Transpose once into a 2-D object array and decode whole columns at a time.
+    grid = np.empty((len(rows), len(col_names)), dtype=object)
+    grid[:] = rows
+
+    data = {}
+    for i, col in enumerate(columns):
+        data[i] = decode_column(
+            grid[:, i],
+            types[i],
+            type_scale=getattr(col, "type_scale", None),
+            decimal_as_cents=decimal_as_cents,
+            categorize=categorize,
+        )
+    df = pd.DataFrame(data)
+    df.columns = col_names
+    return df
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as e:  # pragma: no cover - exercised only without pyarrow
+        raise RuntimeError("ARROW_STREAM results require `pyarrow` (pip install pyarrow)") from e
+    return pa
+
+
+def iter_external_links(w: Any, resp: Any) -> Iterator[Any]:
+    """Yield every `ExternalLink` of an EXTERNAL_LINKS statement, chunk by chunk.
+
+    Links for the first chunk(s) arrive with `resp`; the rest are requested via
+    `get_statement_result_chunk_n`, following `next_chunk_index`.
+    """
+    statement_id = getattr(resp, "statement_id", None)
+    result = getattr(resp, "result", None)
+    while result is not None:
+        links = list(getattr(result, "external_links", None) or [])
+        yield from links
+        next_chunk = getattr(result, "next_chunk_index", None)
+        if next_chunk is None and links:
+            next_chunk = getattr(links[-1], "next_chunk_index", None)
+        if next_chunk is None or not statement_id:
+            break
+        result = w.statement_execution.get_statement_result_chunk_n(statement_id, int(next_chunk))
+
+
+def _download_arrow_chunk(link: Any, timeout_s: float) -> Any:
+    import urllib.request
+
+    pa = _require_pyarrow()
+    # Presigned cloud-storage URLs: must NOT carry the Databricks auth header.
+    headers = dict(getattr(link, "http_headers", None) or {})
+    req = urllib.request.Request(link.external_link, headers=headers)
+    with urllib.request.urlopen(req, timeout=timeout_s) as r:
+        payload = r.read()
+    return pa.ipc.open_stream(pa.py_buffer(payload)).read_all()
+
+
+def arrow_table_from_statement_response(
+    w: Any,
+    resp: Any,
+    max_workers: int = 8,
+    timeout_s: float = 60.0,
+) -> Any:
+    """Download all ARROW_STREAM chunks of a statement into one `pyarrow.Table`.
+
+    Chunks are fetched concurrently (at most `max_workers` in flight) and
+    concatenated in `chunk_index` order without copying record batches.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    pa = _require_pyarrow()
+    links = sorted(iter_external_links(w, resp), key=lambda link: int(getattr(link, "chunk_index", 0) or 0))
+    if not links:
+        return pa.table({name: pa.array([], type=pa.null()) for name in _column_names(_manifest_columns(resp))})
+    if len(links) == 1:
+        return _download_arrow_chunk(links[0], timeout_s)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(int(max_workers), len(links)))) as pool:
+        tables = list(pool.map(lambda link: _download_arrow_chunk(link, timeout_s), links))
+    return pa.concat_tables(tables)
+
+
+def dataframe_from_arrow(
+    table: Any,
+    decimal_as_cents: bool = False,
+    categorize: bool = True,
+) -> pd.DataFrame:
+    """Convert an Arrow result table with the same dtype rules as `decode_column`."""
+    pa = _require_pyarrow()
+    import pyarrow.compute as pc
+
+    cols = []
+    for field, col in zip(table.schema, table.columns):
+        if pa.types.is_decimal(field.type):
+            if decimal_as_cents and field.type.scale == 2:
+                # Exact: the unscaled DECIMAL(19,2) value times 100 is the int64 cent count.
+                col = pc.multiply(pc.cast(col, pa.decimal128(19, 2)), pa.scalar(Decimal(100), pa.decimal128(3, 0)))
+                col = pc.cast(col, pa.int64())
+            else:
+                col = pc.cast(col, pa.float64())
+        cols.append(col)
+    table = pa.Table.from_arrays(cols, names=table.column_names)
+
+    # Integers go through nullable Int64 so NULLs do not force a lossy float64.
+    df = table.to_pandas(date_as_object=False, types_mapper=lambda t: pd.Int64Dtype() if pa.types.is_integer(t) else None)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_integer(field.type):
+            df.isetitem(i, _nullable_int(df.iloc[:, i]))
+        elif pa.types.is_timestamp(field.type) and field.type.tz is not None:
+            df.isetitem(i, df.iloc[:, i].dt.tz_convert(None))
+        elif categorize and (pa.types.is_string(field.type) or pa.types.is_large_string(field.type)):
+            df.isetitem(i, _maybe_categorical(df.iloc[:, i]))
+    return df
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from qldrevenue.casewrites import _EVENT_SCHEMA
+from qldrevenue.constants import CASE_MGMT_EVENTS_TABLE
+
+_EVENT_COLUMNS = ("event_id", "case_id", "officer_email", "event_type", "new_status", "assigned_to", "note", "created_at")
+
+_SPOOL_DDL = """
+CREATE TABLE IF NOT EXISTS spool (
+  seq INTEGER PRIMARY KEY AUTOINCREMENT,
+  event_id TEXT NOT NULL UNIQUE,
+  payload TEXT NOT NULL,
+  queued_at REAL,
+  attempts INTEGER NOT NULL DEFAULT 0
+)
+"""
+# Spool files created before queued_at / attempts existed.
+_SPOOL_MIGRATIONS = {
+    "queued_at": "ALTER TABLE spool ADD COLUMN queued_at REAL",
+    "attempts": "ALTER TABLE spool ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0",
+}
+_DEAD_LETTER_DDL = """
+CREATE TABLE IF NOT EXISTS dead_letter (
+  seq INTEGER PRIMARY KEY,
+  event_id TEXT NOT NULL UNIQUE,
+  payload TEXT NOT NULL,
+  error TEXT,
+  failed_at REAL
+)
+"""
+
+
+def default_spool_path() -> str:
+    """`QRO_EVENT_SPOOL`; raises if unset, since a spool on ephemeral disk loses acknowledged events."""
+    path = os.environ.get("QRO_EVENT_SPOOL")
+    if not path:
+        raise RuntimeError("QRO_EVENT_SPOOL is not set: point it at a file on a persistent volume")
+    return path
+
+
+@dataclass(frozen=True)
+class SpoolStatus:
+    """Backlog of an `EventSpool` (for display / alerting)."""
+
+    pending: int
+    oldest_queued_at: Optional[float]
+    dead_letters: int
+    last_error: Optional[str]
+
+    @property
+    def lag_s(self) -> float:
+        return 0.0 if self.oldest_queued_at is None else max(time.time() - self.oldest_queued_at, 0.0)
+
+
+class EventSpool:
+    """Write-behind queue for `case_management_events` backed by a local SQLite file.
+
+    `append` commits rows to the spool and returns immediately; a background
+    thread (`start`) flushes them as one MERGE per batch once `batch_size` rows
+    are waiting or `flush_interval_s` has passed. Rows leave the spool only
+    after their MERGE succeeded, and the MERGE inserts only unseen `event_id`s,
+    so delivery is at-least-once and replays (crash after commit, two workers
+    sharing a spool file) never duplicate an event.
+
+    A batch that keeps failing while the warehouse is reachable (a `SELECT 1`
+    succeeds, e.g. after schema drift) counts an attempt per flush; after
+    `max_attempts` its rows are retried one by one and those that still fail
+    move to the local `dead_letter` table, so the rest of the queue drains.
+    `requeue_dead_letters` puts them back once the cause is fixed.
+    """
+
+    def __init__(
+        self,
+        executor: Any,
+        path: str,
+        events_table: str = CASE_MGMT_EVENTS_TABLE,
+        batch_size: int = 500,
+        flush_interval_s: float = 5.0,
+        on_flush: Optional[Callable[[int], None]] = None,
+        max_attempts: int = 5,
+    ) -> None:
+        if batch_size < 1 or max_attempts < 1:
+            raise ValueError("batch_size and max_attempts must be >= 1")
+        self.executor = executor
+        self.path = path
+        self.events_table = events_table
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.on_flush = on_flush
+        self.max_attempts = max_attempts
+        self.last_error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # One connection guarded by `_lock`; WAL lets other worker processes share the file.
+        self._con = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._con:
+            self._con.execute("PRAGMA journal_mode=WAL")
+            self._con.execute(_SPOOL_DDL)
+            self._con.execute(_DEAD_LETTER_DDL)
+            columns = {row[1] for row in self._con.execute("PRAGMA table_info(spool)")}
+            for column, ddl in _SPOOL_MIGRATIONS.items():
+                if column not in columns:
+                    self._con.execute(ddl)
+
+    def append(self, rows: Sequence[Mapping[str, Any]]) -> int:
+        """Durably queue event rows (dicts keyed like `case_management_events`); returns the count."""
+        if not rows:
+            return 0
+        now = time.time()
+        records = [(str(r["event_id"]), json.dumps({c: r.get(c) for c in _EVENT_COLUMNS}), now) for r in rows]
+        with self._lock, self._con:
+            # Re-appending an already queued event_id is a no-op.
+            self._con.executemany("INSERT OR IGNORE INTO spool (event_id, payload, queued_at) VALUES (?, ?, ?)", records)
+            waiting = self._pending_locked()
+        if waiting >= self.batch_size:
+            self._wake.set()
+        return len(records)
+
+    def _pending_locked(self) -> int:
+        return int(self._con.execute("SELECT count(*) FROM spool").fetchone()[0])
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending_locked()
+
+    def status(self) -> SpoolStatus:
+        with self._lock:
+            pending, oldest = self._con.execute("SELECT count(*), min(queued_at) FROM spool").fetchone()
+            dead = self._con.execute("SELECT count(*) FROM dead_letter").fetchone()[0]
+        error = self.last_error
+        return SpoolStatus(
+            pending=int(pending),
+            oldest_queued_at=None if oldest is None else float(oldest),
+            dead_letters=int(dead),
+            last_error=None if error is None else f"{type(error).__name__}: {error}",
+        )
+
+    def _next_batch(self) -> List[Tuple[int, Dict[str, Any], int]]:
+        with self._lock:
+            cur = self._con.execute("SELECT seq, payload, attempts FROM spool ORDER BY seq LIMIT ?", (self.batch_size,))
+            return [(int(seq), json.loads(payload), int(attempts)) for seq, payload, attempts in cur.fetchall()]
+
+    def merge_statement(self, rows: Sequence[Mapping[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        stmt = f"""
+      MERGE INTO {self.events_table} AS t
+      USING (
+        SELECT event_id, case_id, officer_email, event_type, new_status, assigned_to, note,
+               CAST(created_at AS TIMESTAMP) AS created_at
+        FROM (SELECT inline(from_json(:events, '{_EVENT_SCHEMA}')))
+      ) AS s
+      ON t.event_id = s.event_id
+      WHEN NOT MATCHED THEN INSERT (event_id, case_id, officer_email, event_type, new_status, assigned_to, note, created_at)
+      VALUES (s.event_id, s.case_id, s.officer_email, s.event_type, s.new_status, s.assigned_to, s.note, s.created_at)
+    """
+        return stmt, {"events": json.dumps(list(rows))}
+
+    def _reachable(self) -> bool:
+        try:
+            self.executor.fetch("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    def _dequeue(self, seqs: Sequence[int]) -> None:
+        with self._lock, self._con:
+            self._con.executemany("DELETE FROM spool WHERE seq = ?", [(s,) for s in seqs])
+
+    def _dead_letter(self, seq: int, error: BaseException) -> None:
+        with self._lock, self._con:
+            self._con.execute(
+                """
+                INSERT OR IGNORE INTO dead_letter (seq, event_id, payload, error, failed_at)
+                SELECT seq, event_id, payload, ?, ? FROM spool WHERE seq = ?
+                """,
+                (f"{type(error).__name__}: {error}", time.time(), seq),
+            )
+            self._con.execute("DELETE FROM spool WHERE seq = ?", (seq,))
+
+    def _isolate(self, batch: Sequence[Tuple[int, Dict[str, Any], int]]) -> int:
+        """Deliver a poisoned batch row by row; rows that still fail are dead-lettered."""
+        delivered = 0
+        for seq, row, _ in batch:
+            try:
+                self.executor.exec(*self.merge_statement([row]))
+            except Exception as e:
+                if not self._reachable():
+                    raise
+                self._dead_letter(seq, e)
+                continue
+            self._dequeue([seq])
+            delivered += 1
+        return delivered
+
+    def flush(self) -> int:
+        """Deliver everything queued, one MERGE per batch; returns rows delivered. Raises on failure."""
+        delivered = 0
+        with self._flush_lock:
+            while True:
+                batch = self._next_batch()
+                if not batch:
+                    break
+                if max(attempts for _, _, attempts in batch) >= self.max_attempts:
+                    delivered += self._isolate(batch)
+                    continue
+                try:
+                    self.executor.exec(*self.merge_statement([row for _, row, _ in batch]))
+                except Exception:
+                    if self._reachable():
+                        # The warehouse answers but rejects the batch: count it towards max_attempts.
+                        with self._lock, self._con:
+                            self._con.execute("UPDATE spool SET attempts = attempts + 1 WHERE seq <= ?", (batch[-1][0],))
+                    raise
+                with self._lock, self._con:
+                    self._con.execute("DELETE FROM spool WHERE seq <= ?", (batch[-1][0],))
+                delivered += len(batch)
+        if delivered and self.on_flush is not None:
+            self.on_flush(delivered)
+        return delivered
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        """Dead-lettered events with the error that put them there (oldest first)."""
+        with self._lock:
+            cur = self._con.execute("SELECT payload, error, failed_at FROM dead_letter ORDER BY seq")
+            return [dict(json.loads(payload), _error=error, _failed_at=failed_at) for payload, error, failed_at in cur.fetchall()]
+
+    def requeue_dead_letters(self) -> int:
+        """Move every dead-lettered event back to the spool with a fresh attempt count."""
+        with self._lock, self._con:
+            moved = self._con.execute(
+                """
+                INSERT OR IGNORE INTO spool (event_id, payload, queued_at, attempts)
+                SELECT event_id, payload, ?, 0 FROM dead_letter ORDER BY seq
+                """,
+                (time.time(),),
+            ).rowcount
+            self._con.execute("DELETE FROM dead_letter")
+        if moved:
+            self._wake.set()
+        return int(moved)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            try:
+                self.flush()
+                self.last_error = None
+            except Exception as e:
+                # Rows stay spooled; retried on the next tick.
+                self.last_error = e
+
+    def start(self) -> "EventSpool":
+        """Start the background flusher (idempotent)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="qro-event-spool", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout_s: Optional[float] = 10.0) -> None:
+        """Stop the flusher after one last flush attempt."""
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout_s)
+        try:
+            self.flush()
+        except Exception as e:
+            self.last_error = e
+
+    def close(self) -> None:
+        self.stop()
+        with self._lock:
+            self._con.close()
+
+
+_SPOOLS: Dict[str, EventSpool] = {}
+_SPOOLS_LOCK = threading.Lock()
+
+
+def get_event_spool(executor: Any, path: Optional[str] = None, **kwargs: Any) -> EventSpool:
+    """Return the process-wide, started `EventSpool` for `path` (default: `default_spool_path()`, which must be set)."""
+    path = os.path.abspath(path or default_spool_path())
+    with _SPOOLS_LOCK:
+        spool = _SPOOLS.get(path)
+        if spool is None:
+            spool = EventSpool(executor, path, **kwargs).start()
+            _SPOOLS[path] = spool
+        return spool
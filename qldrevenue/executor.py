@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence
+
+import pandas as pd
+
+from qldrevenue.dbsql import (
+    arrow_table_from_statement_response,
+    collect_statement_result,
+    dataframe_from_arrow,
+    iter_statement_frames,
+    state_str,
+)
+from qldrevenue.sqlbuilder import to_parameters
+
+TERMINAL_STATES = ("SUCCEEDED", "FAILED", "CANCELED", "CLOSED")
+
+# Result kinds for `SqlExecutor.submit`.
+KIND_FETCH = "fetch"
+KIND_ARROW = "arrow"
+KIND_EXEC = "exec"
+
+
+class Backoff:
+    """Adaptive poll delay: starts short for fast queries, grows for slow ones."""
+
+    def __init__(self, initial_s: float = 0.05, factor: float = 1.6, max_s: float = 1.0) -> None:
+        self.initial_s = initial_s
+        self.factor = factor
+        self.max_s = max_s
+        self.delay_s = initial_s
+
+    def next_delay(self) -> float:
+        delay = self.delay_s
+        self.delay_s = min(self.delay_s * self.factor, self.max_s)
+        return delay
+
+
+@dataclass
+class StatementHandle:
+    """An asynchronously submitted statement awaiting `SqlExecutor.gather`."""
+
+    statement_id: Optional[str]
+    kind: str
+    resp: Any = None
+    supersede_key: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+
+    @property
+    def state(self) -> Optional[str]:
+        if self.resp is None or not getattr(self.resp, "status", None):
+            return None
+        return state_str(self.resp.status.state)
+
+    @property
+    def done(self) -> bool:
+        return self.statement_id is None or self.state in TERMINAL_STATES
+
+
+def _default_client_factory() -> Any:
+    from databricks.sdk import WorkspaceClient
+
+    return WorkspaceClient()
+
+
+class StatementCancelled(RuntimeError):
+    """Raised for a statement cancelled because it was superseded or over budget."""
+
+
+def _raise_for_state(resp: Any) -> None:
+    state = state_str(resp.status.state) if resp.status else None
+    if state == "CANCELED":
+        raise StatementCancelled("SQL statement was cancelled")
+    if state != "SUCCEEDED":
+        msg = resp.status.error.message if (resp.status and resp.status.error) else f"Statement failed: {state}"
+        raise RuntimeError(msg)
+
+
+class SqlExecutor:
+    """Statement Execution API wrapper that reuses one `WorkspaceClient`.
+
+    The client (config resolution, auth and its pooled HTTP session) is built
+    lazily on first use and then shared by every caller, so a page render no
+    longer pays client setup and TLS handshakes per statement. Instances are
+    safe to share between Streamlit sessions/threads; use `get_executor` for
+    the process-wide instance per warehouse.
+
+    `timeout_s` is the latency budget: statements still running when it
+    expires are cancelled on the warehouse before `TimeoutError` is raised.
+    """
+
+    def __init__(
+        self,
+        warehouse_id: str,
+        client_factory: Optional[Callable[[], Any]] = None,
+        wait_timeout: str = "50s",
+        timeout_s: float = 180.0,
+    ) -> None:
+        self.warehouse_id = warehouse_id
+        self.wait_timeout = wait_timeout
+        self.timeout_s = timeout_s
+        self._client_factory = client_factory or _default_client_factory
+        self._client: Any = None
+        self._lock = threading.Lock()
+        # supersede_key -> statement_id of the latest statement submitted under it
+        self._inflight: Dict[str, str] = {}
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._client_factory()
+        return self._client
+
+    def wait(self, statement_id: str, timeout_s: Optional[float] = None) -> Any:
+        """Poll until the statement reaches a terminal state."""
+        handle = StatementHandle(statement_id, KIND_EXEC)
+        self._poll([handle], timeout_s)
+        return handle.resp
+
+    def _poll(
+        self,
+        handles: Sequence[StatementHandle],
+        timeout_s: Optional[float],
+        should_abort: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        # One backoff schedule shared by every in-flight statement: each round
+        # polls all pending statements, then sleeps once.
+        deadline = time.time() + (self.timeout_s if timeout_s is None else timeout_s)
+        backoff = Backoff()
+        pending = [h for h in handles if not h.done]
+        try:
+            while pending:
+                for h in pending:
+                    h.resp = self.client.statement_execution.get_statement(h.statement_id)
+                pending = [h for h in pending if not h.done]
+                if not pending:
+                    return
+                if time.time() > deadline:
+                    raise TimeoutError(f"SQL statement timed out (state={pending[0].state})")
+                if should_abort is not None and should_abort():
+                    raise StatementCancelled("SQL statement was abandoned by its caller")
+                time.sleep(min(backoff.next_delay(), max(deadline - time.time(), 0.0)))
+        except BaseException:
+            # Over budget, abandoned, or interrupted (e.g. Streamlit's rerun
+            # exception raised inside `should_abort`): stop what is still running.
+            for h in pending:
+                self._cancel_quietly(h.statement_id)
+            raise
+
+    def submit(
+        self,
+        statement: str,
+        params: Optional[Mapping[str, Any]] = None,
+        kind: str = KIND_FETCH,
+        supersede_key: Optional[str] = None,
+        **kwargs: Any,
+    ) -> StatementHandle:
+        """Start a statement without waiting (`wait_timeout="0s"`); see `gather`.
+
+        With `supersede_key` (e.g. "<session id>:gold"), any statement still in
+        flight under the same key is cancelled: a Streamlit rerun makes the
+        previous run's query useless, so it should stop consuming the warehouse.
+        Only use it for reads.
+        """
+        if kind == KIND_ARROW:
+            from databricks.sdk.service.sql import Disposition, Format
+
+            kwargs.setdefault("format", Format.ARROW_STREAM)
+            kwargs.setdefault("disposition", Disposition.EXTERNAL_LINKS)
+        if params:
+            kwargs["parameters"] = to_parameters(params)
+        resp = self.client.statement_execution.execute_statement(
+            warehouse_id=self.warehouse_id,
+            statement=statement,
+            wait_timeout="0s",
+            **kwargs,
+        )
+        handle = StatementHandle(resp.statement_id, kind, resp=resp, supersede_key=supersede_key)
+        if supersede_key and handle.statement_id:
+            with self._lock:
+                previous = self._inflight.get(supersede_key)
+                self._inflight[supersede_key] = handle.statement_id
+            if previous and previous != handle.statement_id:
+                self._cancel_quietly(previous)
+        return handle
+
+    def _release(self, handle: StatementHandle) -> None:
+        if not handle.supersede_key:
+            return
+        with self._lock:
+            if self._inflight.get(handle.supersede_key) == handle.statement_id:
+                del self._inflight[handle.supersede_key]
+
+    def inflight(self) -> Dict[str, str]:
+        """Snapshot of supersede_key -> statement_id for statements still tracked."""
+        with self._lock:
+            return dict(self._inflight)
+
+    def gather(
+        self,
+        handles: Sequence[StatementHandle],
+        timeout_s: Optional[float] = None,
+        return_exceptions: bool = False,
+        should_abort: Optional[Callable[[], bool]] = None,
+    ) -> List[Any]:
+        """Wait for submitted statements together and return their results in order.
+
+        `fetch` handles yield a DataFrame, `arrow` handles a DataFrame built from
+        the Arrow chunks, and `exec` handles None. Total latency tracks the
+        slowest statement rather than the sum of all of them.
+
+        `should_abort` is called between poll rounds; when it returns True (or
+        raises) the statements still running are cancelled and the wait ends
+        with `StatementCancelled` (or that exception). The app uses it to stop
+        waiting as soon as Streamlit has a rerun queued.
+        """
+        try:
+            self._poll(handles, timeout_s, should_abort)
+        finally:
+            for h in handles:
+                self._release(h)
+        out: List[Any] = []
+        for h in handles:
+            try:
+                out.append(self._result(h))
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                out.append(e)
+        return out
+
+    def _result(self, handle: StatementHandle) -> Any:
+        if handle.statement_id is None:
+            return pd.DataFrame() if handle.kind != KIND_EXEC else None
+        _raise_for_state(handle.resp)
+        if handle.kind == KIND_FETCH:
+            return collect_statement_result(self.client, handle.resp)
+        if handle.kind == KIND_ARROW:
+            return dataframe_from_arrow(arrow_table_from_statement_response(self.client, handle.resp))
+        return None
+
+    def execute(self, statement: str, params: Optional[Mapping[str, Any]] = None, **kwargs: Any) -> Optional[Any]:
+        """Run a statement to completion; returns the SUCCEEDED response or raises.
+
+        `params` maps named markers in the statement (`:case_type_0`) to values;
+        they are sent as Statement Execution `parameters`, never inlined.
+        """
+        if params:
+            kwargs["parameters"] = to_parameters(params)
+        resp = self.client.statement_execution.execute_statement(
+            warehouse_id=self.warehouse_id,
+            statement=statement,
+            wait_timeout=self.wait_timeout,
+            **kwargs,
+        )
+        st_id = resp.statement_id
+        if not st_id:
+            return None
+
+        if (not resp.status) or (state_str(resp.status.state) in ("PENDING", "RUNNING")):
+            resp = self.wait(st_id)
+
+        _raise_for_state(resp)
+        return resp
+
+    def fetch(self, statement: str, params: Optional[Mapping[str, Any]] = None, **kwargs: Any) -> pd.DataFrame:
+        """Execute SELECT and return a typed DataFrame (all result chunks)."""
+        resp = self.execute(statement, params, **kwargs)
+        if resp is None:
+            return pd.DataFrame()
+        return collect_statement_result(self.client, resp)
+
+    def iter_frames(self, statement: str, params: Optional[Mapping[str, Any]] = None, **kwargs: Any) -> Iterator[pd.DataFrame]:
+        """Execute SELECT and yield one typed DataFrame per result chunk."""
+        resp = self.execute(statement, params, **kwargs)
+        if resp is None:
+            return
+        yield from iter_statement_frames(self.client, resp)
+
+    def fetch_arrow(
+        self,
+        statement: str,
+        params: Optional[Mapping[str, Any]] = None,
+        max_workers: int = 8,
+        **kwargs: Any,
+    ) -> pd.DataFrame:
+        """Execute a large SELECT as ARROW_STREAM + EXTERNAL_LINKS and return a DataFrame."""
+        from databricks.sdk.service.sql import Disposition, Format
+
+        resp = self.execute(
+            statement,
+            params,
+            format=Format.ARROW_STREAM,
+            disposition=Disposition.EXTERNAL_LINKS,
+            **kwargs,
+        )
+        if resp is None:
+            return pd.DataFrame()
+        return dataframe_from_arrow(arrow_table_from_statement_response(self.client, resp, max_workers=max_workers))
+
+    def exec(self, statement: str, params: Optional[Mapping[str, Any]] = None, **kwargs: Any) -> None:
+        """Execute INSERT/UPDATE/MERGE/DDL. Raises on failure."""
+        self.execute(statement, params, **kwargs)
+
+    def cancel(self, statement_id: str) -> None:
+        """Request cancellation of a running statement (best-effort)."""
+        self.client.statement_execution.cancel_execution(statement_id)
+
+    def _cancel_quietly(self, statement_id: Optional[str]) -> None:
+        if not statement_id:
+            return
+        try:
+            self.cancel(statement_id)
+        except Exception:
+            # Already finished or unknown; nothing left to stop.
+            pass
+
+
+_EXECUTORS: Dict[str, SqlExecutor] = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+
+def get_executor(warehouse_id: str) -> SqlExecutor:
+    """Return the process-wide `SqlExecutor` for a warehouse."""
+    with _EXECUTORS_LOCK:
+        ex = _EXECUTORS.get(warehouse_id)
+        if ex is None:
+            ex = SqlExecutor(warehouse_id)
+            _EXECUTORS[warehouse_id] = ex
+        return ex
@@ -1,5 +1,7 @@
+import math
 import re
 from datetime import date
+from typing import Any
 
 
 def format_abn(abn: str) -> str:
@@ -20,3 +22,14 @@ def financial_year_for_period(period_start: date) -> str:
         start_year = period_start.year - 1
     end_year_short = (start_year + 1) % 100
     return f"{start_year}-{end_year_short:02d}"
+
+
+def as_float(value: Any, default: float = 0.0) -> float:
+    """Best-effort float for display (None/NaN/unparseable -> default)."""
+    if value is None:
+        return default
+    try:
+        out = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if math.isnan(out) else out
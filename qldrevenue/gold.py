@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from qldrevenue.formatting import financial_year_for_period
+
+ACTIVE_STATUSES = ("Open", "Under Review", "Investigation", "Compliance Action")
+SLA_DAYS = {"Open": 5, "Under Review": 14, "Investigation": 30, "Compliance Action": 60}
+ALLOCATION_PRIORITY = {"Critical": 1, "High": 2, "Medium": 3, "Low": 4}
+# Columns sql/05_create_gold.sql derives on top of Silver.
+DERIVED_COLUMNS = (
+    "severity",
+    "age_days",
+    "business_days_age",
+    "days_overdue",
+    "sla_breached",
+    "financial_year",
+    "regional_office",
+    "allocation_priority",
+)
+OVERLAY_COLUMNS = ("status", "assigned_to", "compliance_officer")
+
+
+def _as_frame(data: Any) -> pd.DataFrame:
+    """DataFrame as is; an Arrow table is converted with the executor's dtype rules."""
+    if isinstance(data, pd.DataFrame):
+        return data
+    from qldrevenue.dbsql import dataframe_from_arrow
+
+    return dataframe_from_arrow(data, categorize=False)
+
+
+def _num(values: Any) -> np.ndarray:
+    return pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _dates(values: Any) -> pd.Series:
+    d = pd.to_datetime(pd.Series(values).reset_index(drop=True), errors="coerce")
+    if d.dt.tz is not None:
+        d = d.dt.tz_convert(None)
+    return d.dt.normalize()
+
+
+def _days_since(values: Any, as_of: date) -> np.ndarray:
+    """`datediff(as_of, cast(values as date))` as float days (NaN for NULL)."""
+    return (pd.Timestamp(as_of) - _dates(values)).dt.days.to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _int_column(values: np.ndarray) -> Any:
+    return pd.array(values, dtype="Int64") if np.isnan(values).any() else values.astype(np.int64)
+
+
+def severity(total_exposure: Any, risk_score: Any) -> np.ndarray:
+    """Gold's severity bands; a NULL input never satisfies its comparison."""
+    exposure, risk = _num(total_exposure), _num(risk_score)
+    return np.select(
+        [
+            (exposure > 500000) & (risk > 85),
+            (exposure > 200000) & (risk > 70),
+            (exposure > 50000) | (risk > 50),
+        ],
+        ["Critical", "High", "Medium"],
+        default="Low",
+    ).astype(object)
+
+
+def financial_year(period_start: Any) -> np.ndarray:
+    """`formatting.financial_year_for_period` per row (None for NULL).
+
+    Evaluated once per distinct date, which a tax-period column has few of.
+    """
+    codes, uniques = pd.factorize(_dates(period_start))
+    labels = np.array([financial_year_for_period(d.date()) for d in uniques] + [None], dtype=object)
+    return labels[codes]
+
+
+def regional_office(postcode: Any) -> np.ndarray:
+    pc = pd.Series(postcode).reset_index(drop=True)
+    pc = pc.astype(object).where(pc.notna(), "").astype(str)
+    return np.select(
+        [
+            pc.str.startswith("400") | pc.str.startswith("41"),
+            pc.str.startswith("42"),
+            pc.str.startswith("48"),
+        ],
+        ["Brisbane", "Gold Coast", "Far North Queensland"],
+        default="Regional",
+    ).astype(object)
+
+
+def derive_columns(data: Any, as_of: Optional[date] = None) -> pd.DataFrame:
+    """Gold's derived columns for rows that already carry their effective status.
+
+    `data` (a DataFrame or Arrow table) holds Silver columns with the state
+    overlay applied, e.g. rows read from Gold; `DERIVED_COLUMNS` are
+    (re)computed at `as_of` (default today), exactly as sql/05_create_gold.sql
+    would compute them on that date. Returns a new frame.
+    """
+    as_of = as_of or date.today()
+    out = _as_frame(data).reset_index(drop=True).copy()
+    sev = severity(out["total_exposure"], out["risk_score"])
+    out["severity"] = sev
+
+    age = _days_since(out["created_at"], as_of)
+    out["age_days"] = _int_column(age)
+    out["business_days_age"] = _int_column(age - np.floor(age / 7) * 2)
+    # greatest() skips NULLs, so a missing due date gives 0.
+    overdue = np.nan_to_num(_days_since(out["lodgement_due_date"], as_of), nan=0.0)
+    out["days_overdue"] = np.maximum(overdue, 0).astype(np.int64)
+
+    limit = out["status"].astype(object).map(SLA_DAYS).to_numpy(dtype="float64", na_value=np.nan)
+    out["sla_breached"] = np.nan_to_num(age, nan=-np.inf) > np.nan_to_num(limit, nan=np.inf)
+
+    out["financial_year"] = financial_year(out["tax_period_start"])
+    out["regional_office"] = regional_office(out["taxpayer_postcode"])
+    out["allocation_priority"] = pd.Series(sev).map(ALLOCATION_PRIORITY).to_numpy(dtype=np.int64)
+    return out
+
+
+def overlay_state(silver: Any, state: Any) -> pd.DataFrame:
+    """Silver rows with non-NULL `case_management_state` values (one row per case) applied."""
+    s = _as_frame(silver).reset_index(drop=True)
+    state = _as_frame(state)
+    overlay = s[["case_id"]].merge(state[["case_id", *OVERLAY_COLUMNS]], on="case_id", how="left")
+    out = s.drop(columns=[c for c in OVERLAY_COLUMNS if c in s.columns])
+    for col in OVERLAY_COLUMNS:
+        override = overlay[col].astype(object).to_numpy()
+        out[col] = np.where(pd.isna(override), s[col].astype(object).to_numpy(), override)
+    return out
+
+
+def derive_gold(silver: Any, state: Any, as_of: Optional[date] = None) -> pd.DataFrame:
+    """Vectorised equivalent of sql/05_create_gold.sql for the given Silver rows.
+
+    `silver` holds non-test Silver rows, `state` the `case_management_state`
+    rows (one per case_id). Date-relative columns are evaluated at `as_of`.
+    """
+    out = derive_columns(overlay_state(silver, state), as_of)
+    return out.loc[out["status"].isin(ACTIVE_STATUSES).to_numpy()].reset_index(drop=True)
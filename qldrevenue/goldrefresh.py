@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+
+from qldrevenue.constants import (
+    CASE_MGMT_STATE_TABLE,
+    GOLD_REFRESH_WATERMARK_TABLE,
+    GOLD_TABLE_ACTIVE,
+    SILVER_TABLE,
+)
+from qldrevenue.gold import ACTIVE_STATUSES
+from qldrevenue.rules import OfficerRule
+
+_ACTIVE_SQL = ", ".join(f"'{s}'" for s in ACTIVE_STATUSES)
+
+# Same projection as sql/05_create_gold.sql, minus its final active-status
+# filter: the MERGE needs inactive rows too, to delete them from Gold.
+_GOLD_SELECT = """
+WITH s AS (
+  SELECT *
+  FROM {silver_table}
+  WHERE is_test_data = false{case_filter}
+),
+state AS (
+  SELECT case_id, status, assigned_to, compliance_officer, updated_at
+  FROM {state_table}
+)
+SELECT
+  s.* EXCEPT (status, assigned_to, compliance_officer),
+  COALESCE(state.status, s.status) as status,
+  COALESCE(state.assigned_to, s.assigned_to) as assigned_to,
+  COALESCE(state.compliance_officer, s.compliance_officer) as compliance_officer,
+
+  CASE
+    WHEN s.total_exposure > 500000 AND s.risk_score > 85 THEN 'Critical'
+    WHEN s.total_exposure > 200000 AND s.risk_score > 70 THEN 'High'
+    WHEN s.total_exposure > 50000 OR s.risk_score > 50 THEN 'Medium'
+    ELSE 'Low'
+  END as severity,
+  datediff(current_date(), cast(s.created_at as date)) as age_days,
+  cast(datediff(current_date(), cast(s.created_at as date)) - floor(datediff(current_date(), cast(s.created_at as date)) / 7) * 2 as int) as business_days_age,
+  greatest(datediff(current_date(), s.lodgement_due_date), 0) as days_overdue,
+  CASE
+    WHEN COALESCE(state.status, s.status) = 'Open' AND datediff(current_date(), cast(s.created_at as date)) > 5 THEN true
+    WHEN COALESCE(state.status, s.status) = 'Under Review' AND datediff(current_date(), cast(s.created_at as date)) > 14 THEN true
+    WHEN COALESCE(state.status, s.status) = 'Investigation' AND datediff(current_date(), cast(s.created_at as date)) > 30 THEN true
+    WHEN COALESCE(state.status, s.status) = 'Compliance Action' AND datediff(current_date(), cast(s.created_at as date)) > 60 THEN true
+    ELSE false
+  END as sla_breached,
+  CASE
+    WHEN month(s.tax_period_start) >= 7 THEN concat(cast(year(s.tax_period_start) as string), '-', lpad(cast((year(s.tax_period_start)+1) % 100 as string), 2, '0'))
+    ELSE concat(cast(year(s.tax_period_start)-1 as string), '-', lpad(cast(year(s.tax_period_start) % 100 as string), 2, '0'))
+  END as financial_year,
+  CASE
+    WHEN s.taxpayer_postcode LIKE '400%' OR s.taxpayer_postcode LIKE '41%' THEN 'Brisbane'
+    WHEN s.taxpayer_postcode LIKE '42%' THEN 'Gold Coast'
+    WHEN s.taxpayer_postcode LIKE '48%' THEN 'Far North Queensland'
+    ELSE 'Regional'
+  END as regional_office,
+  CASE
+    WHEN severity = 'Critical' THEN 1
+    WHEN severity = 'High' THEN 2
+    WHEN severity = 'Medium' THEN 3
+    ELSE 4
+  END as allocation_priority
+FROM s
+LEFT JOIN state
+  ON s.case_id = state.case_id
+"""
+
+# The changed case_ids as a relation: joined (not array_contains-filtered) so
+# both Silver and Gold can be pruned on their clustered case_id.
+_CHANGED_IDS = "SELECT explode(from_json(:case_ids, 'ARRAY<STRING>')) AS case_id"
+_TARGETS = "SELECT explode(from_json(:targets, 'ARRAY<STRING>')) AS target"
+
+Mark = Tuple[int, Optional[pd.Timestamp]]
+
+
+@dataclass(frozen=True)
+class GoldRefresh:
+    """Outcome of one `GoldRefresher.refresh` run."""
+
+    silver_version: int
+    state_updated_at: Optional[pd.Timestamp]
+    case_ids: Tuple[str, ...]
+    full: bool
+
+    @property
+    def changed(self) -> bool:
+        return self.full or bool(self.case_ids)
+
+
+class GoldRefresher:
+    """Keeps `revenue_cases_gold_active` current by MERGEing only changed cases.
+
+    A watermark row records the Silver Delta version and the latest
+    `case_management_state.updated_at` already applied. Each `refresh` reads
+    the case_ids changed since then (Silver's change feed plus newer state
+    rows), re-derives Gold's columns for just those cases with the
+    sql/05_create_gold.sql projection, and MERGEs them: rows still active are
+    upserted, rows that became `Closed` (or left Silver) are deleted.
+
+    Without a watermark, or when more than `max_incremental` cases changed,
+    the same MERGE runs over all of Silver (a full sync). Only SELECTs, one
+    MERGE per table and `DESCRIBE HISTORY` go through `executor`, so a local
+    stand-in executor can drive it end to end.
+
+    Date-relative columns of unchanged rows (`age_days`, `sla_breached`, ...)
+    keep the value from their last refresh; a periodic full sync
+    (`refresh(full=True)`) re-evaluates them.
+
+    Dependants get watermark rows of their own (`case_rollup`, and one per
+    rule for `rule_matches`), advanced with Gold's once they are refreshed for the
+    same changes. One that is behind (never synced, or edited) is re-synced
+    in full by the next `refresh`; `fresh` tells readers which are current.
+    """
+
+    def __init__(
+        self,
+        executor: Any,
+        gold_table: str = GOLD_TABLE_ACTIVE,
+        silver_table: str = SILVER_TABLE,
+        state_table: str = CASE_MGMT_STATE_TABLE,
+        watermark_table: str = GOLD_REFRESH_WATERMARK_TABLE,
+        max_incremental: int = 50_000,
+        state_overlap_s: float = 300.0,
+        match_store: Any = None,
+        rollup: Any = None,
+    ) -> None:
+        self.executor = executor
+        self.gold_table = gold_table
+        self.silver_table = silver_table
+        self.state_table = state_table
+        self.watermark_table = watermark_table
+        self.max_incremental = max_incremental
+        # Re-read state rows this far behind the watermark: a transaction can
+        # commit after a later-stamped one. Re-applying a case is idempotent.
+        self.state_overlap_s = state_overlap_s
+        self.match_store = match_store
+        self.rollup = rollup
+
+    def marks(self, targets: Sequence[str]) -> Dict[str, Mark]:
+        """Recorded (silver_version, state_updated_at) of each target that has a row."""
+        df = self.executor.fetch(
+            f"SELECT target, silver_version, state_updated_at FROM {self.watermark_table} WHERE target IN ({_TARGETS})",
+            {"targets": json.dumps(list(targets))},
+        )
+        out: Dict[str, Mark] = {}
+        if df is None or df.empty:
+            return out
+        for target, version, ts in zip(df["target"], df["silver_version"], df["state_updated_at"]):
+            if not pd.isna(version):
+                out[str(target)] = (int(version), None if pd.isna(ts) else pd.Timestamp(ts))
+        return out
+
+    def watermark(self) -> Optional[Mark]:
+        return self.marks([self.gold_table]).get(self.gold_table)
+
+    def fresh(self, targets: Sequence[str]) -> Set[str]:
+        """The `targets` whose recorded watermark is Gold's current one."""
+        marks = self.marks([self.gold_table, *targets])
+        gold = marks.get(self.gold_table)
+        return {t for t in targets if gold is not None and marks.get(t) == gold}
+
+    def latest_version(self) -> int:
+        df = self.executor.fetch(f"DESCRIBE HISTORY {self.silver_table} LIMIT 1")
+        return int(df["version"].iloc[0])
+
+    def changed_case_ids(
+        self, since_version: int, to_version: int, state_since: Optional[pd.Timestamp]
+    ) -> Tuple[Optional[Tuple[str, ...]], Optional[pd.Timestamp]]:
+        """case_ids changed after the watermark, and the newest state `updated_at` seen.
+
+        The case_ids are None when Silver's change feed no longer covers
+        `since_version` (e.g. after VACUUM or a table rewrite).
+        """
+        ids = set()
+        if to_version > since_version:
+            try:
+                df = self.executor.fetch(
+                    f"""
+      SELECT DISTINCT case_id
+      FROM table_changes('{self.silver_table}', {int(since_version) + 1}, {int(to_version)})
+    """
+                )
+            except Exception:
+                df = None
+            if df is None:
+                return None, None
+            ids.update(df["case_id"].astype(str))
+        stmt = f"SELECT case_id, updated_at FROM {self.state_table}"
+        params: Dict[str, Any] = {}
+        if state_since is not None:
+            stmt += " WHERE updated_at >= :since"
+            params["since"] = (state_since - timedelta(seconds=self.state_overlap_s)).to_pydatetime()
+        state = self.executor.fetch(stmt, params or None)
+        newest = None
+        if state is not None and not state.empty:
+            ids.update(state["case_id"].astype(str))
+            newest = pd.Timestamp(state["updated_at"].max())
+        if state_since is not None and (newest is None or newest < state_since):
+            newest = state_since
+        return tuple(sorted(ids)), newest
+
+    def merge_stmt(self, case_ids: Optional[Sequence[str]]) -> Tuple[str, Dict[str, Any]]:
+        """MERGE of freshly derived Gold rows; `case_ids=None` syncs every case.
+
+        For a scoped sync the source has one row per changed case_id: its
+        derivation, or a tombstone (NULL status) when it is no longer in
+        Silver, so deletes need no `NOT MATCHED BY SOURCE` scan of Gold.
+        """
+        if case_ids is None:
+            source = _GOLD_SELECT.format(silver_table=self.silver_table, state_table=self.state_table, case_filter="")
+            return self._merge(source, "\n      WHEN NOT MATCHED BY SOURCE THEN DELETE"), {}
+        derived = _GOLD_SELECT.format(
+            silver_table=self.silver_table,
+            state_table=self.state_table,
+            case_filter=f"\n    AND case_id IN ({_CHANGED_IDS})",
+        )
+        source = f"""SELECT c.case_id, g.* EXCEPT (case_id)
+        FROM ({_CHANGED_IDS}) AS c
+        LEFT JOIN ({derived}) AS g
+          ON g.case_id = c.case_id"""
+        return self._merge(source, ""), {"case_ids": json.dumps(sorted(set(case_ids)))}
+
+    def _merge(self, source: str, by_source: str) -> str:
+        return f"""
+      MERGE INTO {self.gold_table} AS t
+      USING (
+        {source}
+      ) AS s
+      ON t.case_id = s.case_id
+      WHEN MATCHED AND NOT COALESCE(s.status IN ({_ACTIVE_SQL}), false) THEN DELETE
+      WHEN MATCHED THEN UPDATE SET *
+      WHEN NOT MATCHED AND s.status IN ({_ACTIVE_SQL}) THEN INSERT *{by_source}
+    """
+
+    def watermark_stmt(
+        self, silver_version: int, state_updated_at: Optional[pd.Timestamp], targets: Optional[Sequence[str]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Record the watermark for `targets` (default: Gold itself)."""
+        stmt = f"""
+      MERGE INTO {self.watermark_table} AS t
+      USING (
+        SELECT target, CAST(:silver_version AS BIGINT) AS silver_version,
+               CAST(:state_updated_at AS TIMESTAMP) AS state_updated_at
+        FROM ({_TARGETS})
+      ) AS s
+      ON t.target = s.target
+      WHEN MATCHED THEN UPDATE SET
+        silver_version = s.silver_version,
+        state_updated_at = s.state_updated_at,
+        refreshed_at = current_timestamp()
+      WHEN NOT MATCHED THEN INSERT (target, silver_version, state_updated_at, refreshed_at)
+      VALUES (s.target, s.silver_version, s.state_updated_at, current_timestamp())
+    """
+        ts: Optional[datetime] = None if state_updated_at is None else state_updated_at.to_pydatetime()
+        targets = [self.gold_table] if targets is None else list(targets)
+        return stmt, {"targets": json.dumps(targets), "silver_version": int(silver_version), "state_updated_at": ts}
+
+    def refresh(self, rules: Optional[Sequence[OfficerRule]] = None, full: bool = False) -> GoldRefresh:
+        """Apply Silver/state changes since the watermark to Gold, then advance it.
+
+        With a `match_store` / `rollup`, their `refresh_cases` (or full
+        re-sync) runs for the same cases afterwards; `rules` are the rules to
+        re-match. If anything fails the watermark is left as is and the next
+        run re-applies the same cases.
+        """
+        mark = None if full else self.watermark()
+        latest = self.latest_version()
+        changed: Optional[Tuple[str, ...]] = None
+        if mark is not None:
+            changed, newest = self.changed_case_ids(mark[0], latest, mark[1])
+        if changed is None or len(changed) > self.max_incremental:
+            full = True
+            state = self.executor.fetch(f"SELECT max(updated_at) AS updated_at FROM {self.state_table}")
+            ts = None if state is None or state.empty else state["updated_at"].iloc[0]
+            newest = None if ts is None or pd.isna(ts) else pd.Timestamp(ts)
+        case_ids = changed or ()
+        if full or case_ids:
+            self.executor.exec(*self.merge_stmt(None if full else case_ids))
+        versions = (mark[0] + 1, latest) if mark is not None and latest > mark[0] else None
+        targets = self._refresh_dependants(rules, None if full else case_ids, mark, versions)
+        if mark is None or (latest, newest) != mark or targets:
+            self.executor.exec(*self.watermark_stmt(latest, newest, [self.gold_table, *self._targets(rules)]))
+        return GoldRefresh(silver_version=latest, state_updated_at=newest, case_ids=case_ids, full=full)
+
+    def rematch_rule(self, rule: OfficerRule) -> None:
+        """Re-match a saved or edited rule now and mark its matches current.
+
+        The rule's mark is dropped first, so if matching fails readers use
+        its predicate until the next `refresh` re-syncs it.
+        """
+        target = self.match_store.mark_target(rule.rule_id)
+        self.executor.exec(f"DELETE FROM {self.watermark_table} WHERE target = :target", {"target": target})
+        mark = self.watermark()
+        self.match_store.refresh_rule(rule)
+        if mark is not None:
+            self.executor.exec(*self.watermark_stmt(*mark, targets=[target]))
+
+    def _targets(self, rules: Optional[Sequence[OfficerRule]]) -> List[str]:
+        targets = [self.rollup.table] if self.rollup is not None else []
+        if self.match_store is not None and rules:
+            targets += [self.match_store.mark_target(r.rule_id) for r in rules]
+        return targets
+
+    def _refresh_dependants(
+        self,
+        rules: Optional[Sequence[OfficerRule]],
+        case_ids: Optional[Sequence[str]],
+        mark: Optional[Mark],
+        silver_versions: Optional[Tuple[int, int]] = None,
+    ) -> List[str]:
+        """Bring dependants up to Gold; returns the targets re-synced in full."""
+        targets = self._targets(rules)
+        if not targets:
+            return []
+        seen = self.marks(targets) if case_ids is not None and mark is not None else {}
+
+        def behind(target: str) -> bool:
+            return case_ids is None or seen.get(target) != mark
+
+        resynced: List[str] = []
+        if self.rollup is not None:
+            if behind(self.rollup.table):
+                self.rollup.rebuild()
+                resynced.append(self.rollup.table)
+            elif case_ids:
+                self.rollup.refresh_cases(case_ids, silver_versions)
+        if self.match_store is not None and rules:
+            stale = [r for r in rules if behind(self.match_store.mark_target(r.rule_id))]
+            current = [r for r in rules if not behind(self.match_store.mark_target(r.rule_id))]
+            self.match_store.refresh_all(stale)
+            if case_ids:
+                self.match_store.refresh_cases(current, case_ids)
+            resynced += [self.match_store.mark_target(r.rule_id) for r in stale]
+        return resynced
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from qldrevenue.constants import (
+    CASE_HISTORY_CHECKPOINT_TABLE,
+    CASE_HISTORY_TABLE,
+    CASE_MGMT_EVENTS_TABLE,
+    SILVER_TABLE,
+)
+from qldrevenue.sqlbuilder import Where
+
+SOURCE_SILVER = "silver"
+SOURCE_EVENT = "event"
+
+HISTORY_COLUMNS = (
+    "case_id",
+    "source",
+    "commit_version",
+    "changed_at",
+    "change_type",
+    "status",
+    "risk_score",
+    "assigned_to",
+    "compliance_officer",
+    "changed_fields",
+    "officer_email",
+    "note",
+    "event_id",
+)
+# Silver columns tracked in the index (the History tab's columns).
+TRACKED_FIELDS = ("status", "risk_score", "assigned_to", "compliance_officer")
+
+
+def _changed_fields(post: str, pre: str) -> str:
+    checks = ", ".join(
+        f"IF({pre}.case_id IS NULL OR NOT ({post}.{f} <=> {pre}.{f}), '{f}', NULL)" for f in TRACKED_FIELDS
+    )
+    return f"filter(array({checks}), x -> x IS NOT NULL)"
+
+
+def as_history_frame(df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """`df`, or an empty frame with `HISTORY_COLUMNS` when the result had no rows or columns."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=list(HISTORY_COLUMNS))
+    return df
+
+
+@dataclass(frozen=True)
+class HistorySync:
+    """Versions consumed by one `CaseHistoryIndex.sync` run (None: source unchanged)."""
+
+    silver: Optional[Tuple[int, int]]
+    events: Optional[Tuple[int, int]]
+
+
+class CaseHistoryIndex:
+    """`case_history`: per-case change log of Silver and `case_management_events`.
+
+    Clustered by case_id, so opening a case is a point lookup instead of a
+    `table_changes(silver, 0)` scan whose cost grows with every Silver commit.
+
+    `sync` is a checkpointed change-feed consumer: for each source it MERGEs
+    the change feed between the checkpointed and the latest Delta version,
+    then advances the checkpoint. The MERGEs insert only rows not yet indexed,
+    so a run that fails before its checkpoint is simply repeated. The first
+    run backfills (Silver from version 0, events from a snapshot of the table).
+    """
+
+    def __init__(
+        self,
+        executor: Any,
+        history_table: str = CASE_HISTORY_TABLE,
+        checkpoint_table: str = CASE_HISTORY_CHECKPOINT_TABLE,
+        silver_table: str = SILVER_TABLE,
+        events_table: str = CASE_MGMT_EVENTS_TABLE,
+    ) -> None:
+        self.executor = executor
+        self.history_table = history_table
+        self.checkpoint_table = checkpoint_table
+        self.silver_table = silver_table
+        self.events_table = events_table
+
+    # --- maintenance ---
+
+    def checkpoints(self) -> Dict[str, int]:
+        df = self.executor.fetch(f"SELECT source_table, version FROM {self.checkpoint_table}")
+        if df is None or df.empty:
+            return {}
+        return {str(t): int(v) for t, v in zip(df["source_table"], df["version"]) if not pd.isna(v)}
+
+    def latest_version(self, table: str) -> int:
+        df = self.executor.fetch(f"DESCRIBE HISTORY {table} LIMIT 1")
+        return int(df["version"].iloc[0])
+
+    def silver_stmt(self, start: int, end: int) -> str:
+        tracked = ", ".join(TRACKED_FIELDS)
+        post_fields = ", ".join(f"post.{f}" for f in TRACKED_FIELDS)
+        return f"""
+      MERGE INTO {self.history_table} AS t
+      USING (
+        WITH c AS (
+          SELECT case_id, {tracked}, _change_type, _commit_version, _commit_timestamp
+          FROM table_changes('{self.silver_table}', {int(start)}, {int(end)})
+        ),
+        pre AS (
+          SELECT * FROM c WHERE _change_type = 'update_preimage'
+        )
+        SELECT
+          post.case_id,
+          '{SOURCE_SILVER}' AS source,
+          post._commit_version AS commit_version,
+          post._commit_timestamp AS changed_at,
+          post._change_type AS change_type,
+          {post_fields},
+          {_changed_fields("post", "pre")} AS changed_fields,
+          CAST(NULL AS STRING) AS officer_email,
+          CAST(NULL AS STRING) AS note,
+          CAST(NULL AS STRING) AS event_id
+        FROM c AS post
+        LEFT JOIN pre
+          ON post._change_type = 'update_postimage'
+          AND pre.case_id = post.case_id
+          AND pre._commit_version = post._commit_version
+        WHERE post._change_type != 'update_preimage'
+      ) AS s
+      ON t.source = '{SOURCE_SILVER}'
+        AND t.case_id = s.case_id
+        AND t.commit_version = s.commit_version
+        AND t.change_type = s.change_type
+      WHEN NOT MATCHED THEN INSERT *
+    """
+
+    def events_stmt(self, start: Optional[int], end: int) -> str:
+        """Events from the change feed `[start, end]`, or all events as of `end` when `start` is None."""
+        if start is None:
+            source, version = f"{self.events_table} VERSION AS OF {int(end)}", "CAST(NULL AS BIGINT)"
+            where = "true"
+        else:
+            source, version = f"table_changes('{self.events_table}', {int(start)}, {int(end)})", "_commit_version"
+            where = "_change_type = 'insert'"
+        return f"""
+      MERGE INTO {self.history_table} AS t
+      USING (
+        SELECT
+          case_id,
+          '{SOURCE_EVENT}' AS source,
+          {version} AS commit_version,
+          created_at AS changed_at,
+          event_type AS change_type,
+          new_status AS status,
+          CAST(NULL AS INT) AS risk_score,
+          assigned_to,
+          CAST(NULL AS STRING) AS compliance_officer,
+          filter(array(IF(new_status IS NOT NULL, 'status', NULL), IF(assigned_to IS NOT NULL, 'assigned_to', NULL)), x -> x IS NOT NULL) AS changed_fields,
+          officer_email,
+          note,
+          event_id
+        FROM {source}
+        WHERE {where}
+      ) AS s
+      ON t.source = '{SOURCE_EVENT}'
+        AND t.case_id = s.case_id
+        AND t.event_id = s.event_id
+      WHEN NOT MATCHED THEN INSERT *
+    """
+
+    def checkpoint_stmt(self, table: str, version: int) -> Tuple[str, Dict[str, Any]]:
+        stmt = f"""
+      MERGE INTO {self.checkpoint_table} AS t
+      USING (SELECT :source_table AS source_table, CAST(:version AS BIGINT) AS version) AS s
+      ON t.source_table = s.source_table
+      WHEN MATCHED THEN UPDATE SET t.version = s.version, t.updated_at = current_timestamp()
+      WHEN NOT MATCHED THEN INSERT (source_table, version, updated_at)
+      VALUES (s.source_table, s.version, current_timestamp())
+    """
+        return stmt, {"source_table": table, "version": int(version)}
+
+    def _consume(self, table: str, done: Optional[int]) -> Optional[Tuple[int, int]]:
+        latest = self.latest_version(table)
+        if done is not None and latest <= done:
+            return None
+        start = 0 if done is None else done + 1
+        if table == self.silver_table:
+            self.executor.exec(self.silver_stmt(start, latest))
+        else:
+            self.executor.exec(self.events_stmt(None if done is None else start, latest))
+        self.executor.exec(*self.checkpoint_stmt(table, latest))
+        return start, latest
+
+    def current_sources(self) -> Set[str]:
+        """Source tables indexed up to their latest Delta version.
+
+        Lookups for a source outside this set would miss its newest changes
+        (`sync` has not run since they were committed).
+        """
+        done = self.checkpoints()
+        return {
+            t
+            for t in (self.silver_table, self.events_table)
+            if t in done and done[t] >= self.latest_version(t)
+        }
+
+    def sync(self) -> HistorySync:
+        """Index both change feeds up to their latest versions."""
+        done = self.checkpoints()
+        return HistorySync(
+            silver=self._consume(self.silver_table, done.get(self.silver_table)),
+            events=self._consume(self.events_table, done.get(self.events_table)),
+        )
+
+    # --- lookups ---
+
+    def lookup_stmt(
+        self, case_ids: Iterable[str], source: Optional[str] = None, limit_per_case: int = 200
+    ) -> Tuple[str, Dict[str, Any]]:
+        where = Where().isin("case_id", case_ids)
+        if source is not None:
+            where.eq("source", source)
+        limit = where.param("limit_per_case", int(limit_per_case))
+        stmt = f"""
+      SELECT {", ".join(HISTORY_COLUMNS)}
+      FROM {self.history_table}
+      WHERE {where.sql()}
+      QUALIFY row_number() OVER (PARTITION BY case_id, source ORDER BY changed_at DESC, commit_version DESC) <= {limit}
+      ORDER BY case_id, changed_at DESC, commit_version DESC
+    """
+        return stmt, where.params
+
+    def lookup(self, case_ids: Iterable[str], source: Optional[str] = None, limit_per_case: int = 200) -> pd.DataFrame:
+        """History of many cases in one query (newest first per case)."""
+        ids: List[str] = list(dict.fromkeys(case_ids))
+        if not ids:
+            return pd.DataFrame(columns=list(HISTORY_COLUMNS))
+        df = self.executor.fetch(*self.lookup_stmt(ids, source, limit_per_case))
+        return as_history_frame(df)
+
+    def by_case(
+        self, case_ids: Iterable[str], source: Optional[str] = None, limit_per_case: int = 200
+    ) -> Dict[str, pd.DataFrame]:
+        """`lookup` split per case_id (cases without history map to an empty frame)."""
+        ids = list(dict.fromkeys(case_ids))
+        df = self.lookup(ids, source, limit_per_case)
+        groups = {str(k): g.reset_index(drop=True) for k, g in df.groupby("case_id", sort=False)} if not df.empty else {}
+        empty = df.iloc[0:0]
+        return {cid: groups.get(cid, empty) for cid in ids}
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from qldrevenue.constants import GOLD_TABLE_ACTIVE, RULE_MATCHES_TABLE
+from qldrevenue.rules import OfficerRule
+from qldrevenue.sqlbuilder import Where
+
+# `ids IN (...)` with a varying number of markers changes the statement text;
+# a JSON array parameter keeps it constant, and unlike a subquery it is also
+# allowed inside MERGE conditions.
+_IN_JSON = "array_contains(from_json({param}, 'ARRAY<STRING>'), {column})"
+
+
+def _in_json(param: str, column: str) -> str:
+    return _IN_JSON.format(param=param, column=column)
+
+
+class RuleMatchStore:
+    """Maintains the materialised `rule_matches(rule_id, case_id)` table.
+
+    Writes are MERGEs that touch only the pairs that changed:
+    - `refresh_rule`: one rule against all of Gold (rule saved/edited)
+    - `refresh_cases`: all rules against the given case_ids (case changed)
+
+    Reads (`counts`, `cases_where`) are lookups on the clustered rule_id;
+    `predicate_counts` evaluates the rules' predicates over Gold instead.
+    A rule's pairs are only as current as the Gold they were matched
+    against: `GoldRefresher` records that per rule under `mark_target`, and
+    readers should fall back to the rule's predicate unless it is fresh.
+    """
+
+    def __init__(
+        self,
+        executor: Any,
+        gold_table: str = GOLD_TABLE_ACTIVE,
+        matches_table: str = RULE_MATCHES_TABLE,
+    ) -> None:
+        self.executor = executor
+        self.gold_table = gold_table
+        self.matches_table = matches_table
+
+    def mark_target(self, rule_id: str) -> str:
+        """`gold_refresh_watermark` target recording which Gold a rule's matches reflect."""
+        return f"{self.matches_table}#{rule_id}"
+
+    def refresh_rule_stmt(self, rule: OfficerRule) -> Tuple[str, Dict[str, Any]]:
+        where = rule.compile().where()
+        rule_param = where.param("rule_id", rule.rule_id)
+        stmt = f"""
+      MERGE INTO {self.matches_table} AS t
+      USING (
+        SELECT {rule_param} AS rule_id, case_id
+        FROM {self.gold_table}
+        WHERE {where.sql()}
+      ) AS s
+      ON t.rule_id = s.rule_id AND t.case_id = s.case_id
+      WHEN NOT MATCHED THEN INSERT (rule_id, case_id, matched_at)
+        VALUES (s.rule_id, s.case_id, current_timestamp())
+      WHEN NOT MATCHED BY SOURCE AND t.rule_id = {rule_param} THEN DELETE
+    """
+        return stmt, where.params
+
+    def refresh_rule(self, rule: OfficerRule) -> None:
+        """Re-match one rule against Gold; only added/removed pairs are written."""
+        self.executor.exec(*self.refresh_rule_stmt(rule))
+
+    def refresh_all(self, rules: Iterable[OfficerRule]) -> None:
+        """Periodic full re-sync (e.g. after a Gold rebuild changes derived columns)."""
+        for rule in rules:
+            self.refresh_rule(rule)
+
+    def remove_rule(self, rule_id: str) -> None:
+        self.executor.exec(f"DELETE FROM {self.matches_table} WHERE rule_id = :rule_id", {"rule_id": rule_id})
+
+    def refresh_cases_stmt(self, rules: Sequence[OfficerRule], case_ids: Sequence[str]) -> Tuple[str, Dict[str, Any]]:
+        where = Where()
+        case_param = where.param("case_ids", json.dumps(list(case_ids)))
+        rule_ids_param = where.param("rule_ids", json.dumps([r.rule_id for r in rules]))
+        selects: List[str] = []
+        for i, rule in enumerate(rules):
+            # Per-rule clauses, but one shared parameter namespace for the statement.
+            sub = Where()
+            sub.params = where.params
+            sub.add(_in_json(case_param, "case_id"))
+            rule.compile().where(sub, prefix=f"r{i}_")
+            rule_param = where.param(f"r{i}_rule_id", rule.rule_id)
+            predicate = sub.sql()
+            selects.append(f"SELECT {rule_param} AS rule_id, case_id FROM {self.gold_table} WHERE {predicate}")
+        stmt = f"""
+      MERGE INTO {self.matches_table} AS t
+      USING (
+        {" UNION ALL ".join(selects)}
+      ) AS s
+      ON t.rule_id = s.rule_id AND t.case_id = s.case_id
+      WHEN NOT MATCHED THEN INSERT (rule_id, case_id, matched_at)
+        VALUES (s.rule_id, s.case_id, current_timestamp())
+      WHEN NOT MATCHED BY SOURCE
+        AND {_in_json(case_param, "t.case_id")}
+        AND {_in_json(rule_ids_param, "t.rule_id")}
+      THEN DELETE
+    """
+        return stmt, where.params
+
+    def refresh_cases(self, rules: Sequence[OfficerRule], case_ids: Sequence[str]) -> None:
+        """Re-match changed cases against every rule; other pairs are untouched."""
+        if not rules or not case_ids:
+            return
+        self.executor.exec(*self.refresh_cases_stmt(rules, case_ids))
+
+    def counts(self, rule_ids: Sequence[str]) -> Dict[str, int]:
+        """Match count per rule from the materialised table (0 for unknown rules)."""
+        if not rule_ids:
+            return {}
+        df = self.executor.fetch(
+            f"""
+      SELECT rule_id, count(*) AS matches
+      FROM {self.matches_table}
+      WHERE {_in_json(":rule_ids", "rule_id")}
+      GROUP BY rule_id
+    """,
+            {"rule_ids": json.dumps(list(rule_ids))},
+        )
+        out = {rid: 0 for rid in rule_ids}
+        for rid, n in zip(df.get("rule_id", []), df.get("matches", [])):
+            out[str(rid)] = int(n)
+        return out
+
+    def predicate_counts_stmt(self, rules: Sequence[OfficerRule]) -> Tuple[str, Dict[str, Any]]:
+        where = Where()
+        selects: List[str] = []
+        for i, rule in enumerate(rules):
+            # Per-rule clauses, but one shared parameter namespace for the statement.
+            sub = Where()
+            sub.params = where.params
+            rule.compile().where(sub, prefix=f"r{i}_")
+            rule_param = where.param(f"r{i}_rule_id", rule.rule_id)
+            selects.append(f"SELECT {rule_param} AS rule_id, count(*) AS matches FROM {self.gold_table} WHERE {sub.sql()}")
+        return " UNION ALL ".join(selects), where.params
+
+    def predicate_counts(self, rules: Sequence[OfficerRule]) -> Dict[str, int]:
+        """Match count per rule from its predicate over Gold, all rules in one statement.
+
+        For rules whose materialised pairs are not current (see `mark_target`).
+        """
+        if not rules:
+            return {}
+        df = self.executor.fetch(*self.predicate_counts_stmt(rules))
+        out = {r.rule_id: 0 for r in rules}
+        for rid, n in zip(df.get("rule_id", []), df.get("matches", [])):
+            out[str(rid)] = int(n)
+        return out
+
+    @staticmethod
+    def cases_where(where: Where, rule_id: str, column: str = "case_id") -> Where:
+        """Restrict a Gold query to a rule's materialised matches (semi-join)."""
+        param = where.param("rule_id", rule_id)
+        return where.add(f"{column} IN (SELECT case_id FROM {RULE_MATCHES_TABLE} WHERE rule_id = {param})")
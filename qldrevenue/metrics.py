@@ -1,18 +1,25 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
 
 import pandas as pd
 
+from qldrevenue.sqlbuilder import Where
+
+_EMPTY_KPIS = {"total_cases": 0, "total_exposure": 0.0, "avg_shortfall": 0.0, "unique_taxpayers": 0}
+
 
 def _num(series: pd.Series) -> pd.Series:
-    # Databricks SQL often returns DECIMAL as strings. Coerce safely.
+    # Typed decoding (dbsql.decode_column) already yields numeric columns; only
+    # untyped/legacy frames still carry DECIMAL as strings. Coerce safely.
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.fillna(0)
     return pd.to_numeric(series, errors="coerce").fillna(0)
 
 
 def kpis(df: pd.DataFrame) -> Dict[str, Any]:
     if df is None or df.empty:
-        return {"total_cases": 0, "total_exposure": 0.0, "avg_shortfall": 0.0, "unique_taxpayers": 0}
+        return dict(_EMPTY_KPIS)
 
     total_exposure = 0.0
     avg_shortfall = 0.0
@@ -29,3 +36,73 @@ def kpis(df: pd.DataFrame) -> Dict[str, Any]:
         "avg_shortfall": avg_shortfall,
         "unique_taxpayers": unique_taxpayers,
     }
+
+
+def kpis_from_frames(frames: Iterable[pd.DataFrame]) -> Dict[str, Any]:
+    """Same KPIs as `kpis`, accumulated over a stream of result chunks.
+
+    Only running sums and the set of seen ABNs are kept, so a multi-chunk
+    result (see `dbsql.iter_statement_frames`) never has to be concatenated.
+    """
+    total_cases = 0
+    total_exposure = 0.0
+    shortfall_sum = 0.0
+    shortfall_rows = 0
+    taxpayers: Set[Any] = set()
+
+    for df in frames:
+        if df is None or df.empty:
+            continue
+        total_cases += int(len(df))
+        if "total_exposure" in df.columns:
+            total_exposure += float(_num(df["total_exposure"]).sum())
+        if "tax_shortfall" in df.columns:
+            shortfall_sum += float(_num(df["tax_shortfall"]).sum())
+            shortfall_rows += int(len(df))
+        if "taxpayer_abn" in df.columns:
+            taxpayers.update(df["taxpayer_abn"].dropna().unique().tolist())
+
+    return {
+        "total_cases": total_cases,
+        "total_exposure": total_exposure,
+        "avg_shortfall": (shortfall_sum / shortfall_rows) if shortfall_rows else 0.0,
+        "unique_taxpayers": len(taxpayers),
+    }
+
+
+def kpi_statement(table: str, where: Optional[Where] = None) -> Tuple[str, Dict[str, Any]]:
+    """One aggregate statement computing the `kpis` metrics over every matching row.
+
+    Shares the page's filter predicate (and its named parameters), so the
+    numbers cover the whole filtered set rather than the `LIMIT`-ed page, and
+    only a single row comes back. NULL handling mirrors `kpis`: missing
+    exposure/shortfall count as 0, NULL ABNs are not counted.
+    """
+    where = where if where is not None else Where()
+    stmt = f"""
+      SELECT
+        count(*) AS total_cases,
+        COALESCE(SUM(total_exposure), 0) AS total_exposure,
+        COALESCE(AVG(COALESCE(tax_shortfall, 0)), 0) AS avg_shortfall,
+        COUNT(DISTINCT taxpayer_abn) AS unique_taxpayers
+      FROM {table}
+      WHERE {where.sql()}
+    """
+    return stmt, dict(where.params)
+
+
+def kpis_from_row(df: pd.DataFrame) -> Dict[str, Any]:
+    """Convert the single-row result of `kpi_statement` into the `kpis` dict shape."""
+    if df is None or df.empty:
+        return dict(_EMPTY_KPIS)
+    row = df.iloc[:1]
+    out: Dict[str, Any] = {}
+    for key, default in _EMPTY_KPIS.items():
+        value = float(_num(row[key]).iloc[0]) if key in row.columns else default
+        out[key] = int(value) if isinstance(default, int) else value
+    return out
+
+
+def kpis_sql(executor: Any, table: str, where: Optional[Where] = None) -> Dict[str, Any]:
+    """Compute KPIs on the warehouse; latency no longer depends on the result size."""
+    return kpis_from_row(executor.fetch(*kpi_statement(table, where)))
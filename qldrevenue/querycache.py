@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Sequence, Set, Tuple
+
+from qldrevenue.sqlbuilder import params_key
+
+_TABLE_RE = re.compile(r"\b([A-Za-z_]\w*\.[A-Za-z_]\w*\.[A-Za-z_]\w*)\b")
+_WS_RE = re.compile(r"\s+")
+
+
+def normalise_statement(statement: str) -> str:
+    """Collapse whitespace so formatting differences share one cache entry."""
+    return _WS_RE.sub(" ", statement).strip()
+
+
+def tables_in(statement: str) -> Tuple[str, ...]:
+    """Fully qualified `catalog.schema.table` names referenced by a statement."""
+    return tuple(sorted({m.lower() for m in _TABLE_RE.findall(statement)}))
+
+
+class DeltaVersions:
+    """Latest Delta version per table, polled at most every `ttl_s`.
+
+    One `DESCRIBE HISTORY ... LIMIT 1` per table, submitted together. Catches
+    writes made by other processes/jobs; this process's own writes are
+    reflected immediately through `QueryCache.invalidate`.
+
+    Once `start`ed, a background thread re-polls every table seen so far each
+    `ttl_s`, and `get` only waits for a table it has never seen: cache hits do
+    not pay for the poll. Without it, `get` re-polls stale tables inline.
+    """
+
+    def __init__(self, executor: Any, ttl_s: float = 10.0) -> None:
+        self.executor = executor
+        self.ttl_s = ttl_s
+        self._versions: Dict[str, Tuple[float, Optional[int]]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[BaseException] = None
+
+    def get(self, tables: Sequence[str]) -> Dict[str, Optional[int]]:
+        now = time.time()
+        background = self._thread is not None and self._thread.is_alive()
+        with self._lock:
+            stale = [
+                t
+                for t in tables
+                if t not in self._versions or (not background and now - self._versions[t][0] >= self.ttl_s)
+            ]
+        if stale:
+            self.poll(stale)
+        with self._lock:
+            return {t: self._versions[t][1] for t in tables}
+
+    def poll(self, tables: Sequence[str]) -> None:
+        """Read the latest version of `tables` now (None for a table that cannot be read)."""
+        now = time.time()
+        handles = [self.executor.submit(f"DESCRIBE HISTORY {t} LIMIT 1") for t in tables]
+        results = self.executor.gather(handles, return_exceptions=True)
+        with self._lock:
+            for t, df in zip(tables, results):
+                version = None
+                if not isinstance(df, Exception) and df is not None and not df.empty:
+                    version = int(df["version"].iloc[0])
+                self._versions[t] = (now, version)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.ttl_s):
+            with self._lock:
+                tables = list(self._versions)
+            if not tables:
+                continue
+            try:
+                self.poll(tables)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+
+    def start(self) -> "DeltaVersions":
+        """Start the background poller (idempotent)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="qro-delta-versions", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout_s: Optional[float] = 10.0) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout_s)
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class QueryCache:
+    """Process-wide result cache shared by every Streamlit session.
+
+    Entries are keyed on the normalised statement, its parameters and the
+    version of every table it reads: a process-local write generation
+    (bumped by `invalidate`) plus, with `versions`, the table's Delta version.
+    A write therefore only evicts entries reading the written table, and
+    other processes' commits make old entries unreachable. Size is bounded
+    by LRU eviction; concurrent misses on the same key run `compute` once.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 256, versions: Optional[DeltaVersions] = None) -> None:
+        self.max_entries = max_entries
+        self.versions = versions
+        self._entries: "OrderedDict[Any, Any]" = OrderedDict()
+        self._by_table: Dict[str, Set[Any]] = {}
+        self._generation: Dict[str, int] = {}
+        self._inflight: Dict[Any, _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, statement: str, params: Optional[Mapping[str, Any]], tables: Sequence[str]) -> Any:
+        remote = self.versions.get(tables) if (self.versions and tables) else {}
+        with self._lock:
+            table_versions = tuple((t, self._generation.get(t, 0), remote.get(t)) for t in tables)
+        return (normalise_statement(statement), params_key(params), table_versions)
+
+    def get_or_compute(
+        self,
+        statement: str,
+        params: Optional[Mapping[str, Any]],
+        compute: Callable[[], Any],
+        tables: Optional[Iterable[str]] = None,
+    ) -> Any:
+        """Cached result of `compute()` for this statement/params at the current table versions.
+
+        `tables` defaults to the fully qualified names found in `statement`.
+        """
+        tables = tuple(sorted({t.lower() for t in tables})) if tables is not None else tables_in(statement)
+        key = self._key(statement, params, tables)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self.misses += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if flight.error is None and self._current(key, tables):
+                    self._store(key, tables, flight.value)
+            flight.done.set()
+        return flight.value
+
+    def _current(self, key: Any, tables: Sequence[str]) -> bool:
+        # Drop results computed across an invalidation of one of their tables.
+        return all(self._generation.get(t, 0) == gen for t, gen, _ in key[2]) if tables else True
+
+    def _store(self, key: Any, tables: Sequence[str], value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        for t in tables:
+            self._by_table.setdefault(t, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            old, _ = self._entries.popitem(last=False)
+            self._unindex(old)
+
+    def _unindex(self, key: Any) -> None:
+        for t, _, _ in key[2]:
+            keys = self._by_table.get(t)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[t]
+
+    def fetch(
+        self,
+        executor: Any,
+        statement: str,
+        params: Optional[Mapping[str, Any]] = None,
+        tables: Optional[Iterable[str]] = None,
+    ) -> Any:
+        """`executor.fetch` through the cache."""
+        return self.get_or_compute(statement, params, lambda: executor.fetch(statement, params), tables)
+
+    def invalidate(self, *tables: str) -> int:
+        """Forget entries reading any of `tables` (call after writing them); returns the count."""
+        dropped = 0
+        with self._lock:
+            for t in (t.lower() for t in tables):
+                self._generation[t] = self._generation.get(t, 0) + 1
+                for key in list(self._by_table.get(t, ())):
+                    if key in self._entries:
+                        del self._entries[key]
+                        dropped += 1
+                    self._unindex(key)
+        return dropped
+
+    def clear(self) -> None:
+        """Drop every entry.
+
+        Write generations persist: a `compute` still running from before the
+        clear must keep failing `_current` if its table was invalidated, and
+        resetting the counters could make its stale key look current again.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_CACHES: Dict[str, QueryCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_query_cache(name: str = "default", executor: Any = None, max_entries: int = 256) -> QueryCache:
+    """Return the process-wide `QueryCache` called `name`.
+
+    With `executor`, a newly created cache also tracks Delta versions of the
+    tables it caches, refreshed in the background (see `DeltaVersions`).
+    """
+    with _CACHES_LOCK:
+        cache = _CACHES.get(name)
+        if cache is None:
+            cache = QueryCache(max_entries, versions=DeltaVersions(executor).start() if executor is not None else None)
+            _CACHES[name] = cache
+        return cache
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from qldrevenue.constants import CASE_MGMT_EVENTS_TABLE, CASE_MGMT_STATE_TABLE
+
+# Fields of case_management_state that are projections of the event log
+# (compliance_officer is not carried by events and is left alone).
+REPLAYED_FIELDS = {"status": "new_status", "assigned_to": "assigned_to"}
+_EVENT_COLUMNS = ("case_id", "created_at", "event_id") + tuple(REPLAYED_FIELDS.values())
+_STATE_SCHEMA = "ARRAY<STRUCT<case_id: STRING, status: STRING, assigned_to: STRING>>"
+
+
+def _last_value(events: pd.DataFrame, column: str) -> pd.DataFrame:
+    """Per case_id, the row of the latest event with a non-null `column`.
+
+    Order is `(created_at, event_id)`; event_id only breaks timestamp ties,
+    so equal inputs always replay to the same state.
+    """
+    sub = events.loc[events[column].notna(), ["case_id", "created_at", "event_id", column]]
+    if sub.empty:
+        return sub
+    order = np.lexsort(
+        (
+            sub["event_id"].astype(str).to_numpy(),
+            sub["created_at"].to_numpy(dtype="datetime64[ns]"),
+            sub["case_id"].astype(str).to_numpy(),
+        )
+    )
+    sub = sub.iloc[order]
+    last = np.r_[sub["case_id"].to_numpy()[1:] != sub["case_id"].to_numpy()[:-1], True]
+    return sub.iloc[np.flatnonzero(last)]
+
+
+def _reduce(events: pd.DataFrame) -> pd.DataFrame:
+    """Collapse events to one pseudo-event per (case, field): the row that wins for it."""
+    parts = [_last_value(events, column) for column in REPLAYED_FIELDS.values()]
+    # The latest event of any type stamps updated_at; keep it as an all-null row.
+    latest = _last_value(events.assign(_any=True), "_any").drop(columns="_any")
+    parts.append(latest)
+    # A field that no event in the chunk sets would otherwise vanish in the concat.
+    return pd.concat([p for p in parts if not p.empty], ignore_index=True).reindex(columns=list(_EVENT_COLUMNS))
+
+
+class StateReplay:
+    """Folds `case_management_events` chunks into the state they imply.
+
+    Each chunk is reduced on arrival to at most three rows per case (last
+    status, last assignee, last event); reductions are re-folded whenever
+    `compact_rows` pile up, so memory follows the number of cases in play,
+    not the number of events. Chunks may arrive in any order.
+    """
+
+    def __init__(self, compact_rows: int = 1_000_000) -> None:
+        self.compact_rows = compact_rows
+        self.events_seen = 0
+        self._parts: List[pd.DataFrame] = []
+        self._rows = 0
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        if chunk is None or chunk.empty:
+            return
+        chunk = chunk[list(_EVENT_COLUMNS)].assign(created_at=pd.to_datetime(chunk["created_at"], errors="coerce"))
+        self.events_seen += len(chunk)
+        reduced = _reduce(chunk)
+        self._parts.append(reduced)
+        self._rows += len(reduced)
+        if self._rows > self.compact_rows and len(self._parts) > 1:
+            self._compact()
+
+    def _compact(self) -> None:
+        folded = _reduce(pd.concat(self._parts, ignore_index=True))
+        self._parts, self._rows = [folded], len(folded)
+
+    def result(self) -> pd.DataFrame:
+        """One row per case: `case_id, status, assigned_to, updated_at` (last event time)."""
+        if not self._parts:
+            return pd.DataFrame(columns=["case_id", *REPLAYED_FIELDS, "updated_at"])
+        self._compact()
+        folded = self._parts[0]
+        out = _last_value(folded.assign(_any=True), "_any")[["case_id", "created_at"]].rename(columns={"created_at": "updated_at"})
+        for field, column in REPLAYED_FIELDS.items():
+            last = _last_value(folded, column)[["case_id", column]].rename(columns={column: field})
+            out = out.merge(last, on="case_id", how="left")
+        return out[["case_id", *REPLAYED_FIELDS, "updated_at"]].sort_values("case_id").reset_index(drop=True)
+
+
+def replay_state(chunks: Iterable[pd.DataFrame], compact_rows: int = 1_000_000) -> pd.DataFrame:
+    """State implied by an event log delivered as `chunks` (see `StateReplay`)."""
+    replay = StateReplay(compact_rows)
+    for chunk in chunks:
+        replay.add(chunk)
+    return replay.result()
+
+
+def diff_state(replayed: pd.DataFrame, live: pd.DataFrame) -> Tuple[pd.DataFrame, Tuple[str, ...]]:
+    """Compare replayed state with the live table.
+
+    Returns the replayed rows whose status/assignee differ from live (or that
+    are missing from it), and the live case_ids no event explains.
+    """
+    fields = list(REPLAYED_FIELDS)
+    joined = replayed[["case_id", *fields]].merge(
+        live[["case_id", *fields]], on="case_id", how="outer", suffixes=("", "_live"), indicator=True
+    )
+    unexplained = tuple(sorted(joined.loc[joined["_merge"] == "right_only", "case_id"].astype(str)))
+    ours = joined[joined["_merge"] != "right_only"]
+    differs = np.zeros(len(ours), dtype=bool)
+    for f in fields:
+        a = ours[f].astype(object).where(ours[f].notna(), None).to_numpy()
+        b = ours[f"{f}_live"].astype(object).where(ours[f"{f}_live"].notna(), None).to_numpy()
+        differs |= a != b
+    differs |= (ours["_merge"] == "left_only").to_numpy()
+    repairs = ours.loc[differs, ["case_id", *fields]].reset_index(drop=True)
+    return repairs, unexplained
+
+
+def hold_in_flight(
+    repairs: pd.DataFrame, replayed: pd.DataFrame, live: pd.DataFrame, now: pd.Timestamp, settle_s: float
+) -> Tuple[pd.DataFrame, Tuple[str, ...]]:
+    """Split off repairs whose live state may be ahead of the event log.
+
+    State is written synchronously but its events can still sit in a
+    write-behind spool, so a drifted case is held back when its live
+    `updated_at` is within `settle_s` of `now`, or more than `settle_s`
+    after its newest replayed event. Returns (repairs to apply, held case_ids).
+    """
+    if repairs.empty or "updated_at" not in live.columns:
+        return repairs, ()
+    settle = pd.Timedelta(seconds=settle_s)
+    live_at = repairs[["case_id"]].merge(live[["case_id", "updated_at"]], on="case_id", how="left")["updated_at"]
+    event_at = repairs[["case_id"]].merge(replayed[["case_id", "updated_at"]], on="case_id", how="left")["updated_at"]
+    live_at = pd.to_datetime(live_at, errors="coerce")
+    event_at = pd.to_datetime(event_at, errors="coerce")
+    held = ((live_at > now - settle) | (live_at > event_at + settle)).fillna(False).to_numpy(dtype=bool)
+    return repairs.loc[~held].reset_index(drop=True), tuple(sorted(repairs.loc[held, "case_id"].astype(str)))
+
+
+@dataclass(frozen=True)
+class StateCheck:
+    """Outcome of `StateReplayer.check` (or, with `repairs` already written and dropped, `rebuild`)."""
+
+    events: int
+    cases: int
+    repairs: pd.DataFrame
+    unexplained: Tuple[str, ...]
+    in_flight: Tuple[str, ...] = ()
+    repaired: int = 0
+
+    @property
+    def consistent(self) -> bool:
+        return self.repairs.empty
+
+
+def _no_repairs() -> pd.DataFrame:
+    return pd.DataFrame(columns=["case_id", *REPLAYED_FIELDS])
+
+
+def _combine(results: Sequence[StateCheck]) -> StateCheck:
+    repairs = [r.repairs for r in results if not r.repairs.empty]
+    return StateCheck(
+        events=sum(r.events for r in results),
+        cases=sum(r.cases for r in results),
+        repairs=pd.concat(repairs, ignore_index=True) if repairs else _no_repairs(),
+        unexplained=tuple(sorted(c for r in results for c in r.unexplained)),
+        in_flight=tuple(sorted(c for r in results for c in r.in_flight)),
+        repaired=sum(r.repaired for r in results),
+    )
+
+
+class StateReplayer:
+    """Rebuilds / verifies `case_management_state` from `case_management_events`.
+
+    Work is split into `partitions` hash buckets of case_id; each bucket's
+    events are streamed chunk by chunk (`executor.iter_frames`) into a
+    `StateReplay` and diffed against the same bucket of live state, so
+    memory is bounded by one bucket's cases. Drifted rows are fixed with
+    batched MERGEs that stamp `updated_at = current_timestamp()`, so
+    incremental consumers (Gold refresh, the replica) pick the repairs up.
+
+    Cases written within `settle_s` (or more than `settle_s` after their
+    newest event) are reported as `in_flight` and never repaired: their
+    events may not have left an app's event spool yet (`hold_in_flight`).
+    """
+
+    def __init__(
+        self,
+        executor: Any,
+        events_table: str = CASE_MGMT_EVENTS_TABLE,
+        state_table: str = CASE_MGMT_STATE_TABLE,
+        partitions: int = 16,
+        repair_batch: int = 5000,
+        settle_s: float = 900.0,
+    ) -> None:
+        if partitions < 1 or repair_batch < 1:
+            raise ValueError("partitions and repair_batch must be >= 1")
+        self.executor = executor
+        self.events_table = events_table
+        self.state_table = state_table
+        self.partitions = partitions
+        self.repair_batch = repair_batch
+        self.settle_s = settle_s
+
+    def _bucket(self, partition: int) -> Tuple[str, Dict[str, Any]]:
+        if self.partitions == 1:
+            return "true", {}
+        return "pmod(hash(case_id), :partitions) = :partition", {"partitions": self.partitions, "partition": int(partition)}
+
+    def events_stmt(self, partition: int) -> Tuple[str, Dict[str, Any]]:
+        predicate, params = self._bucket(partition)
+        stmt = f"""
+      SELECT {", ".join(_EVENT_COLUMNS)}
+      FROM {self.events_table}
+      WHERE {predicate}
+    """
+        return stmt, params
+
+    def live_stmt(self, partition: int) -> Tuple[str, Dict[str, Any]]:
+        predicate, params = self._bucket(partition)
+        stmt = f"""
+      SELECT case_id, {", ".join(REPLAYED_FIELDS)}, updated_at
+      FROM {self.state_table}
+      WHERE {predicate}
+    """
+        return stmt, params
+
+    def check_partition(self, partition: int, now: Optional[pd.Timestamp] = None) -> StateCheck:
+        replay = StateReplay()
+        stmt, params = self.events_stmt(partition)
+        for chunk in self.executor.iter_frames(stmt, params or None):
+            replay.add(chunk)
+        replayed = replay.result()
+        live = self.executor.fetch(*self.live_stmt(partition))
+        if live is None or live.empty:
+            live = pd.DataFrame(columns=["case_id", *REPLAYED_FIELDS, "updated_at"])
+        repairs, unexplained = diff_state(replayed, live)
+        now = pd.Timestamp.now(tz="UTC").tz_localize(None) if now is None else now
+        repairs, in_flight = hold_in_flight(repairs, replayed, live, now, self.settle_s)
+        return StateCheck(
+            events=replay.events_seen, cases=len(replayed), repairs=repairs, unexplained=unexplained, in_flight=in_flight
+        )
+
+    def check(self, partitions: Optional[Sequence[int]] = None, now: Optional[pd.Timestamp] = None) -> StateCheck:
+        """Replay and diff every bucket (or just `partitions`); `now` (UTC) defaults to the current time."""
+        return _combine([self.check_partition(p, now) for p in (range(self.partitions) if partitions is None else partitions)])
+
+    def repair_statements(self, repairs: pd.DataFrame) -> List[Tuple[str, Dict[str, Any]]]:
+        stmt = f"""
+      MERGE INTO {self.state_table} AS t
+      USING (
+        SELECT inline(from_json(:state_rows, '{_STATE_SCHEMA}'))
+      ) AS s
+      ON t.case_id = s.case_id
+      WHEN MATCHED THEN UPDATE SET
+        t.status = s.status,
+        t.assigned_to = s.assigned_to,
+        t.updated_at = current_timestamp()
+      WHEN NOT MATCHED THEN INSERT (case_id, status, assigned_to, updated_at)
+      VALUES (s.case_id, s.status, s.assigned_to, current_timestamp())
+    """
+        rows = repairs[["case_id", *REPLAYED_FIELDS]].astype(object).where(repairs.notna(), None).to_dict("records")
+        return [
+            (stmt, {"state_rows": json.dumps(rows[i : i + self.repair_batch])})
+            for i in range(0, len(rows), self.repair_batch)
+        ]
+
+    def repair(self, check: StateCheck) -> int:
+        """Write the replayed values for every drifted case; returns the number of cases repaired."""
+        for stmt, params in self.repair_statements(check.repairs):
+            self.executor.exec(stmt, params)
+        return len(check.repairs)
+
+    def rebuild(self, now: Optional[pd.Timestamp] = None) -> StateCheck:
+        """Check every bucket and repair it straight away.
+
+        Each bucket's repairs are dropped once written, so memory stays
+        bounded by one bucket; the result carries the `repaired` count
+        instead of the rows.
+        """
+        results = []
+        for p in range(self.partitions):
+            result = self.check_partition(p, now)
+            repaired = self.repair(result)
+            results.append(replace(result, repairs=_no_repairs(), repaired=repaired))
+        return _combine(results)
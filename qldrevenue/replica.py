@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+import pandas as pd
+
+from qldrevenue.calculations import recompute_exposure
+from qldrevenue.constants import CASE_MGMT_STATE_TABLE, SILVER_TABLE
+from qldrevenue.gold import OVERLAY_COLUMNS, derive_gold
+from qldrevenue.snapshot import read_snapshot, write_snapshot
+
+_STATE_COLUMNS = ("case_id",) + OVERLAY_COLUMNS + ("updated_at",)
+_CDF_COLUMNS = ("_change_type", "_commit_version", "_commit_timestamp")
+
+
+def _plain(df: pd.DataFrame) -> pd.DataFrame:
+    """Categoricals -> object, so rows from different reads can be combined and overwritten."""
+    cats = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+    if not cats:
+        return df
+    return df.astype({c: object for c in cats})
+
+
+class CaseReplica:
+    """In-memory copy of the active case set, kept current from change feeds.
+
+    `load` reads Silver once at a pinned Delta version plus all case state.
+    `sync` then reads only Silver's `table_changes` since that version and
+    state rows with a newer `updated_at`, and recomputes the Gold columns
+    for just the changed cases. `snapshot()` returns an immutable frame
+    equivalent to `revenue_cases_gold_active`; readers can keep using an
+    old snapshot while a sync swaps in a new one.
+
+    With `snapshot_dir`, the first sync restores the replica from the on-disk
+    Arrow snapshot (`qldrevenue.snapshot`) and fetches only the changes since
+    its version; the snapshot is rewritten at most every `snapshot_every_s`.
+
+    With `live_exposure`, `interest_amount` / `total_exposure` (and so
+    severity) are re-evaluated at the replica's as-of date instead of the
+    date Silver was loaded (`qldrevenue.calculations.recompute_exposure`).
+    """
+
+    def __init__(
+        self,
+        executor: Any,
+        silver_table: str = SILVER_TABLE,
+        state_table: str = CASE_MGMT_STATE_TABLE,
+        snapshot_dir: Optional[str] = None,
+        snapshot_every_s: float = 300.0,
+        live_exposure: bool = False,
+    ) -> None:
+        self.executor = executor
+        self.silver_table = silver_table
+        self.state_table = state_table
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_every_s = snapshot_every_s
+        self.live_exposure = live_exposure
+        self.saved_at: float = 0.0
+        self.saved_version: Optional[int] = None
+        self.version: Optional[int] = None
+        self.state_watermark: Optional[pd.Timestamp] = None
+        self.as_of: Optional[date] = None
+        self.synced_at: float = 0.0
+        self._silver = pd.DataFrame()
+        self._state = pd.DataFrame(columns=list(_STATE_COLUMNS))
+        self._frame = pd.DataFrame()
+        self._lock = threading.RLock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+
+    def snapshot(self) -> pd.DataFrame:
+        return self._frame
+
+    def latest_version(self) -> int:
+        df = self.executor.fetch(f"DESCRIBE HISTORY {self.silver_table} LIMIT 1")
+        return int(df["version"].iloc[0])
+
+    def load(self, version: Optional[int] = None) -> None:
+        """Full read of Silver (at `version`, default latest) and case state."""
+        with self._lock:
+            version = self.latest_version() if version is None else int(version)
+            silver = self.executor.fetch_arrow(
+                f"SELECT * FROM {self.silver_table} VERSION AS OF {version} WHERE is_test_data = false"
+            )
+            state = self.executor.fetch(f"SELECT {', '.join(_STATE_COLUMNS)} FROM {self.state_table}")
+            self._install(silver, state, version)
+
+    def restore(self) -> bool:
+        """Install the on-disk snapshot, if any; `sync` then fetches only newer changes."""
+        if not self.snapshot_dir:
+            return False
+        snap = read_snapshot(self.snapshot_dir)
+        if snap is None:
+            return False
+        with self._lock:
+            self._install(snap.silver, snap.state, snap.version)
+            if snap.state_watermark is not None:
+                self.state_watermark = snap.state_watermark
+            # Restored data is as old as the snapshot; the next sync_if_stale must sync.
+            self.synced_at = 0.0
+            self.saved_at, self.saved_version = time.time(), snap.version
+        return True
+
+    def save_snapshot(self) -> Optional[str]:
+        """Write the current Silver/state inputs to `snapshot_dir`, tagged with `version`."""
+        if not self.snapshot_dir or not self.loaded:
+            return None
+        with self._lock:
+            path = write_snapshot(self.snapshot_dir, self.version, self._silver, self._state, self.state_watermark)
+            self.saved_at, self.saved_version = time.time(), self.version
+        return path
+
+    def _maybe_save(self) -> None:
+        if not self.snapshot_dir or self.saved_version == self.version:
+            return
+        if time.time() - self.saved_at >= self.snapshot_every_s:
+            try:
+                self.save_snapshot()
+            except Exception:
+                # A snapshot only speeds up cold starts; never fail a sync over it.
+                pass
+
+    def _install(self, silver: pd.DataFrame, state: pd.DataFrame, version: int) -> None:
+        self._silver = _plain(silver).drop_duplicates("case_id", keep="last").reset_index(drop=True)
+        self._state = self._normalise_state(state)
+        self.version = version
+        self.state_watermark = self._state["updated_at"].max() if not self._state.empty else None
+        self.as_of = date.today()
+        self._frame = self._derive(self._silver, self._state, self.as_of)
+        self.synced_at = time.time()
+
+    @staticmethod
+    def _normalise_state(state: pd.DataFrame) -> pd.DataFrame:
+        if state is None or state.empty:
+            return pd.DataFrame(columns=list(_STATE_COLUMNS))
+        state = _plain(state)
+        state = state.assign(updated_at=pd.to_datetime(state["updated_at"], errors="coerce"))
+        return state.sort_values("updated_at", na_position="first").drop_duplicates("case_id", keep="last").reset_index(drop=True)
+
+    def sync(self) -> Set[str]:
+        """Apply changes since the last load/sync; returns the changed case_ids.
+
+        Falls back to a full `load` when Silver's change feed no longer covers
+        the replica's version (e.g. after VACUUM or a table rewrite).
+        """
+        if not self.loaded and not self.restore():
+            self.load()
+            self._maybe_save()
+            return set(self._silver["case_id"])
+        with self._lock:
+            changed: Set[str] = set()
+            latest = self.latest_version()
+            silver = self._silver
+            if latest > self.version:
+                try:
+                    changes = self.executor.fetch(
+                        f"""
+      SELECT *
+      FROM table_changes('{self.silver_table}', {int(self.version) + 1}, {int(latest)})
+      WHERE _change_type != 'update_preimage'
+    """
+                    )
+                except Exception:
+                    changes = None
+                if changes is None:
+                    self.load()
+                    self._maybe_save()
+                    return set(self._silver["case_id"])
+                silver, silver_changed = self._apply_silver_changes(silver, changes)
+                changed |= silver_changed
+
+            state = self._state
+            if self.state_watermark is not None:
+                delta = self.executor.fetch(
+                    f"SELECT {', '.join(_STATE_COLUMNS)} FROM {self.state_table} WHERE updated_at >= :since",
+                    {"since": self.state_watermark.to_pydatetime()},
+                )
+            else:
+                delta = self.executor.fetch(f"SELECT {', '.join(_STATE_COLUMNS)} FROM {self.state_table}")
+            if delta is not None and not delta.empty:
+                delta = self._normalise_state(delta)
+                state = self._normalise_state(pd.concat([state, delta], ignore_index=True))
+                changed |= set(delta["case_id"])
+
+            self._refresh(silver, state, changed)
+            self._silver, self._state, self.version = silver, state, latest
+            if not state.empty:
+                self.state_watermark = state["updated_at"].max()
+            self.synced_at = time.time()
+            self._maybe_save()
+            return changed
+
+    def mark_stale(self) -> None:
+        """Force the next `sync_if_stale` to sync (e.g. right after this process wrote case state)."""
+        self.synced_at = 0.0
+
+    def sync_if_stale(self, max_age_s: float = 10.0) -> Set[str]:
+        if self.loaded and time.time() - self.synced_at < max_age_s:
+            return set()
+        return self.sync()
+
+    @staticmethod
+    def _apply_silver_changes(silver: pd.DataFrame, changes: pd.DataFrame) -> Tuple[pd.DataFrame, Set[str]]:
+        if changes is None or changes.empty:
+            return silver, set()
+        changes = _plain(changes).sort_values("_commit_version", kind="stable")
+        last = changes.drop_duplicates("case_id", keep="last")
+        changed = set(last["case_id"])
+        keep = silver[~silver["case_id"].isin(changed)]
+        upserts = last[last["_change_type"] != "delete"]
+        if "is_test_data" in upserts.columns:
+            upserts = upserts[upserts["is_test_data"] != True]  # noqa: E712 - NULL-safe "not true"
+        upserts = upserts.drop(columns=[c for c in _CDF_COLUMNS if c in upserts.columns])
+        return pd.concat([keep, upserts], ignore_index=True), changed
+
+    def _refresh(self, silver: pd.DataFrame, state: pd.DataFrame, changed: Iterable[str]) -> None:
+        today = date.today()
+        if today != self.as_of:
+            # Age/SLA/overdue columns moved on; recompute everything locally.
+            self.as_of = today
+            self._frame = self._derive(silver, state, today)
+            return
+        changed = set(changed)
+        if not changed:
+            return
+        rows = silver[silver["case_id"].isin(changed)]
+        fresh = self._derive(rows, state[state["case_id"].isin(changed)], today)
+        keep = self._frame[~self._frame["case_id"].isin(changed)] if not self._frame.empty else self._frame
+        parts = [p for p in (keep, fresh) if not p.empty]
+        self._frame = pd.concat(parts, ignore_index=True) if parts else fresh
+
+    def _derive(self, silver: pd.DataFrame, state: pd.DataFrame, as_of: date) -> pd.DataFrame:
+        if self.live_exposure:
+            silver = recompute_exposure(silver, as_of)
+        return derive_gold(silver, state, as_of)
+
+    def get(self, case_id: str) -> Optional[Dict[str, Any]]:
+        frame = self._frame
+        if frame.empty:
+            return None
+        hit = frame[frame["case_id"] == case_id]
+        return None if hit.empty else hit.iloc[0].to_dict()
+
+
+_REPLICAS: Dict[str, CaseReplica] = {}
+_REPLICAS_LOCK = threading.Lock()
+
+
+def get_replica(
+    executor: Any, silver_table: str = SILVER_TABLE, snapshot_dir: Optional[str] = None, live_exposure: bool = False
+) -> CaseReplica:
+    """Return the process-wide `CaseReplica` for a Silver table."""
+    with _REPLICAS_LOCK:
+        replica = _REPLICAS.get(silver_table)
+        if replica is None:
+            replica = CaseReplica(executor, silver_table=silver_table, snapshot_dir=snapshot_dir, live_exposure=live_exposure)
+            _REPLICAS[silver_table] = replica
+        return replica
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from qldrevenue.constants import CASE_ROLLUP_TABLE, GOLD_TABLE_ACTIVE, SILVER_TABLE
+from qldrevenue.metrics import kpis_from_row
+from qldrevenue.sqlbuilder import Where
+
+# Slice dimensions, one rollup row per combination present in Gold.
+DIMENSIONS = ("case_domain", "case_type", "status", "severity", "regional_office", "financial_year")
+
+# Dimensions that partition the cube. `status` (case state) and `severity`
+# (exposure/risk) move a case between cells within its partition; a Silver
+# update to the domain, type, postcode or tax period moves it to another
+# partition, so a refresh must cover the partition it left as well.
+STATIC_DIMENSIONS = ("case_domain", "case_type", "regional_office", "financial_year")
+
+# Same derivations as sql/05_create_gold.sql, evaluated on Silver rows.
+_FINANCIAL_YEAR_SQL = """CASE
+        WHEN month(tax_period_start) >= 7 THEN concat(cast(year(tax_period_start) as string), '-', lpad(cast((year(tax_period_start)+1) % 100 as string), 2, '0'))
+        ELSE concat(cast(year(tax_period_start)-1 as string), '-', lpad(cast(year(tax_period_start) % 100 as string), 2, '0'))
+      END"""
+_REGIONAL_OFFICE_SQL = """CASE
+        WHEN taxpayer_postcode LIKE '400%' OR taxpayer_postcode LIKE '41%' THEN 'Brisbane'
+        WHEN taxpayer_postcode LIKE '42%' THEN 'Gold Coast'
+        WHEN taxpayer_postcode LIKE '48%' THEN 'Far North Queensland'
+        ELSE 'Regional'
+      END"""
+
+_MEASURES = """
+        count(*) AS case_count,
+        COALESCE(SUM(total_exposure), 0) AS total_exposure,
+        COALESCE(SUM(COALESCE(tax_shortfall, 0)), 0) AS total_shortfall,
+        hll_sketch_agg(taxpayer_abn) AS taxpayer_sketch"""
+
+# Rolled-up measures in the `metrics.kpis` shape; average shortfall is
+# additive as sum/count, distinct taxpayers come from the unioned sketches.
+_KPI_SELECT = """
+        COALESCE(SUM(case_count), 0) AS total_cases,
+        COALESCE(SUM(total_exposure), 0) AS total_exposure,
+        COALESCE(SUM(total_shortfall) / NULLIF(SUM(case_count), 0), 0) AS avg_shortfall,
+        COALESCE(hll_sketch_estimate(hll_union_agg(taxpayer_sketch)), 0) AS unique_taxpayers"""
+
+
+def _null_safe_on(left: str, right: str, dims: Sequence[str]) -> str:
+    return " AND ".join(f"{left}.{d} <=> {right}.{d}" for d in dims)
+
+
+class CaseRollup:
+    """Pre-aggregated `case_rollup` cube over the `DIMENSIONS` of Gold.
+
+    Each row holds the case count, summed exposure and shortfall, and an HLL
+    sketch of taxpayer ABNs for one combination of dimension values. Any
+    filter that only restricts those dimensions (see `can_serve`) is answered
+    from the cube without reading case-level rows.
+    """
+
+    def __init__(
+        self,
+        executor: Any,
+        table: str = CASE_ROLLUP_TABLE,
+        gold_table: str = GOLD_TABLE_ACTIVE,
+        silver_table: str = SILVER_TABLE,
+    ) -> None:
+        self.executor = executor
+        self.table = table
+        self.gold_table = gold_table
+        self.silver_table = silver_table
+
+    # --- maintenance -----------------------------------------------------
+
+    def rebuild_stmt(self) -> str:
+        dims = ", ".join(DIMENSIONS)
+        return f"""
+      INSERT OVERWRITE {self.table}
+      SELECT {dims},{_MEASURES},
+        current_timestamp() AS refreshed_at
+      FROM {self.gold_table}
+      GROUP BY {dims}
+    """
+
+    def rebuild(self) -> None:
+        """Full rebuild from Gold (initial load, or after bulk Silver reloads)."""
+        self.executor.exec(self.rebuild_stmt())
+
+    def refresh_cases_stmt(
+        self, case_ids: Sequence[str], silver_versions: Optional[Tuple[int, int]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        dims = ", ".join(DIMENSIONS)
+        inputs = f"SELECT case_id, case_domain, case_type, taxpayer_postcode, tax_period_start FROM {self.silver_table}"
+        if silver_versions is not None:
+            # Pre-images and deletes carry the partition a case has moved out of.
+            lo, hi = (int(v) for v in silver_versions)
+            inputs += f"""
+            UNION ALL
+            SELECT case_id, case_domain, case_type, taxpayer_postcode, tax_period_start
+            FROM table_changes('{self.silver_table}', {lo}, {hi})"""
+        g_dims = ", ".join(f"g.{d}" for d in DIMENSIONS)
+        r_dims = ", ".join(f"r.{d}" for d in DIMENSIONS)
+        stmt = f"""
+      MERGE INTO {self.table} AS t
+      USING (
+        WITH affected AS (
+          SELECT DISTINCT
+            case_domain,
+            case_type,
+            {_REGIONAL_OFFICE_SQL} AS regional_office,
+            {_FINANCIAL_YEAR_SQL} AS financial_year
+          FROM (
+            {inputs}
+          ) AS c
+          WHERE array_contains(from_json(:case_ids, 'ARRAY<STRING>'), case_id)
+        ),
+        fresh AS (
+          SELECT {g_dims},{_MEASURES}
+          FROM {self.gold_table} AS g
+          LEFT SEMI JOIN affected AS a ON {_null_safe_on("g", "a", STATIC_DIMENSIONS)}
+          GROUP BY {g_dims}
+        )
+        SELECT *, false AS is_stale FROM fresh
+        UNION ALL
+        SELECT {r_dims}, 0, 0, 0, NULL, true
+        FROM {self.table} AS r
+        LEFT SEMI JOIN affected AS a ON {_null_safe_on("r", "a", STATIC_DIMENSIONS)}
+        LEFT ANTI JOIN fresh AS f ON {_null_safe_on("r", "f", DIMENSIONS)}
+      ) AS s
+      ON {_null_safe_on("t", "s", DIMENSIONS)}
+      WHEN MATCHED AND s.is_stale THEN DELETE
+      WHEN MATCHED THEN UPDATE SET
+        case_count = s.case_count,
+        total_exposure = s.total_exposure,
+        total_shortfall = s.total_shortfall,
+        taxpayer_sketch = s.taxpayer_sketch,
+        refreshed_at = current_timestamp()
+      WHEN NOT MATCHED AND NOT s.is_stale THEN INSERT
+        ({dims}, case_count, total_exposure, total_shortfall, taxpayer_sketch, refreshed_at)
+        VALUES ({", ".join(f"s.{d}" for d in DIMENSIONS)}, s.case_count, s.total_exposure, s.total_shortfall, s.taxpayer_sketch, current_timestamp())
+    """
+        return stmt, {"case_ids": json.dumps(list(case_ids))}
+
+    def refresh_cases(self, case_ids: Sequence[str], silver_versions: Optional[Tuple[int, int]] = None) -> None:
+        """Recompute only the static partitions containing `case_ids`.
+
+        Call after Gold picks up Silver or `case_management_state` changes for
+        those cases; cells emptied by the change are deleted. Pass the Silver
+        versions (first, last) the changes came from, so partitions cases were
+        moved or deleted out of are recomputed too; without them only a
+        state change is safe, and a Silver change needs `rebuild()`.
+        """
+        if not case_ids:
+            return
+        self.executor.exec(*self.refresh_cases_stmt(case_ids, silver_versions))
+
+    # --- queries ---------------------------------------------------------
+
+    @staticmethod
+    def can_serve(filters: Mapping[str, Any]) -> bool:
+        """True when every active filter is an IN/equality on a rollup dimension."""
+        return all(col in DIMENSIONS for col, values in filters.items() if values)
+
+    @staticmethod
+    def _where(filters: Mapping[str, Any], where: Optional[Where] = None) -> Where:
+        where = where if where is not None else Where()
+        for col, values in filters.items():
+            if not values:
+                continue
+            if col not in DIMENSIONS:
+                raise ValueError(f"Not a rollup dimension: {col}")
+            if isinstance(values, str):
+                values = [values]
+            where.isin(col, values, name=col)
+        return where
+
+    def kpi_statement(self, filters: Mapping[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        where = self._where(filters)
+        stmt = f"""
+      SELECT{_KPI_SELECT}
+      FROM {self.table}
+      WHERE {where.sql()}
+    """
+        return stmt, where.params
+
+    def kpis(self, filters: Mapping[str, Any]) -> Dict[str, Any]:
+        """`metrics.kpis`-shaped dict (distinct taxpayers approximate)."""
+        return kpis_from_row(self.executor.fetch(*self.kpi_statement(filters)))
+
+    def breakdown_statement(self, dimension: str, filters: Mapping[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Not a rollup dimension: {dimension}")
+        where = self._where(filters)
+        stmt = f"""
+      SELECT {dimension},{_KPI_SELECT}
+      FROM {self.table}
+      WHERE {where.sql()}
+      GROUP BY {dimension}
+      ORDER BY total_exposure DESC
+    """
+        return stmt, where.params
+
+    def breakdown(self, dimension: str, filters: Mapping[str, Any]) -> pd.DataFrame:
+        """One row per value of `dimension` with the KPI columns."""
+        return self.executor.fetch(*self.breakdown_statement(dimension, filters))
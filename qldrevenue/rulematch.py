@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from qldrevenue.rules import CompiledRule, OfficerRule
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+class CaseIndex:
+    """Shared per-column indexes over a cases frame, built lazily and reused by every rule.
+
+    - categorical conditions use an inverted index: value -> sorted row positions
+    - `>=` thresholds use the column's argsort; one binary search gives the
+      matching suffix
+    """
+
+    def __init__(self, cases: pd.DataFrame) -> None:
+        self.cases = cases
+        self.n = len(cases)
+        self._postings: Dict[str, Dict[Any, np.ndarray]] = {}
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def has(self, column: str) -> bool:
+        return column in self.cases.columns
+
+    def postings(self, column: str) -> Dict[Any, np.ndarray]:
+        idx = self._postings.get(column)
+        if idx is None:
+            codes, uniques = pd.factorize(self.cases[column], sort=False)
+            valid = codes >= 0  # NULLs (code -1) are never indexed, as in SQL
+            rows = np.flatnonzero(valid)
+            order = np.argsort(codes[valid], kind="stable")
+            bounds = np.cumsum(np.bincount(codes[valid], minlength=len(uniques)))[:-1]
+            idx = dict(zip(list(uniques), np.split(rows[order], bounds)))
+            self._postings[column] = idx
+        return idx
+
+    def rows_in(self, column: str, values: Iterable[Any]) -> np.ndarray:
+        postings = self.postings(column)
+        parts = [postings[v] for v in set(values) if v in postings]
+        if not parts:
+            return _EMPTY
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts))
+
+    def rows_gte(self, column: str, threshold: float) -> np.ndarray:
+        entry = self._sorted.get(column)
+        if entry is None:
+            series = self.cases[column]
+            if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+                series = pd.to_numeric(series, errors="coerce")
+            values = series.to_numpy(dtype="float64", na_value=np.nan)
+            order = np.argsort(values, kind="stable")  # NaN sorts last
+            entry = (values[order], order)
+            self._sorted[column] = entry
+        values, order = entry
+        start = np.searchsorted(values, threshold, side="left")
+        stop = len(values) - int(np.isnan(values).sum()) if len(values) else 0
+        return np.sort(order[start:stop])
+
+    def rows_for(self, rule: CompiledRule) -> np.ndarray:
+        """Sorted row positions matching `rule`; same semantics as `CompiledRule.mask`."""
+        parts: List[np.ndarray] = []
+        if rule.case_types and self.has("case_type"):
+            parts.append(self.rows_in("case_type", rule.case_types))
+        if rule.case_domains and self.has("case_domain"):
+            parts.append(self.rows_in("case_domain", rule.case_domains))
+        if rule.industry_codes and self.has("industry_code"):
+            parts.append(self.rows_in("industry_code", rule.industry_codes))
+        if rule.tax_shortfall_min is not None and self.has("tax_shortfall"):
+            parts.append(self.rows_gte("tax_shortfall", rule.tax_shortfall_min))
+        if rule.risk_score_min is not None and self.has("risk_score"):
+            parts.append(self.rows_gte("risk_score", rule.risk_score_min))
+        if rule.sla_breached is not None and self.has("sla_breached"):
+            parts.append(self.rows_in("sla_breached", [rule.sla_breached]))
+        if rule.financial_year and self.has("financial_year"):
+            parts.append(self.rows_in("financial_year", [rule.financial_year]))
+        if rule.regional_office and self.has("regional_office"):
+            parts.append(self.rows_in("regional_office", [rule.regional_office]))
+
+        if not parts:
+            return np.arange(self.n, dtype=np.int64)
+        parts.sort(key=len)  # intersect from the most selective condition up
+        out = parts[0]
+        for p in parts[1:]:
+            if not len(out):
+                break
+            out = np.intersect1d(out, p, assume_unique=True)
+        return out.astype(np.int64, copy=False)
+
+
+@dataclass(frozen=True)
+class RuleMatches:
+    """Sparse rule x case match matrix in CSR layout.
+
+    Row `i` (rule `rule_ids[i]`) matches case positions
+    `indices[indptr[i]:indptr[i + 1]]` of the evaluated frame.
+    """
+
+    rule_ids: Tuple[str, ...]
+    indptr: np.ndarray
+    indices: np.ndarray
+    n_cases: int
+
+    def rows(self, rule_id: str) -> np.ndarray:
+        i = self.rule_ids.index(rule_id)
+        return self.indices[self.indptr[i] : self.indptr[i + 1]]
+
+    def counts(self) -> Dict[str, int]:
+        return dict(zip(self.rule_ids, np.diff(self.indptr).tolist()))
+
+    def dense(self) -> np.ndarray:
+        out = np.zeros((len(self.rule_ids), self.n_cases), dtype=bool)
+        for i in range(len(self.rule_ids)):
+            out[i, self.indices[self.indptr[i] : self.indptr[i + 1]]] = True
+        return out
+
+    def to_frame(self, case_ids: Sequence[Any]) -> pd.DataFrame:
+        """Long `(rule_id, case_id)` pairs, e.g. to load a `rule_matches` table."""
+        case_ids = np.asarray(case_ids, dtype=object)
+        rule_col = np.repeat(np.asarray(self.rule_ids, dtype=object), np.diff(self.indptr))
+        return pd.DataFrame({"rule_id": rule_col, "case_id": case_ids[self.indices]})
+
+
+def evaluate_rules(
+    rules: Sequence[OfficerRule],
+    cases: pd.DataFrame,
+    index: Optional[CaseIndex] = None,
+) -> RuleMatches:
+    """Evaluate every rule against `cases` in one pass over shared indexes.
+
+    Index construction is paid once per column; each rule then costs only its
+    posting-list sizes, and rules with identical compiled predicates (common
+    across officers) are evaluated once.
+    """
+    index = index or CaseIndex(cases)
+    memo: Dict[CompiledRule, np.ndarray] = {}
+    chunks: List[np.ndarray] = []
+    indptr = np.zeros(len(rules) + 1, dtype=np.int64)
+    for i, rule in enumerate(rules):
+        compiled = rule.compile()
+        rows = memo.get(compiled)
+        if rows is None:
+            rows = index.rows_for(compiled)
+            memo[compiled] = rows
+        chunks.append(rows)
+        indptr[i + 1] = indptr[i] + len(rows)
+
+    return RuleMatches(
+        rule_ids=tuple(r.rule_id for r in rules),
+        indptr=indptr,
+        indices=np.concatenate(chunks) if chunks else _EMPTY,
+        n_cases=len(cases),
+    )
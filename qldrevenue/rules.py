@@ -2,10 +2,18 @@ from __future__ import annotations
 
 import json
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from qldrevenue.sqlbuilder import Where
+
+# Industry codes only exist on Payroll Tax cases; a rule restricted to other
+# case types ignores its industry filter instead of matching nothing.
+INDUSTRY_CASE_TYPE = "Payroll Tax"
+
 
 @dataclass(frozen=True)
 class OfficerRule:
@@ -31,6 +39,174 @@ class OfficerRule:
             filter_conditions=conds_dict,
         )
 
+    def compile(self) -> "CompiledRule":
+        return compile_rule(self.filter_conditions)
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """Hashable, normalised form of a rule's `filter_conditions`.
+
+    One predicate, two backends that must agree row for row:
+    - `where()` emits a parameterised SQL fragment to push down to the warehouse
+    - `mask()` evaluates the same predicate locally over a cached DataFrame
+
+    SQL NULL semantics are mirrored locally: a missing value never matches.
+    """
+
+    case_types: Tuple[str, ...] = ()
+    case_domains: Tuple[str, ...] = ()
+    industry_codes: Tuple[str, ...] = ()
+    tax_shortfall_min: Optional[float] = None
+    risk_score_min: Optional[int] = None
+    sla_breached: Optional[bool] = None
+    financial_year: Optional[str] = None
+    regional_office: Optional[str] = None
+    industry_codes_skipped: bool = False
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Case columns this predicate reads."""
+        cols = []
+        if self.case_types:
+            cols.append("case_type")
+        if self.case_domains:
+            cols.append("case_domain")
+        if self.industry_codes:
+            cols.append("industry_code")
+        if self.tax_shortfall_min is not None:
+            cols.append("tax_shortfall")
+        if self.risk_score_min is not None:
+            cols.append("risk_score")
+        if self.sla_breached is not None:
+            cols.append("sla_breached")
+        if self.financial_year:
+            cols.append("financial_year")
+        if self.regional_office:
+            cols.append("regional_office")
+        return tuple(cols)
+
+    def can_evaluate_locally(self, cases: pd.DataFrame) -> bool:
+        """True when `cases` carries every column the predicate needs."""
+        return all(c in cases.columns for c in self.columns)
+
+    def where(self, where: Optional[Where] = None, prefix: str = "rule_") -> Where:
+        """Add this predicate's clauses (named parameters) to `where`."""
+        w = where if where is not None else Where()
+        if self.case_types:
+            w.isin("case_type", self.case_types, name=f"{prefix}case_type")
+        if self.case_domains:
+            w.isin("case_domain", self.case_domains, name=f"{prefix}case_domain")
+        if self.industry_codes:
+            w.isin("industry_code", self.industry_codes, name=f"{prefix}industry_code")
+        if self.tax_shortfall_min is not None:
+            w.gte("tax_shortfall", self.tax_shortfall_min, name=f"{prefix}shortfall_min")
+        if self.risk_score_min is not None:
+            w.gte("risk_score", self.risk_score_min, name=f"{prefix}risk_min")
+        if self.sla_breached is not None:
+            w.eq("sla_breached", self.sla_breached, name=f"{prefix}sla_breached")
+        if self.financial_year:
+            w.eq("financial_year", self.financial_year, name=f"{prefix}financial_year")
+        if self.regional_office:
+            w.eq("regional_office", self.regional_office, name=f"{prefix}regional_office")
+        return w
+
+    def mask(self, cases: pd.DataFrame) -> np.ndarray:
+        """Boolean numpy mask of rows matching the predicate.
+
+        All conditions are AND-ed in place into a single array; no intermediate
+        DataFrames are built. Conditions on columns absent from `cases` are
+        ignored (projected frames).
+        """
+        m = np.ones(len(cases), dtype=bool)
+
+        def _has(col: str) -> bool:
+            return col in cases.columns
+
+        if self.case_types and _has("case_type"):
+            m &= _isin_mask(cases["case_type"], self.case_types)
+        if self.case_domains and _has("case_domain"):
+            m &= _isin_mask(cases["case_domain"], self.case_domains)
+        if self.industry_codes and _has("industry_code"):
+            m &= _isin_mask(cases["industry_code"], self.industry_codes)
+        if self.tax_shortfall_min is not None and _has("tax_shortfall"):
+            m &= _gte_mask(cases["tax_shortfall"], self.tax_shortfall_min)
+        if self.risk_score_min is not None and _has("risk_score"):
+            m &= _gte_mask(cases["risk_score"], self.risk_score_min)
+        if self.sla_breached is not None and _has("sla_breached"):
+            m &= _eq_mask(cases["sla_breached"], self.sla_breached)
+        if self.financial_year and _has("financial_year"):
+            m &= _eq_mask(cases["financial_year"], self.financial_year)
+        if self.regional_office and _has("regional_office"):
+            m &= _eq_mask(cases["regional_office"], self.regional_office)
+        return m
+
+
+def _isin_mask(series: pd.Series, values: Tuple[str, ...]) -> np.ndarray:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Compare small integer codes instead of strings (NaN has code -1).
+        wanted = series.cat.categories.get_indexer(list(values))
+        return np.isin(series.cat.codes.to_numpy(), wanted[wanted >= 0])
+    return series.isin(values).to_numpy()
+
+
+def _gte_mask(series: pd.Series, threshold: float) -> np.ndarray:
+    if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(series, errors="coerce")
+    arr = series.to_numpy(dtype="float64", na_value=np.nan)
+    # NaN >= x is False, matching SQL's NULL >= x.
+    with np.errstate(invalid="ignore"):
+        return arr >= threshold
+
+
+def _eq_mask(series: pd.Series, value: Any) -> np.ndarray:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        code = series.cat.categories.get_indexer([value])[0]
+        return series.cat.codes.to_numpy() == code if code >= 0 else np.zeros(len(series), dtype=bool)
+    if series.dtype == bool:
+        arr = series.to_numpy()
+        return arr if value else ~arr
+    return (series == value).to_numpy(dtype=bool, na_value=False)
+
+
+def _str_tuple(values: Any) -> Tuple[str, ...]:
+    if not values:
+        return ()
+    if isinstance(values, str):
+        return (values,)
+    return tuple(str(v) for v in values)
+
+
+def compile_rule(conds: Dict[str, Any]) -> CompiledRule:
+    """Compile `filter_conditions` into a (cached) `CompiledRule`."""
+    return _compile_cached(json.dumps(conds or {}, sort_keys=True, default=str))
+
+
+@lru_cache(maxsize=1024)
+def _compile_cached(conds_json: str) -> CompiledRule:
+    conds = json.loads(conds_json)
+    case_types = _str_tuple(conds.get("case_types"))
+    industry_codes = _str_tuple(conds.get("industry_codes"))
+    skipped = False
+    if industry_codes and case_types and INDUSTRY_CASE_TYPE not in case_types:
+        industry_codes = ()
+        skipped = True
+
+    shortfall = conds.get("tax_shortfall_min")
+    risk = conds.get("risk_score_min")
+    sla = conds.get("sla_breached")
+    return CompiledRule(
+        case_types=case_types,
+        case_domains=_str_tuple(conds.get("case_domains")),
+        industry_codes=industry_codes,
+        tax_shortfall_min=float(shortfall) if shortfall is not None else None,
+        risk_score_min=int(risk) if risk is not None else None,
+        sla_breached=bool(sla) if sla is not None else None,
+        financial_year=str(conds["financial_year"]) if conds.get("financial_year") else None,
+        regional_office=str(conds["regional_office"]) if conds.get("regional_office") else None,
+        industry_codes_skipped=skipped,
+    )
+
 
 def apply_rule_df(cases: pd.DataFrame, conds: Dict[str, Any]) -> pd.DataFrame:
     """Apply a subset of rule conditions to a cases DataFrame.
@@ -43,38 +219,30 @@ def apply_rule_df(cases: pd.DataFrame, conds: Dict[str, Any]) -> pd.DataFrame:
     - sla_breached: bool on `sla_breached`
     - financial_year: str on `financial_year`
     - regional_office: str on `regional_office`
-    """
-
-    df = cases.copy()
-
-    def _maybe(col: str) -> bool:
-        return col in df.columns
+    - case_domains: list[str] on `case_domain`
 
-    if conds.get("case_types") and _maybe("case_type"):
-        df = df[df["case_type"].isin(list(conds["case_types"]))]
-
-    if conds.get("case_domains") and _maybe("case_domain"):
-        df = df[df["case_domain"].isin(list(conds["case_domains"]))]
-
-    if conds.get("industry_codes") and _maybe("industry_code"):
-        df = df[df["industry_code"].isin(list(conds["industry_codes"]))]
+    Evaluated through `compile_rule`, so results match the SQL pushed to the
+    warehouse (including the Payroll-Tax-only industry filter). The input is
+    never copied; matching rows are gathered with a single `take`.
+    """
 
-    if conds.get("tax_shortfall_min") is not None and _maybe("tax_shortfall"):
-        df = df[df["tax_shortfall"] >= float(conds["tax_shortfall_min"])]
+    return take_rows(cases, rule_mask(cases, conds))
 
-    if conds.get("risk_score_min") is not None and _maybe("risk_score"):
-        df = df[df["risk_score"] >= int(conds["risk_score_min"])]
 
-    if conds.get("sla_breached") is not None and _maybe("sla_breached"):
-        df = df[df["sla_breached"] == bool(conds["sla_breached"])]
+def rule_mask(cases: pd.DataFrame, conds: Dict[str, Any]) -> np.ndarray:
+    """Boolean mask (numpy, aligned to `cases` rows) for a rule's conditions.
 
-    if conds.get("financial_year") and _maybe("financial_year"):
-        df = df[df["financial_year"] == str(conds["financial_year"])]
+    Callers can AND it with other masks (e.g. quick filters) before
+    materialising anything.
+    """
+    return compile_rule(conds).mask(cases)
 
-    if conds.get("regional_office") and _maybe("regional_office"):
-        df = df[df["regional_office"] == str(conds["regional_office"])]
 
-    return df.reset_index(drop=True)
+def take_rows(cases: pd.DataFrame, mask: np.ndarray) -> pd.DataFrame:
+    """Rows where `mask` is True, with a fresh RangeIndex, in one gather."""
+    out = cases.take(np.flatnonzero(mask))
+    out.index = pd.RangeIndex(len(out))
+    return out
 
 
 def to_rule_conditions(
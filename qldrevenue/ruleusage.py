@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import atexit
+import json
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from qldrevenue.constants import OFFICER_RULES_TABLE
+
+_USAGE_SCHEMA = "ARRAY<STRUCT<rule_id: STRING, last_used_at: STRING, use_count: BIGINT>>"
+
+
+class RuleUsageTracker:
+    """Collects rule-usage telemetry in memory and writes it as one periodic MERGE.
+
+    `record` is a dict update, so nothing is written on the interactive path;
+    `flush` (every `flush_interval_s` once `start`ed) folds all pending usage
+    into `officer_case_rules` as `(rule_id, max(last_used_at), use_count)`.
+    Usage from a failed flush is kept and retried with the next one.
+
+    Until sql/10_rule_usage.sql has added `use_count`, flushes write only
+    `last_used_at` (as before the column existed) and the counts are dropped.
+    """
+
+    def __init__(
+        self,
+        executor: Any,
+        rules_table: str = OFFICER_RULES_TABLE,
+        flush_interval_s: float = 60.0,
+        on_flush: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        self.executor = executor
+        self.rules_table = rules_table
+        self.flush_interval_s = flush_interval_s
+        self.on_flush = on_flush
+        self.last_error: Optional[BaseException] = None
+        self._has_use_count = False
+        self._pending: Dict[str, Tuple[datetime, int]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, rule_id: str, new_use: bool = True, at: Optional[datetime] = None) -> None:
+        """Note that `rule_id` is in use; `new_use=False` only advances last_used_at."""
+        at = at or datetime.utcnow()
+        with self._lock:
+            last, count = self._pending.get(rule_id, (at, 0))
+            self._pending[rule_id] = (max(last, at), count + (1 if new_use else 0))
+
+    def pending(self) -> Dict[str, Tuple[datetime, int]]:
+        with self._lock:
+            return dict(self._pending)
+
+    def has_use_count(self) -> bool:
+        """Whether `rules_table` has the `use_count` column (probed on each call until it has)."""
+        if not self._has_use_count:
+            try:
+                self.executor.fetch(f"SELECT use_count FROM {self.rules_table} LIMIT 0")
+                self._has_use_count = True
+            except Exception:
+                pass
+        return self._has_use_count
+
+    def merge_statement(self, usage: Dict[str, Tuple[datetime, int]], use_count: bool = True) -> Tuple[str, Dict[str, Any]]:
+        rows = [
+            {"rule_id": rid, "last_used_at": at.isoformat(sep=" "), "use_count": count}
+            for rid, (at, count) in sorted(usage.items())
+        ]
+        count_set = ",\n        t.use_count = COALESCE(t.use_count, 0) + s.use_count" if use_count else ""
+        stmt = f"""
+      MERGE INTO {self.rules_table} AS t
+      USING (
+        SELECT rule_id, CAST(last_used_at AS TIMESTAMP) AS last_used_at, use_count
+        FROM (SELECT inline(from_json(:usage, '{_USAGE_SCHEMA}')))
+      ) AS s
+      ON t.rule_id = s.rule_id
+      WHEN MATCHED THEN UPDATE SET
+        t.last_used_at = GREATEST(COALESCE(t.last_used_at, s.last_used_at), s.last_used_at){count_set}
+    """
+        return stmt, {"usage": json.dumps(rows)}
+
+    def flush(self) -> int:
+        """Write pending usage in one MERGE; returns the number of rules updated. Raises on failure."""
+        with self._flush_lock:
+            with self._lock:
+                usage, self._pending = self._pending, {}
+            if not usage:
+                return 0
+            try:
+                self.executor.exec(*self.merge_statement(usage, use_count=self.has_use_count()))
+            except BaseException:
+                # Put it back, folded with anything recorded meanwhile.
+                with self._lock:
+                    for rid, (at, count) in usage.items():
+                        last, newer = self._pending.get(rid, (at, 0))
+                        self._pending[rid] = (max(last, at), count + newer)
+                raise
+        if self.on_flush is not None:
+            self.on_flush(len(usage))
+        return len(usage)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval_s):
+            try:
+                self.flush()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+
+    def start(self) -> "RuleUsageTracker":
+        """Start the periodic flusher (idempotent)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="qro-rule-usage", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout_s: Optional[float] = 10.0) -> None:
+        """Stop the flusher after one last flush attempt."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout_s)
+        try:
+            self.flush()
+        except Exception as e:
+            self.last_error = e
+
+
+_TRACKERS: Dict[str, RuleUsageTracker] = {}
+_TRACKERS_LOCK = threading.Lock()
+
+
+def get_rule_usage_tracker(executor: Any, rules_table: str = OFFICER_RULES_TABLE, **kwargs: Any) -> RuleUsageTracker:
+    """Return the process-wide, started `RuleUsageTracker` for `rules_table`.
+
+    Usage is only held in memory, so the tracker is stopped (one last flush)
+    when the interpreter exits; a redeploy does not drop the last interval.
+    """
+    with _TRACKERS_LOCK:
+        tracker = _TRACKERS.get(rules_table)
+        if tracker is None:
+            tracker = RuleUsageTracker(executor, rules_table, **kwargs).start()
+            atexit.register(tracker.stop)
+            _TRACKERS[rules_table] = tracker
+        return tracker
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import pandas as pd
+
+from qldrevenue.dbsql import _require_pyarrow
+
+MANIFEST = "snapshot.json"
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Replica inputs as of one Silver Delta version."""
+
+    version: int
+    state_watermark: Optional[pd.Timestamp]
+    silver: pd.DataFrame
+    state: pd.DataFrame
+
+
+def _write_ipc(table: Any, path: str) -> None:
+    pa = _require_pyarrow()
+    # Uncompressed IPC *file* format: buffers can be memory-mapped in place.
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_ipc(path: str) -> pd.DataFrame:
+    pa = _require_pyarrow()
+    # Memory-mapped to skip a read() into an intermediate buffer; to_pandas
+    # still copies into this process, so every worker holds its own frame.
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(date_as_object=False)
+
+
+def _file_version(name: str) -> int:
+    # "<kind>-v<version>-<pid>.arrow"
+    try:
+        return int(name.split("-")[1][1:])
+    except (IndexError, ValueError):
+        return -1
+
+
+def _manifest_version(path: str) -> int:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return int(json.load(f)["delta_version"])
+    except (OSError, ValueError, KeyError):
+        return -1
+
+
+def write_snapshot(
+    directory: str,
+    version: int,
+    silver: pd.DataFrame,
+    state: pd.DataFrame,
+    state_watermark: Optional[pd.Timestamp] = None,
+) -> str:
+    """Persist a replica snapshot tagged with its Delta version; returns the manifest path.
+
+    Data files are written first and the manifest is swapped in atomically, so
+    concurrent readers (other workers, the next cold start) see either the old
+    or the new snapshot, never a partial one. The files of the snapshot being
+    replaced are kept until the next write, so a reader that has just read the
+    old manifest can still open them; anything older is removed.
+    """
+    pa = _require_pyarrow()
+    os.makedirs(directory, exist_ok=True)
+    tag = f"v{int(version)}-{os.getpid()}"
+    files = {"silver": f"silver-{tag}.arrow", "state": f"state-{tag}.arrow"}
+    _write_ipc(pa.Table.from_pandas(silver, preserve_index=False), os.path.join(directory, files["silver"]))
+    _write_ipc(pa.Table.from_pandas(state, preserve_index=False), os.path.join(directory, files["state"]))
+
+    manifest = {
+        "delta_version": int(version),
+        "state_watermark": state_watermark.isoformat() if state_watermark is not None and not pd.isna(state_watermark) else None,
+        "files": files,
+    }
+    path = os.path.join(directory, MANIFEST)
+    previous = _manifest_version(path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+
+    for name in os.listdir(directory):
+        if name.endswith(".arrow") and _file_version(name) < min(previous, int(version)):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                # Another worker may have removed it, or still has it mapped (Windows).
+                pass
+    return path
+
+
+def read_snapshot(directory: str) -> Optional[Snapshot]:
+    """Open the latest snapshot in `directory`, or None if there is none (or it is unreadable)."""
+    path = os.path.join(directory, MANIFEST)
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        silver = _read_ipc(os.path.join(directory, manifest["files"]["silver"]))
+        state = _read_ipc(os.path.join(directory, manifest["files"]["state"]))
+    except (OSError, ValueError, KeyError):
+        return None
+    watermark = manifest.get("state_watermark")
+    return Snapshot(
+        version=int(manifest["delta_version"]),
+        state_watermark=pd.Timestamp(watermark) if watermark else None,
+        silver=silver,
+        state=state,
+    )
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class SqlParam:
+    """One named Statement Execution parameter.
+
+    `as_dict()` produces the same wire shape as the SDK's
+    `StatementParameterListItem`, so instances can be passed straight to
+    `execute_statement(parameters=[...])` without importing the SDK here.
+    """
+
+    name: str
+    value: Optional[str]
+    type: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        d: Dict[str, Any] = {"name": self.name}
+        if self.value is not None:
+            d["value"] = self.value
+        if self.type:
+            d["type"] = self.type
+        return d
+
+
+def sql_param(name: str, value: Any) -> SqlParam:
+    """Build a typed parameter from a Python value (None -> NULL)."""
+    if value is None:
+        return SqlParam(name, None, "STRING")
+    if isinstance(value, bool):
+        return SqlParam(name, "true" if value else "false", "BOOLEAN")
+    if isinstance(value, int):
+        return SqlParam(name, str(value), "BIGINT")
+    if isinstance(value, float):
+        return SqlParam(name, repr(value), "DOUBLE")
+    if isinstance(value, Decimal):
+        return SqlParam(name, str(value), "DECIMAL(38,6)")
+    if isinstance(value, datetime):
+        return SqlParam(name, value.isoformat(), "TIMESTAMP")
+    if isinstance(value, date):
+        return SqlParam(name, value.isoformat(), "DATE")
+    return SqlParam(name, str(value), "STRING")
+
+
+def to_parameters(params: Optional[Mapping[str, Any]]) -> Optional[List[SqlParam]]:
+    """Convert a `{name: value}` mapping into `execute_statement` parameters."""
+    if not params:
+        return None
+    return [sql_param(k, v) for k, v in params.items()]
+
+
+def params_key(params: Optional[Mapping[str, Any]]) -> Tuple[Tuple[str, Any], ...]:
+    """Hashable, order-independent representation of a parameter mapping."""
+    if not params:
+        return ()
+    return tuple(sorted((k, v) for k, v in params.items()))
+
+
+class Where:
+    """AND-ed WHERE predicates with named parameters (`:case_type_0`, `:risk_min`, ...).
+
+    Parameter names depend only on the *shape* of the filter (which conditions,
+    how many IN values), never on the values, so the statement text is stable
+    across officers and filter values and the warehouse can reuse cached plans
+    and results.
+    """
+
+    def __init__(self) -> None:
+        self.clauses: List[str] = []
+        self.params: Dict[str, Any] = {}
+
+    def param(self, base: str, value: Any) -> str:
+        """Register a value under a unique name derived from `base`; returns `:name`."""
+        name = base
+        n = 1
+        while name in self.params:
+            name = f"{base}_{n}"
+            n += 1
+        self.params[name] = value
+        return f":{name}"
+
+    def add(self, clause: str) -> "Where":
+        self.clauses.append(clause)
+        return self
+
+    def eq(self, column: str, value: Any, name: Optional[str] = None) -> "Where":
+        return self.add(f"{column} = {self.param(name or column, value)}")
+
+    def gte(self, column: str, value: Any, name: Optional[str] = None) -> "Where":
+        return self.add(f"{column} >= {self.param(name or f'{column}_min', value)}")
+
+    def isin(self, column: str, values: Iterable[Any], name: Optional[str] = None) -> "Where":
+        vals = list(values)
+        if not vals:
+            return self
+        base = name or column
+        placeholders = ", ".join(self.param(f"{base}_{i}", v) for i, v in enumerate(vals))
+        return self.add(f"{column} IN ({placeholders})")
+
+    def sql(self) -> str:
+        return " AND ".join(self.clauses) if self.clauses else "1=1"
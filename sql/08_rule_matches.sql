@@ -0,0 +1,14 @@
+USE CATALOG qldrevenue;
+USE SCHEMA qro_fraud_detection;
+
+-- Materialised rule -> case matches over revenue_cases_gold_active.
+-- Maintained incrementally by qldrevenue.matchstore.RuleMatchStore:
+--   * when a rule is saved/edited, only that rule's pairs are merged
+--   * when cases change (Silver / case_management_state), only those cases' pairs are merged
+-- Opening a rule is then a lookup on rule_id instead of a Gold scan.
+CREATE TABLE IF NOT EXISTS rule_matches (
+  rule_id STRING NOT NULL,
+  case_id STRING NOT NULL,
+  matched_at TIMESTAMP
+) USING DELTA
+CLUSTER BY (rule_id);
@@ -0,0 +1,34 @@
+USE CATALOG qldrevenue;
+USE SCHEMA qro_fraud_detection;
+
+-- Pre-aggregated slices of revenue_cases_gold_active, one row per combination of
+-- (case_domain, case_type, status, severity, regional_office, financial_year).
+-- taxpayer_sketch is an HLL sketch of taxpayer_abn; union with hll_union_agg and
+-- read with hll_sketch_estimate for approximate distinct taxpayers.
+-- Maintained by qldrevenue.rollup.CaseRollup (refresh_cases after Gold changes).
+CREATE TABLE IF NOT EXISTS case_rollup (
+  case_domain STRING,
+  case_type STRING,
+  status STRING,
+  severity STRING,
+  regional_office STRING,
+  financial_year STRING,
+  case_count BIGINT,
+  total_exposure DECIMAL(38,2),
+  total_shortfall DECIMAL(38,2),
+  taxpayer_sketch BINARY,
+  refreshed_at TIMESTAMP
+) USING DELTA
+CLUSTER BY (case_type, case_domain, financial_year);
+
+-- Initial load (same as CaseRollup.rebuild)
+INSERT OVERWRITE case_rollup
+SELECT
+  case_domain, case_type, status, severity, regional_office, financial_year,
+  count(*) AS case_count,
+  COALESCE(SUM(total_exposure), 0) AS total_exposure,
+  COALESCE(SUM(COALESCE(tax_shortfall, 0)), 0) AS total_shortfall,
+  hll_sketch_agg(taxpayer_abn) AS taxpayer_sketch,
+  current_timestamp() AS refreshed_at
+FROM revenue_cases_gold_active
+GROUP BY case_domain, case_type, status, severity, regional_office, financial_year;
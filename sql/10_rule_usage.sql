@@ -0,0 +1,12 @@
+USE CATALOG qldrevenue;
+USE SCHEMA qro_fraud_detection;
+
+-- Rule-usage counter, maintained by qldrevenue.ruleusage.RuleUsageTracker.
+-- The app records rule usage in memory and folds it into officer_case_rules with one
+-- periodic MERGE of (rule_id, max(last_used_at), use_count) instead of an UPDATE per rerun.
+-- NOTE: If the column already exists, do NOT run the ALTER again.
+ALTER TABLE officer_case_rules ADD COLUMNS (use_count BIGINT);
+
+UPDATE officer_case_rules
+SET use_count = 0
+WHERE use_count IS NULL;
@@ -0,0 +1,14 @@
+USE CATALOG qldrevenue;
+USE SCHEMA qro_fraud_detection;
+
+-- Watermark for incremental Gold maintenance (qldrevenue.goldrefresh.GoldRefresher).
+-- One row per target table: the Silver Delta version and the latest
+-- case_management_state.updated_at already merged into it. Each refresh MERGEs only
+-- the case_ids changed since then; with no row the first refresh syncs every case.
+-- Run after 05; re-running 05 (full rebuild) is still safe, the next refresh re-syncs.
+CREATE TABLE IF NOT EXISTS gold_refresh_watermark (
+  target STRING NOT NULL,
+  silver_version BIGINT,
+  state_updated_at TIMESTAMP,
+  refreshed_at TIMESTAMP
+) USING DELTA;
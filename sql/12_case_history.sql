@@ -0,0 +1,35 @@
+USE CATALOG qldrevenue;
+USE SCHEMA qro_fraud_detection;
+
+-- Per-case change log, maintained by qldrevenue.history.CaseHistoryIndex.sync():
+--   * source = 'silver': one row per Silver change (from table_changes), with the
+--     tracked fields' new values and which of them changed
+--   * source = 'event':  one row per case_management_events row
+-- Clustered by case_id so the app's History / Activity tabs are point lookups
+-- instead of a table_changes(revenue_cases_silver, 0) scan per case.
+CREATE TABLE IF NOT EXISTS case_history (
+  case_id STRING NOT NULL,
+  source STRING NOT NULL,
+  commit_version BIGINT,
+  changed_at TIMESTAMP,
+  change_type STRING,
+  status STRING,
+  risk_score INT,
+  assigned_to STRING,
+  compliance_officer STRING,
+  changed_fields ARRAY<STRING>,
+  officer_email STRING,
+  note STRING,
+  event_id STRING
+) USING DELTA
+CLUSTER BY (case_id);
+
+-- Last Delta version of each source table already indexed.
+CREATE TABLE IF NOT EXISTS case_history_checkpoint (
+  source_table STRING NOT NULL,
+  version BIGINT,
+  updated_at TIMESTAMP
+) USING DELTA;
+
+-- The consumer reads the events table's change feed too.
+ALTER TABLE case_management_events SET TBLPROPERTIES ('delta.enableChangeDataFeed' = 'true');
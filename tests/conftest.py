@@ -1,7 +1,49 @@
 import sys
+from datetime import datetime
 from pathlib import Path
 
+import pandas as pd
+import pytest
+
 # Ensure repository root is on sys.path so `import qldrevenue` works with pytest's importlib mode.
 REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
+
+
+def _silver_row(case_id, **overrides):
+    row = {
+        "case_id": case_id,
+        "case_type": "Payroll Tax",
+        "case_domain": "Fraud",
+        "status": "Open",
+        "assigned_to": None,
+        "compliance_officer": None,
+        "tax_shortfall": 1000.0,
+        "total_exposure": 10000.0,
+        "risk_score": 40,
+        "taxpayer_abn": "11",
+        "taxpayer_postcode": "4000",
+        "tax_period_start": datetime(2024, 7, 1),
+        "created_at": datetime(2025, 2, 20, 9, 30),
+        "lodgement_due_date": datetime(2025, 2, 25),
+        "is_test_data": False,
+    }
+    row.update(overrides)
+    return row
+
+
+def _state_frame(rows):
+    return pd.DataFrame(rows, columns=["case_id", "status", "assigned_to", "compliance_officer", "updated_at"])
+
+
+@pytest.fixture
+def silver_row():
+    """Factory for one Silver row with Gold's inputs; keyword arguments override columns."""
+    return _silver_row
+
+
+@pytest.fixture
+def state_frame():
+    """Factory for `case_management_state` rows given as (case_id, status, assigned_to, compliance_officer, updated_at)."""
+    return _state_frame
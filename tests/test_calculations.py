@@ -1,4 +1,23 @@
-from qldrevenue.calculations import interest_amount, penalty_amount
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal, localcontext
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from qldrevenue.calculations import (
+    days_overdue,
+    infer_penalty_rate_pct,
+    interest_amount,
+    interest_cents,
+    penalty_amount,
+    penalty_cents,
+    recompute_exposure,
+    to_cents,
+    total_exposure_cents,
+)
+
+SILVER_SQL = Path(__file__).resolve().parents[1] / "sql" / "04_populate_silver.sql"
 
 
 def test_penalty_rates() -> None:
@@ -8,3 +27,100 @@ def test_penalty_rates() -> None:
 
 def test_interest_formula() -> None:
     assert interest_amount(1000.0, days_overdue=365, annual_rate=0.08) == 80.0
+
+
+def _spark(c: int, rate_pct: int, days: int):
+    """sql/04 formulas evaluated with Spark's DECIMAL result types and HALF_UP casts."""
+
+    def q(x, exp):
+        return x.quantize(Decimal(exp), rounding=ROUND_HALF_UP)
+
+    with localcontext() as ctx:
+        ctx.prec = 100
+        s = Decimal(c).scaleb(-2)
+        rate = Decimal(rate_pct).scaleb(-2)
+        years = q(Decimal(days) / Decimal("365.0"), "1e-6")  # DECIMAL(17,6)
+        interest = q(s * Decimal("0.08") * years, "1e-8")  # DECIMAL(38,8)
+        total = q(s + s * rate + interest, "1e-7")  # DECIMAL(38,7)
+        cents = lambda x: int(q(x, "0.01").scaleb(2))  # noqa: E731
+        return cents(s * rate), cents(interest), cents(total)
+
+
+def test_sql_formulas_are_the_ones_mirrored() -> None:
+    sql = " ".join(SILVER_SQL.read_text().split())
+    assert "* 0.08 * (greatest(datediff(current_date(), lodgement_due_date), 0) / 365.0) as decimal(18,2)" in sql
+    assert "THEN 0.75 ELSE 0.20 END as decimal(18,2)) as penalty_amount" in sql
+
+
+def test_vectorised_amounts_match_sql_decimal_semantics() -> None:
+    rng = np.random.default_rng(11)
+    c = np.concatenate(
+        [
+            rng.integers(-10**9, 10**11, 4000),
+            np.array([0, 1, 2, 5, 50, 99, 125, 250, 12345, 365, 73000, 182500, 10**15, -10**15]),
+        ]
+    )
+    days = np.concatenate([rng.integers(0, 4000, 4000), np.array([0, 1, 2, 183, 365, 730, 1, 1, 1, 1, 1, 1, 3650, 3650])])
+    fraud = np.arange(len(c)) % 3 == 0
+    rates = np.where(fraud, 75, 20)
+
+    pen = penalty_cents(c, fraud)
+    inte = interest_cents(c, days)
+    tot = total_exposure_cents(c, days, fraud)
+    expected = [_spark(int(a), int(r), int(d)) for a, r, d in zip(c, rates, days)]
+    assert pen.tolist() == [e[0] for e in expected]
+    assert inte.tolist() == [e[1] for e in expected]
+    assert tot.tolist() == [e[2] for e in expected]
+
+
+def test_half_up_boundaries() -> None:
+    # 0.125 -> 0.13 (penalty of 0.625 at 20%), negative halves round away from zero.
+    assert penalty_cents([-2, 3, 125], rate_pct=[75, 50, 20]).tolist() == [-2, 2, 25]
+    assert penalty_cents([1, -1], rate_pct=50).tolist() == [1, -1]
+    # 1 day on $1,000: 0.08 * 0.002740 * 1000 = 0.2192 -> 0.22
+    assert interest_cents([100000], [1]).tolist() == [22]
+
+
+def test_series_in_series_out_and_dates() -> None:
+    s = pd.Series([100000, 250], index=["a", "b"])
+    out = interest_cents(s, 365)
+    assert isinstance(out, pd.Series) and list(out.index) == ["a", "b"] and out.tolist() == [8000, 20]
+    due = pd.Series([pd.Timestamp("2025-01-01"), None, pd.Timestamp("2025-06-01")])
+    assert days_overdue(due, date(2025, 3, 1)).tolist() == [59, 0, 0]
+    assert to_cents(pd.Series([1.1, None, 12345.67])).tolist() == [110, 0, 1234567]
+
+
+def test_recompute_exposure_as_of() -> None:
+    frame = pd.DataFrame(
+        {
+            "tax_shortfall": [1000.00, 1000.00, 0.0],
+            "penalty_amount": [750.00, 200.00, 0.0],
+            "interest_amount": [0.0, 0.0, 0.0],
+            "total_exposure": [1750.0, 1200.0, 0.0],
+            "lodgement_due_date": pd.to_datetime(["2024-03-01", "2024-03-01", None]),
+        }
+    )
+    assert infer_penalty_rate_pct(to_cents(frame["tax_shortfall"]), to_cents(frame["penalty_amount"])).tolist() == [75, 20, 20]
+    out = recompute_exposure(frame, date(2025, 3, 1))  # 365 days overdue
+    assert out["interest_amount"].tolist() == [80.0, 80.0, 0.0]
+    assert out["total_exposure"].tolist() == [1830.0, 1280.0, 0.0]
+    assert frame["interest_amount"].tolist() == [0.0, 0.0, 0.0]
+
+    cents = frame.assign(**{c: to_cents(frame[c]) for c in ("tax_shortfall", "penalty_amount", "interest_amount", "total_exposure")})
+    assert recompute_exposure(cents, date(2025, 3, 1))["total_exposure"].tolist() == [183000, 128000, 0]
+
+
+def test_recompute_exposure_takes_the_rate_from_the_fraud_flag() -> None:
+    # The second penalty was edited after load to look like 75%; the flag still says standard rate.
+    frame = pd.DataFrame(
+        {
+            "tax_shortfall": [1000.00, 1000.00],
+            "penalty_amount": [200.00, 750.00],
+            "interest_amount": [0.0, 0.0],
+            "total_exposure": [0.0, 0.0],
+            "lodgement_due_date": pd.to_datetime(["2024-03-01", "2024-03-01"]),
+            "is_fraud_suspected": [True, None],
+        }
+    )
+    out = recompute_exposure(frame, date(2025, 3, 1))
+    assert out["total_exposure"].tolist() == [1830.0, 1280.0]
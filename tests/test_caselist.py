@@ -0,0 +1,151 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from qldrevenue.caselist import CASE_LIST_COLUMNS, CaseListPager, PageCursor
+from qldrevenue.sqlbuilder import Where
+
+
+class Handle:
+    def __init__(self, statement_id, frame):
+        self.statement_id = statement_id
+        self.frame = frame
+
+
+class SqliteExecutor:
+    """Runs statements on sqlite; `submit` executes eagerly and `gather` hands back frames."""
+
+    def __init__(self, con):
+        self.con = con
+        self.submitted = []
+        self.supersede_keys = []
+        self.cancelled = []
+
+    def fetch(self, statement, params=None):
+        return pd.read_sql_query(statement, self.con, params=params or {})
+
+    def submit(self, statement, params=None, supersede_key=None):
+        self.submitted.append(statement)
+        self.supersede_keys.append(supersede_key)
+        return Handle(f"s{len(self.submitted)}", self.fetch(statement, params))
+
+    def gather(self, handles):
+        return [h.frame for h in handles]
+
+    def cancel(self, statement_id):
+        self.cancelled.append(statement_id)
+
+
+def _gold(n=37):
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({c: [f"{c}-{i % 3}" for i in range(n)] for c in CASE_LIST_COLUMNS})
+    df["case_id"] = [f"C{i:03d}" for i in rng.permutation(n)]
+    df["allocation_priority"] = rng.integers(1, 3, n)  # many ties
+    df["risk_score"] = rng.choice([50.0, 70.0, np.nan], n)
+    df["tax_shortfall"] = 1.0
+    df["wide_payload"] = "x" * 100
+    return df
+
+
+def _pager(df, page_size=5):
+    con = sqlite3.connect(":memory:")
+    df.to_sql("gold", con)
+    ex = SqliteExecutor(con)
+    return CaseListPager(ex, table="gold", page_size=page_size), ex
+
+
+def _walk(pager, where=None):
+    pages, cursor = [], None
+    while True:
+        page = pager.fetch_page(where, cursor)
+        pages.append(page.frame)
+        if not page.has_more:
+            return pages
+        cursor = page.next_cursor
+
+
+def test_keyset_pages_cover_every_row_once_in_order() -> None:
+    df = _gold()
+    pager, _ = _pager(df)
+    pages = _walk(pager)
+
+    assert all(len(p) == 5 for p in pages[:-1]) and len(pages[-1]) == 2
+    got = [cid for p in pages for cid in p["case_id"]]
+    expected = (
+        df.assign(_risk=df["risk_score"].fillna(-1))
+        .sort_values(["allocation_priority", "_risk", "case_id"], ascending=[True, False, True])["case_id"]
+        .tolist()
+    )
+    assert got == expected
+
+
+def test_pages_are_projected_and_filtered() -> None:
+    df = _gold()
+    pager, _ = _pager(df)
+    where = Where().eq("case_type", "case_type-1")
+    pages = _walk(pager, where)
+    got = pd.concat(pages)
+    assert list(got.columns) == list(CASE_LIST_COLUMNS)
+    assert sorted(got["case_id"]) == sorted(df.loc[df["case_type"] == "case_type-1", "case_id"])
+    assert where.params == {"case_type": "case_type-1"}  # caller's Where untouched
+
+
+def test_prefetch_is_reused_and_replaced() -> None:
+    pager, ex = _pager(_gold())
+    first = pager.fetch_page()
+    pager.prefetch(None, first.next_cursor)
+    pager.prefetch(None, first.next_cursor)
+    assert len(ex.submitted) == 2
+
+    second = pager.fetch_page(None, first.next_cursor)
+    assert len(ex.submitted) == 2  # served by the prefetched statement
+    assert second.frame["case_id"].iloc[0] not in set(first.frame["case_id"])
+
+    pager.prefetch(None, second.next_cursor)
+    pager.prefetch(None, first.next_cursor)
+    assert ex.cancelled == ["s3"]
+
+
+def test_prefetch_is_not_resubmitted_on_rerun_after_it_was_consumed() -> None:
+    pager, ex = _pager(_gold())
+    first = pager.fetch_page()
+    pager.prefetch(None, first.next_cursor, supersede_key="s:prefetch")
+    pager.fetch_page(None, first.next_cursor)
+    # Reruns on the same page (same filter and cursor) leave the warehouse alone.
+    pager.prefetch(None, first.next_cursor, supersede_key="s:prefetch")
+    pager.prefetch(None, first.next_cursor, supersede_key="s:prefetch")
+    assert len(ex.submitted) == 2
+    assert ex.supersede_keys == [None, "s:prefetch"]
+
+    pager.prefetch(Where().eq("case_type", "case_type-1"), first.next_cursor, supersede_key="s:prefetch")
+    assert len(ex.submitted) == 3
+
+
+def test_fetch_case_returns_full_row() -> None:
+    df = _gold()
+    pager, _ = _pager(df)
+    row = pager.fetch_case(df["case_id"].iloc[3])
+    assert row["wide_payload"] == "x" * 100
+    assert pager.fetch_case("missing") is None
+
+
+def test_cursor_from_row_maps_null_risk() -> None:
+    c = PageCursor.from_row({"allocation_priority": np.int64(2), "risk_score": np.nan, "case_id": "C1"})
+    assert c == PageCursor(2, -1, "C1")
+
+
+def test_local_page_matches_sql_pages() -> None:
+    from qldrevenue.caselist import local_page
+
+    df = _gold()
+    pager, _ = _pager(df, page_size=4)
+    cursor = None
+    while True:
+        remote = pager.fetch_page(None, cursor)
+        local = local_page(df, cursor, page_size=4)
+        assert local.frame["case_id"].tolist() == remote.frame["case_id"].tolist()
+        assert local.next_cursor == remote.next_cursor
+        if not remote.has_more:
+            break
+        cursor = remote.next_cursor
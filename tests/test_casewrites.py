@@ -0,0 +1,67 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from qldrevenue.casewrites import CaseWriter, add_note, assign, coalesce_state, set_status, unassign
+
+
+class RecordingExecutor:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.executed = []
+
+    def exec(self, statement, params=None):
+        if self.fail_on and self.fail_on in statement:
+            raise RuntimeError("warehouse unavailable")
+        self.executed.append((statement, params))
+
+
+def test_two_statements_for_many_cases() -> None:
+    ex = RecordingExecutor()
+    actions = [assign(f"C{i}", "me@x", "me@x") for i in range(200)]
+    assert CaseWriter(ex, state_table="state", events_table="events").apply(actions) == 200
+
+    assert len(ex.executed) == 2
+    (merge, merge_params), (insert, insert_params) = ex.executed
+    assert "MERGE INTO state" in merge and "inline(from_json(:state_rows" in merge
+    assert "INSERT INTO events" in insert and "inline(from_json(:events" in insert
+    assert len(json.loads(merge_params["state_rows"])) == 200
+    events = json.loads(insert_params["events"])
+    assert len(events) == 200 and len({e["event_id"] for e in events}) == 200
+    assert events[0]["event_type"] == "ASSIGN" and events[0]["assigned_to"] == "me@x"
+
+
+def test_state_rows_coalesce_per_case_in_order() -> None:
+    actions = [
+        assign("C1", "me@x", "me@x"),
+        set_status("C1", "me@x", "Investigation"),
+        unassign("C1", "me@x"),
+        add_note("C2", "me@x", "called taxpayer"),
+        set_status("C3", "me@x", "Open"),
+    ]
+    assert coalesce_state(actions) == [
+        {"case_id": "C1", "status": "Investigation", "assigned_to": "", "compliance_officer": None},
+        {"case_id": "C3", "status": "Open", "assigned_to": None, "compliance_officer": None},
+    ]
+
+
+def test_notes_only_skip_the_merge() -> None:
+    ex = RecordingExecutor()
+    CaseWriter(ex).apply([add_note("C1", "me@x", "n")])
+    assert len(ex.executed) == 1 and ex.executed[0][0].strip().startswith("INSERT INTO")
+    assert CaseWriter(ex).apply([]) == 0 and len(ex.executed) == 1
+
+
+def test_failed_state_merge_writes_no_events() -> None:
+    ex = RecordingExecutor(fail_on="MERGE INTO")
+    with pytest.raises(RuntimeError):
+        CaseWriter(ex).apply([set_status("C1", "me@x", "Closed")])
+    assert ex.executed == []
+
+
+def test_event_row_shape() -> None:
+    a = set_status("C1", "me@x", "Closed")
+    a = a.__class__(**{**a.__dict__, "created_at": datetime(2025, 1, 2, 3, 4, 5)})
+    row = a.event_row()
+    assert row["new_status"] == "Closed" and row["created_at"] == "2025-01-02 03:04:05"
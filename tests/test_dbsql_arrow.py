@@ -0,0 +1,139 @@
+import threading
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.ipc  # noqa: E402
+
+from qldrevenue.dbsql import arrow_table_from_statement_response, dataframe_from_arrow  # noqa: E402
+
+
+def _ipc_bytes(table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _chunk_table(start: int, n: int):
+    return pa.table(
+        {
+            "case_id": pa.array([f"CASE-{i:05d}" for i in range(start, start + n)]),
+            "case_type": pa.array(["Payroll Tax" if i % 2 else "Land Tax" for i in range(start, start + n)]),
+            "tax_shortfall": pa.array([Decimal(f"{i}.25") for i in range(start, start + n)], type=pa.decimal128(18, 2)),
+            "tax_period_start": pa.array([date(2023, 7, 1)] * n, type=pa.date32()),
+            "created_at": pa.array(
+                [datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)] * n, type=pa.timestamp("us", tz="UTC")
+            ),
+        }
+    )
+
+
+@pytest.fixture()
+def arrow_server():
+    """Local stand-in for cloud storage serving one Arrow IPC stream per path."""
+    payloads = {f"/chunk-{i}": _ipc_bytes(_chunk_table(i * 20, 20)) for i in range(3)}
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            body = payloads.get(self.path)
+            seen.append((self.path, self.headers.get("Authorization")))
+            if body is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.apache.arrow.stream")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", seen
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class Link:
+    def __init__(self, url: str, chunk_index: int, next_chunk_index=None):
+        self.external_link = url
+        self.chunk_index = chunk_index
+        self.next_chunk_index = next_chunk_index
+        self.http_headers = None
+
+
+class LinkResult:
+    def __init__(self, links, next_chunk_index=None):
+        self.external_links = links
+        self.next_chunk_index = next_chunk_index
+
+
+class FakeStatementExecution:
+    def __init__(self, results):
+        self.results = results
+
+    def get_statement_result_chunk_n(self, statement_id, chunk_index):
+        return self.results[chunk_index]
+
+
+class FakeClient:
+    def __init__(self, results):
+        self.statement_execution = FakeStatementExecution(results)
+
+
+class Resp:
+    def __init__(self, result):
+        self.statement_id = "stmt-arrow"
+        self.manifest = None
+        self.result = result
+
+
+def test_arrow_table_downloads_all_chunks_in_order(arrow_server) -> None:
+    base, seen = arrow_server
+    # First response carries chunks 0 and 1; chunk 2 is fetched via get_statement_result_chunk_n.
+    first = LinkResult([Link(f"{base}/chunk-1", 1, 2), Link(f"{base}/chunk-0", 0, 1)], next_chunk_index=2)
+    results = {2: LinkResult([Link(f"{base}/chunk-2", 2)])}
+    table = arrow_table_from_statement_response(FakeClient(results), Resp(first), max_workers=2)
+
+    assert table.num_rows == 60
+    assert table.column("case_id")[0].as_py() == "CASE-00000"
+    assert table.column("case_id")[59].as_py() == "CASE-00059"
+    assert sorted(path for path, _ in seen) == ["/chunk-0", "/chunk-1", "/chunk-2"]
+    assert all(auth is None for _, auth in seen)
+
+
+def test_dataframe_from_arrow_matches_json_dtypes() -> None:
+    df = dataframe_from_arrow(_chunk_table(0, 40))
+    assert df["tax_shortfall"].dtype == "float64"
+    assert df["tax_shortfall"].iloc[1] == 1.25
+    assert str(df["tax_period_start"].dtype).startswith("datetime64")
+    assert df["created_at"].iloc[0] == pd.Timestamp("2024-01-02 03:04:05")
+    assert isinstance(df["case_type"].dtype, pd.CategoricalDtype)
+
+    cents = dataframe_from_arrow(_chunk_table(0, 3), decimal_as_cents=True)
+    assert cents["tax_shortfall"].tolist() == [25, 125, 225]
+    assert cents["tax_shortfall"].dtype == "int64"
+
+
+def test_dataframe_from_arrow_cents_are_exact_and_ints_stay_ints() -> None:
+    table = pa.table(
+        {
+            "amount": pa.array([Decimal("90071992547409.93"), None, Decimal("-0.05")], type=pa.decimal128(38, 2)),
+            "risk_score": pa.array([1, None, 3], type=pa.int32()),
+        }
+    )
+    df = dataframe_from_arrow(table, decimal_as_cents=True)
+    assert df["amount"].dtype == "Int64" and df["amount"].tolist()[::2] == [9007199254740993, -5]
+    assert df["risk_score"].dtype == "Int64" and df["risk_score"].tolist()[::2] == [1, 3]
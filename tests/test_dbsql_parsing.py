@@ -1,11 +1,13 @@
 import pandas as pd
 
-from qldrevenue.dbsql import dataframe_from_statement_response
+from qldrevenue.dbsql import collect_statement_result, dataframe_from_statement_response, decode_column, iter_statement_frames
 
 
 class Col:
-    def __init__(self, name: str):
+    def __init__(self, name: str, type_name=None, type_scale=None):
         self.name = name
+        self.type_name = type_name
+        self.type_scale = type_scale
 
 
 class Schema:
@@ -46,3 +48,124 @@ def test_dataframe_from_statement_response_old_shape() -> None:
     df = dataframe_from_statement_response(RespOld())
     assert list(df.columns) == ["c"]
     assert df.to_dict("records") == [{"c": "x"}]
+
+
+class RespTyped:
+    def __init__(self, rows):
+        self.manifest = Manifest(
+            Schema(
+                [
+                    Col("case_id", "STRING"),
+                    Col("risk_score", "INT"),
+                    Col("tax_shortfall", "DECIMAL", 2),
+                    Col("tax_period_start", "DATE"),
+                    Col("created_at", "TIMESTAMP"),
+                    Col("sla_breached", "BOOLEAN"),
+                    Col("case_type", "STRING"),
+                ]
+            )
+        )
+        self.result = Result(rows)
+
+
+def _typed_rows(n: int):
+    return [
+        [
+            f"CASE-{i:05d}",
+            str(50 + i % 40),
+            f"{1000 + i}.25",
+            "2023-07-01",
+            "2024-01-02T03:04:05.000Z",
+            "true" if i % 2 else "false",
+            "Payroll Tax" if i % 3 else "Land Tax",
+        ]
+        for i in range(n)
+    ]
+
+
+def test_dataframe_from_statement_response_decodes_types() -> None:
+    df = dataframe_from_statement_response(RespTyped(_typed_rows(40)))
+    assert df["risk_score"].dtype == "int64"
+    assert df["tax_shortfall"].dtype == "float64"
+    assert df["tax_shortfall"].iloc[0] == 1000.25
+    assert str(df["tax_period_start"].dtype) == "datetime64[ns]"
+    assert df["created_at"].iloc[0] == pd.Timestamp("2024-01-02 03:04:05")
+    assert df["sla_breached"].dtype == bool
+    assert isinstance(df["case_type"].dtype, pd.CategoricalDtype)
+    assert df["case_id"].dtype == object
+
+
+def test_dataframe_from_statement_response_decimal_cents_and_nulls() -> None:
+    rows = _typed_rows(3)
+    rows[1][1] = None
+    rows[1][2] = None
+    rows[1][5] = None
+    df = dataframe_from_statement_response(RespTyped(rows), decimal_as_cents=True)
+    assert df["tax_shortfall"].tolist()[0] == 100025
+    assert df["tax_shortfall"].isna().tolist() == [False, True, False]
+    assert df["risk_score"].dtype == "Int64" and df["risk_score"].tolist()[0] == 50
+    assert df["sla_breached"].tolist() == [False, None, False]
+    # Too few rows to be worth a categorical.
+    assert df["case_type"].dtype == object
+
+
+class ChunkResult:
+    def __init__(self, data_array, next_chunk_index=None):
+        self.data_array = data_array
+        self.next_chunk_index = next_chunk_index
+
+
+class FakeStatementExecution:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.requested = []
+
+    def get_statement_result_chunk_n(self, statement_id, chunk_index):
+        self.requested.append((statement_id, chunk_index))
+        return self.chunks[chunk_index]
+
+
+class FakeClient:
+    def __init__(self, chunks):
+        self.statement_execution = FakeStatementExecution(chunks)
+
+
+def _chunked_response(n_chunks: int, rows_per_chunk: int):
+    rows = _typed_rows(n_chunks * rows_per_chunk)
+    chunks = [
+        ChunkResult(
+            rows[i * rows_per_chunk : (i + 1) * rows_per_chunk],
+            next_chunk_index=(i + 1) if i + 1 < n_chunks else None,
+        )
+        for i in range(n_chunks)
+    ]
+    resp = RespTyped([])
+    resp.statement_id = "stmt-1"
+    resp.result = chunks[0]
+    return FakeClient(chunks), resp
+
+
+def test_iter_statement_frames_follows_next_chunk_index() -> None:
+    w, resp = _chunked_response(3, 20)
+    frames = list(iter_statement_frames(w, resp))
+    assert [len(f) for f in frames] == [20, 20, 20]
+    assert w.statement_execution.requested == [("stmt-1", 1), ("stmt-1", 2)]
+    assert frames[2]["case_id"].iloc[0] == "CASE-00040"
+
+
+def test_collect_statement_result_concatenates_and_categorizes() -> None:
+    w, resp = _chunked_response(3, 20)
+    df = collect_statement_result(w, resp)
+    assert len(df) == 60
+    assert df["risk_score"].dtype == "int64"
+    assert isinstance(df["case_type"].dtype, pd.CategoricalDtype)
+
+
+
+def test_decimal_cents_are_exact_beyond_float_precision() -> None:
+    values = ["90071992547409.93", "-0.05", "12", "1.005", None, "7.1"]
+    out = decode_column(values, "DECIMAL", type_scale=2, decimal_as_cents=True)
+    assert out.dtype == "Int64"
+    assert out.tolist()[:4] == [9007199254740993, -5, 1200, 101] and out.isna().tolist()[4]
+    assert decode_column(["1.5E+2"], "DECIMAL", decimal_as_cents=True).tolist() == [15000]
+    assert decode_column(["9007199254740993", None], "LONG").tolist()[0] == 9007199254740993
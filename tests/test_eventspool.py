@@ -0,0 +1,164 @@
+import json
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from qldrevenue.casewrites import CaseWriter, add_note, assign
+from qldrevenue.eventspool import EventSpool, default_spool_path, get_event_spool
+
+
+class EventsTable:
+    """Applies the spool's MERGE semantics (insert unseen event_ids) to a list."""
+
+    def __init__(self, fail_times=0, reject_note=None):
+        self.rows = {}
+        self.statements = 0
+        self.fail_times = fail_times
+        self.reject_note = reject_note
+        self.lock = threading.Lock()
+
+    def fetch(self, statement, params=None):
+        if self.fail_times:
+            raise RuntimeError("warehouse unavailable")
+        return None
+
+    def exec(self, statement, params=None):
+        with self.lock:
+            if self.fail_times:
+                self.fail_times -= 1
+                raise RuntimeError("warehouse unavailable")
+            assert "MERGE INTO events" in statement and "ON t.event_id = s.event_id" in statement
+            rows = json.loads(params["events"])
+            if any(r["note"] == self.reject_note for r in rows):
+                raise ValueError("CAST_INVALID_INPUT")
+            self.statements += 1
+            for row in rows:
+                self.rows.setdefault(row["event_id"], row)
+
+
+def _rows(n, start=0):
+    return [add_note(f"C{i}", "me@x", f"note {i}").event_row() for i in range(start, start + n)]
+
+
+def test_append_is_durable_and_flush_batches(tmp_path) -> None:
+    table = EventsTable()
+    path = str(tmp_path / "spool.sqlite")
+    spool = EventSpool(table, path, events_table="events", batch_size=100)
+    spool.append(_rows(250))
+    assert spool.pending() == 250 and table.statements == 0
+
+    # A fresh process sees the same queue.
+    assert EventSpool(table, path, events_table="events").pending() == 250
+
+    assert spool.flush() == 250
+    assert table.statements == 3 and len(table.rows) == 250
+    assert spool.pending() == 0
+
+
+def test_failed_flush_keeps_rows_and_replay_is_idempotent(tmp_path) -> None:
+    table = EventsTable(fail_times=1)
+    spool = EventSpool(table, str(tmp_path / "s.sqlite"), events_table="events")
+    rows = _rows(5)
+    spool.append(rows)
+    with pytest.raises(RuntimeError):
+        spool.flush()
+    assert spool.pending() == 5
+
+    spool.append(rows)  # same event_ids queued again: ignored
+    assert spool.pending() == 5
+    spool.flush()
+    # Delivered again after a crash between MERGE and dequeue: no duplicates.
+    spool.append(rows)
+    spool.flush()
+    assert len(table.rows) == 5 and spool.pending() == 0
+
+
+def test_background_flush_on_size(tmp_path) -> None:
+    table = EventsTable()
+    flushed = []
+    spool = EventSpool(
+        table, str(tmp_path / "s.sqlite"), events_table="events",
+        batch_size=10, flush_interval_s=60, on_flush=flushed.append,
+    ).start()
+    try:
+        spool.append(_rows(10))
+        deadline = time.time() + 5
+        while spool.pending() and time.time() < deadline:
+            time.sleep(0.01)
+        assert spool.pending() == 0 and len(table.rows) == 10
+    finally:
+        spool.close()
+    assert sum(flushed) == 10
+
+
+def test_writer_spools_events_and_merges_state(tmp_path) -> None:
+    submitted = []
+
+    class Executor:
+        def exec(self, statement, params=None):
+            submitted.append(statement)
+
+    spool = EventSpool(EventsTable(), str(tmp_path / "s.sqlite"), events_table="events")
+    writer = CaseWriter(Executor(), state_table="state", spool=spool)
+    assert writer.apply([assign("C1", "me@x", "me@x"), add_note("C1", "me@x", "n")]) == 2
+    assert len(submitted) == 1 and "MERGE INTO state" in submitted[0]
+    assert spool.pending() == 2
+
+    assert writer.apply([add_note("C2", "me@x", "n")]) == 1
+    assert len(submitted) == 1 and spool.pending() == 3
+
+
+def test_get_event_spool_is_shared(tmp_path) -> None:
+    path = str(tmp_path / "shared.sqlite")
+    a = get_event_spool(EventsTable(), path, flush_interval_s=60)
+    try:
+        assert get_event_spool(EventsTable(), path) is a
+        with sqlite3.connect(path) as con:
+            assert con.execute("SELECT count(*) FROM spool").fetchone()[0] == 0
+    finally:
+        a.stop()
+
+
+def test_poisoned_batch_is_dead_lettered_after_max_attempts(tmp_path) -> None:
+    table = EventsTable(reject_note="note 2")
+    spool = EventSpool(table, str(tmp_path / "s.sqlite"), events_table="events", max_attempts=2)
+    spool.append(_rows(4))
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            spool.flush()
+    status = spool.status()
+    assert status.pending == 4 and status.dead_letters == 0 and status.lag_s >= 0
+
+    # Third flush: rows retried one by one, the bad one set aside, the rest delivered.
+    assert spool.flush() == 3
+    assert sorted(r["note"] for r in table.rows.values()) == ["note 0", "note 1", "note 3"]
+    status = spool.status()
+    assert (status.pending, status.dead_letters) == (0, 1)
+    (dead,) = spool.dead_letters()
+    assert dead["note"] == "note 2" and "CAST_INVALID_INPUT" in dead["_error"]
+
+    table.reject_note = None  # cause fixed
+    assert spool.requeue_dead_letters() == 1
+    assert spool.flush() == 1 and len(table.rows) == 4 and spool.status().dead_letters == 0
+
+
+def test_outage_does_not_count_towards_dead_lettering(tmp_path) -> None:
+    table = EventsTable(fail_times=10)
+    spool = EventSpool(table, str(tmp_path / "s.sqlite"), events_table="events", max_attempts=1)
+    spool.append(_rows(2))
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            spool.flush()
+    assert spool.status().dead_letters == 0
+    table.fail_times = 0
+    assert spool.flush() == 2
+
+
+def test_default_spool_path_is_required(monkeypatch) -> None:
+    monkeypatch.delenv("QRO_EVENT_SPOOL", raising=False)
+    with pytest.raises(RuntimeError, match="QRO_EVENT_SPOOL"):
+        default_spool_path()
+    monkeypatch.setenv("QRO_EVENT_SPOOL", "/data/spool.sqlite")
+    assert default_spool_path() == "/data/spool.sqlite"
@@ -0,0 +1,215 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from qldrevenue.executor import SqlExecutor, StatementCancelled, get_executor
+
+
+class Obj:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _resp(statement_id, state, rows=None, error=None):
+    return Obj(
+        statement_id=statement_id,
+        status=Obj(state=state, error=Obj(message=error) if error else None),
+        manifest=Obj(schema=Obj(columns=[Obj(name="n", type_name="INT")])),
+        result=Obj(data_array=rows or [], next_chunk_index=None),
+    )
+
+
+class FakeStatementExecution:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executed = []
+        self.cancelled = []
+        self.polls = {}
+
+    def execute_statement(self, warehouse_id, statement, wait_timeout, **kwargs):
+        with self.lock:
+            self.executed.append((warehouse_id, statement, kwargs))
+            n = len(self.executed)
+        if "FAIL" in statement:
+            return _resp(f"s{n}", "FAILED", error="boom")
+        if "SLOW" in statement:
+            return _resp(f"s{n}", "RUNNING")
+        return _resp(f"s{n}", "SUCCEEDED", rows=[[str(n)]])
+
+    def get_statement(self, statement_id):
+        self.polls[statement_id] = self.polls.get(statement_id, 0) + 1
+        return _resp(statement_id, "SUCCEEDED", rows=[["42"]])
+
+    def cancel_execution(self, statement_id):
+        self.cancelled.append(statement_id)
+
+
+class FakeClient:
+    def __init__(self):
+        self.statement_execution = FakeStatementExecution()
+
+
+def _executor():
+    created = []
+
+    def factory():
+        created.append(FakeClient())
+        return created[-1]
+
+    return SqlExecutor("wh-1", client_factory=factory), created
+
+
+def test_client_is_created_once_across_threads() -> None:
+    ex, created = _executor()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        frames = list(pool.map(lambda i: ex.fetch(f"SELECT {i}"), range(32)))
+    assert len(created) == 1
+    assert len(created[0].statement_execution.executed) == 32
+    assert all(f["n"].dtype == "int64" for f in frames)
+
+
+def test_fetch_waits_for_running_statement() -> None:
+    ex, created = _executor()
+    df = ex.fetch("SELECT SLOW")
+    assert df["n"].tolist() == [42]
+    assert created[0].statement_execution.polls == {"s1": 1}
+
+
+def test_exec_raises_on_failure_and_cancel_is_forwarded() -> None:
+    ex, created = _executor()
+    with pytest.raises(RuntimeError, match="boom"):
+        ex.exec("UPDATE FAIL")
+    ex.cancel("s9")
+    assert created[0].statement_execution.cancelled == ["s9"]
+
+
+def test_get_executor_is_process_wide() -> None:
+    assert get_executor("wh-a") is get_executor("wh-a")
+    assert get_executor("wh-a") is not get_executor("wh-b")
+
+
+class AsyncStatementExecution(FakeStatementExecution):
+    """Statements finish after a fixed number of polls, independently of each other."""
+
+    def __init__(self, polls_needed):
+        super().__init__()
+        self.polls_needed = polls_needed
+
+    def execute_statement(self, warehouse_id, statement, wait_timeout, **kwargs):
+        assert wait_timeout == "0s"
+        self.executed.append(statement)
+        return _resp(statement, "PENDING")
+
+    def get_statement(self, statement_id):
+        self.polls[statement_id] = self.polls.get(statement_id, 0) + 1
+        if "FAIL" in statement_id:
+            return _resp(statement_id, "FAILED", error="bad")
+        if self.polls[statement_id] < self.polls_needed[statement_id]:
+            return _resp(statement_id, "RUNNING")
+        return _resp(statement_id, "SUCCEEDED", rows=[[str(self.polls[statement_id])]])
+
+
+def test_submit_and_gather_polls_statements_together(monkeypatch) -> None:
+    sleeps = []
+    monkeypatch.setattr("qldrevenue.executor.time.sleep", sleeps.append)
+    client = FakeClient()
+    client.statement_execution = AsyncStatementExecution({"a": 1, "b": 4, "c": 2})
+    ex = SqlExecutor("wh-1", client_factory=lambda: client)
+
+    handles = [ex.submit("a"), ex.submit("b"), ex.submit("c", kind="exec")]
+    a, b, c = ex.gather(handles)
+
+    assert a["n"].tolist() == [1]
+    assert b["n"].tolist() == [4]
+    assert c is None
+    # One shared schedule: 3 sleeps for the slowest statement, growing delays.
+    assert len(sleeps) == 3
+    assert sleeps == sorted(sleeps) and sleeps[0] < sleeps[-1]
+    assert client.statement_execution.polls == {"a": 1, "b": 4, "c": 2}
+
+
+def test_gather_return_exceptions(monkeypatch) -> None:
+    monkeypatch.setattr("qldrevenue.executor.time.sleep", lambda s: None)
+    client = FakeClient()
+    client.statement_execution = AsyncStatementExecution({"ok": 1, "FAIL": 1})
+    ex = SqlExecutor("wh-1", client_factory=lambda: client)
+
+    ok, err = ex.gather([ex.submit("ok"), ex.submit("FAIL")], return_exceptions=True)
+    assert ok["n"].tolist() == [1]
+    assert isinstance(err, RuntimeError)
+    with pytest.raises(RuntimeError, match="bad"):
+        ex.gather([ex.submit("FAIL")])
+
+
+def test_supersede_key_cancels_previous_statement(monkeypatch) -> None:
+    monkeypatch.setattr("qldrevenue.executor.time.sleep", lambda s: None)
+    client = FakeClient()
+    client.statement_execution = AsyncStatementExecution({"q1": 1, "q2": 1, "w": 1})
+    ex = SqlExecutor("wh-1", client_factory=lambda: client)
+
+    ex.submit("q1", supersede_key="session-1:gold")
+    ex.submit("w", kind="exec")
+    h2 = ex.submit("q2", supersede_key="session-1:gold")
+    assert client.statement_execution.cancelled == ["q1"]
+    assert ex.inflight() == {"session-1:gold": "q2"}
+
+    ex.gather([h2])
+    assert ex.inflight() == {}
+
+
+def test_latency_budget_cancels_pending_statements(monkeypatch) -> None:
+    monkeypatch.setattr("qldrevenue.executor.time.sleep", lambda s: None)
+    client = FakeClient()
+    client.statement_execution = AsyncStatementExecution({"fast": 1, "slow": 10**9})
+    ex = SqlExecutor("wh-1", client_factory=lambda: client)
+
+    with pytest.raises(TimeoutError):
+        ex.gather([ex.submit("fast"), ex.submit("slow", supersede_key="s:gold")], timeout_s=0)
+    assert client.statement_execution.cancelled == ["slow"]
+    assert ex.inflight() == {}
+
+
+class RerunRequested(BaseException):
+    """Stands in for Streamlit's rerun exception, raised where the script yields."""
+
+
+def test_queued_rerun_ends_the_wait_and_cancels_statements(monkeypatch) -> None:
+    monkeypatch.setattr("qldrevenue.executor.time.sleep", lambda s: None)
+    client = FakeClient()
+    client.statement_execution = AsyncStatementExecution({"page": 1, "kpis": 10**9})
+    ex = SqlExecutor("wh-1", client_factory=lambda: client)
+    rounds = []
+
+    def yield_to_rerun():
+        # The user types in Search during the second poll round.
+        rounds.append(1)
+        if len(rounds) == 2:
+            raise RerunRequested()
+        return False
+
+    handles = [ex.submit("page", supersede_key="s:gold"), ex.submit("kpis", supersede_key="s:kpis")]
+    with pytest.raises(RerunRequested):
+        ex.gather(handles, timeout_s=60, return_exceptions=True, should_abort=yield_to_rerun)
+    assert client.statement_execution.cancelled == ["kpis"]
+    assert client.statement_execution.polls["kpis"] == 2
+    assert ex.inflight() == {}
+
+
+def test_should_abort_cancels_with_statement_cancelled(monkeypatch) -> None:
+    monkeypatch.setattr("qldrevenue.executor.time.sleep", lambda s: None)
+    client = FakeClient()
+    client.statement_execution = AsyncStatementExecution({"slow": 10**9})
+    ex = SqlExecutor("wh-1", client_factory=lambda: client)
+
+    with pytest.raises(StatementCancelled):
+        ex.gather([ex.submit("slow")], should_abort=lambda: True)
+    assert client.statement_execution.cancelled == ["slow"]
+
+
+def test_params_are_sent_as_statement_parameters() -> None:
+    ex, created = _executor()
+    ex.fetch("SELECT * FROM t WHERE case_id = :case_id", {"case_id": "CASE-1"})
+    _, statement, kwargs = created[0].statement_execution.executed[0]
+    assert ":case_id" in statement and "CASE-1" not in statement
+    assert [p.as_dict() for p in kwargs["parameters"]] == [{"name": "case_id", "value": "CASE-1", "type": "STRING"}]
@@ -1,6 +1,6 @@
 from datetime import date
 
-from qldrevenue.formatting import financial_year_for_period, format_abn
+from qldrevenue.formatting import as_float, financial_year_for_period, format_abn
 
 
 def test_format_abn_spaces() -> None:
@@ -16,3 +16,10 @@ def test_financial_year_label() -> None:
     assert financial_year_for_period(date(2023, 7, 1)) == "2023-24"
     assert financial_year_for_period(date(2024, 6, 30)) == "2023-24"
     assert financial_year_for_period(date(2024, 7, 1)) == "2024-25"
+
+
+def test_as_float_defaults() -> None:
+    assert as_float("12.50") == 12.5
+    assert as_float(None) == 0.0
+    assert as_float(float("nan")) == 0.0
+    assert as_float("n/a", default=-1.0) == -1.0
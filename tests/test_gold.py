@@ -0,0 +1,148 @@
+import random
+import re
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from qldrevenue.gold import ACTIVE_STATUSES, ALLOCATION_PRIORITY, DERIVED_COLUMNS, SLA_DAYS, derive_columns, derive_gold
+
+GOLD_SQL = Path(__file__).resolve().parents[1] / "sql" / "05_create_gold.sql"
+AS_OF = date(2025, 3, 1)
+
+
+def _sql_row(row, as_of):
+    """sql/05_create_gold.sql's CASE expressions for one row, transcribed literally."""
+
+    def days(value):
+        return None if value is None else (as_of - value.date()).days
+
+    exposure, risk, status = row["total_exposure"], row["risk_score"], row["status"]
+    gt = lambda v, n: v is not None and v > n  # noqa: E731 - NULL > n is not true
+    if gt(exposure, 500000) and gt(risk, 85):
+        severity = "Critical"
+    elif gt(exposure, 200000) and gt(risk, 70):
+        severity = "High"
+    elif gt(exposure, 50000) or gt(risk, 50):
+        severity = "Medium"
+    else:
+        severity = "Low"
+    age = days(row["created_at"])
+    overdue = days(row["lodgement_due_date"])
+    sla = (
+        (status == "Open" and gt(age, 5))
+        or (status == "Under Review" and gt(age, 14))
+        or (status == "Investigation" and gt(age, 30))
+        or (status == "Compliance Action" and gt(age, 60))
+    )
+    start = row["tax_period_start"]
+    if start is None:
+        fy = None
+    elif start.month >= 7:
+        fy = f"{start.year}-{str((start.year + 1) % 100).rjust(2, '0')}"
+    else:
+        fy = f"{start.year - 1}-{str(start.year % 100).rjust(2, '0')}"
+    pc = row["taxpayer_postcode"] or ""
+    office = (
+        "Brisbane" if pc.startswith("400") or pc.startswith("41")
+        else "Gold Coast" if pc.startswith("42")
+        else "Far North Queensland" if pc.startswith("48")
+        else "Regional"
+    )
+    return {
+        "severity": severity,
+        "age_days": age,
+        "business_days_age": None if age is None else age - (age // 7) * 2,
+        "days_overdue": max(overdue, 0) if overdue is not None else 0,
+        "sla_breached": sla,
+        "financial_year": fy,
+        "regional_office": office,
+        "allocation_priority": {"Critical": 1, "High": 2, "Medium": 3}.get(severity, 4),
+    }
+
+
+def test_sql_constants_are_the_ones_mirrored() -> None:
+    sql = " ".join(GOLD_SQL.read_text().split())
+    sla = dict(re.findall(r"COALESCE\(state\.status, s\.status\) = '([^']+)' AND datediff\([^>]+> (\d+) THEN true", sql))
+    assert {k: int(v) for k, v in sla.items()} == SLA_DAYS
+    active = re.search(r"WHERE COALESCE\(state\.status, s\.status\) IN \(([^)]*)\)", sql).group(1)
+    assert tuple(re.findall(r"'([^']+)'", active)) == ACTIVE_STATUSES
+    priority = dict(re.findall(r"WHEN severity = '(\w+)' THEN (\d)", sql))
+    assert {k: int(v) for k, v in priority.items()} == {k: v for k, v in ALLOCATION_PRIORITY.items() if k != "Low"}
+    assert "> 500000 AND s.risk_score > 85" in sql and "> 200000 AND s.risk_score > 70" in sql
+    assert "> 50000 OR s.risk_score > 50" in sql
+
+
+def test_derive_gold_matches_gold_sql_rules(silver_row, state_frame) -> None:
+    silver = pd.DataFrame(
+        [
+            silver_row("A", total_exposure=600000.0, risk_score=90),
+            silver_row("B", total_exposure=250000.0, risk_score=75, taxpayer_postcode="4217"),
+            silver_row("C", total_exposure=1.0, risk_score=51, taxpayer_postcode="4870", tax_period_start=datetime(2024, 6, 30)),
+            silver_row("D", total_exposure=None, risk_score=None, taxpayer_postcode=None, lodgement_due_date=None),
+            silver_row("E", status="Closed"),
+            silver_row("F", status="Open"),
+        ]
+    )
+    state = state_frame(
+        [
+            ("B", "Investigation", "me@x", None, datetime(2025, 2, 28)),
+            ("F", "Closed", None, None, datetime(2025, 2, 28)),
+        ]
+    )
+    g = derive_gold(silver, state, AS_OF).set_index("case_id")
+
+    assert list(g.index) == ["A", "B", "C", "D"]  # E closed in Silver, F closed by state
+    assert g["severity"].tolist() == ["Critical", "High", "Medium", "Low"]
+    assert g["allocation_priority"].tolist() == [1, 2, 3, 4]
+    assert g.loc["B", "status"] == "Investigation" and g.loc["B", "assigned_to"] == "me@x"
+    assert g.loc["A", "status"] == "Open" and g.loc["A", "assigned_to"] is None
+    assert g["regional_office"].tolist() == ["Brisbane", "Gold Coast", "Far North Queensland", "Regional"]
+    assert g["financial_year"].tolist() == ["2024-25", "2024-25", "2023-24", "2024-25"]
+    assert g["age_days"].tolist() == [9, 9, 9, 9]
+    assert g["business_days_age"].tolist() == [7, 7, 7, 7]
+    assert g["days_overdue"].tolist() == [4, 4, 4, 0]
+    # Open > 5 days breaches; Investigation allows 30.
+    assert g["sla_breached"].tolist() == [True, False, True, True]
+
+
+def test_derive_columns_matches_sql_row_by_row() -> None:
+    rng = random.Random(25)
+    statuses = list(ACTIVE_STATUSES) + ["Closed", None]
+    postcodes = ["4000", "4005", "4101", "4217", "4870", "4350", "400", "", None]
+
+    def when(lo, hi):
+        return None if rng.random() < 0.05 else datetime(2025, 3, 1, rng.randrange(24)) - timedelta(days=rng.randint(lo, hi))
+
+    rows = [
+        {
+            "case_id": f"C{i}",
+            "status": rng.choice(statuses),
+            "total_exposure": None if rng.random() < 0.05 else rng.choice([50000.0, 200000.0, 500000.0, rng.uniform(0, 900000)]),
+            "risk_score": None if rng.random() < 0.05 else rng.choice([50, 70, 85, rng.randint(0, 100)]),
+            "taxpayer_postcode": rng.choice(postcodes),
+            "tax_period_start": when(0, 3000),
+            "created_at": when(-3, 120),
+            "lodgement_due_date": when(-60, 60),
+        }
+        for i in range(3000)
+    ]
+    for as_of in (AS_OF, date(2025, 3, 7), date(2025, 7, 1)):
+        got = derive_columns(pd.DataFrame(rows), as_of)
+        for i, row in enumerate(rows):
+            want = _sql_row(row, as_of)
+            have = {c: got.at[i, c] for c in DERIVED_COLUMNS}
+            have = {c: (None if v is pd.NA else v) for c, v in have.items()}
+            assert have == want, (row, as_of)
+
+
+def test_arrow_input_and_as_of(silver_row, state_frame) -> None:
+    gold = derive_gold(pd.DataFrame([silver_row("A"), silver_row("B", status="Investigation")]), state_frame([]), AS_OF)
+    table = pa.Table.from_pandas(gold, preserve_index=False)
+    # Day 31 of an Investigation breaches its SLA without any warehouse rebuild.
+    later = derive_columns(table, date(2025, 3, 23))
+    assert later["age_days"].tolist() == [31, 31]
+    assert later["sla_breached"].tolist() == [True, True]
+    assert later["days_overdue"].tolist() == [26, 26]
+    assert derive_columns(table, AS_OF)[list(DERIVED_COLUMNS)].equals(gold[list(DERIVED_COLUMNS)])
@@ -0,0 +1,270 @@
+import re
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from qldrevenue.gold import derive_gold
+from qldrevenue.goldrefresh import _GOLD_SELECT, GoldRefresher
+from qldrevenue.matchstore import RuleMatchStore
+from qldrevenue.rules import OfficerRule
+
+duckdb = pytest.importorskip("duckdb")
+sqlglot = pytest.importorskip("sqlglot")
+
+GOLD_SQL = Path(__file__).resolve().parents[1] / "sql" / "05_create_gold.sql"
+TODAY = date(2025, 3, 1)
+
+_SILVER_DDL = """
+CREATE TABLE silver (
+  case_id VARCHAR, case_type VARCHAR, case_domain VARCHAR, status VARCHAR, assigned_to VARCHAR,
+  compliance_officer VARCHAR, tax_shortfall DOUBLE, total_exposure DOUBLE, risk_score INTEGER,
+  taxpayer_abn VARCHAR, taxpayer_postcode VARCHAR, tax_period_start TIMESTAMP, created_at TIMESTAMP,
+  lodgement_due_date TIMESTAMP, is_test_data BOOLEAN
+)"""
+_STATE_DDL = """
+CREATE TABLE state (
+  case_id VARCHAR, status VARCHAR, assigned_to VARCHAR, compliance_officer VARCHAR, updated_at TIMESTAMP
+)"""
+_WATERMARK_DDL = """
+CREATE TABLE gold_refresh_watermark (
+  target VARCHAR, silver_version BIGINT, state_updated_at TIMESTAMP, refreshed_at TIMESTAMP
+)"""
+
+
+def _duckdb_sql(statement):
+    """Databricks SQL as DuckDB runs it, with current_date() pinned to TODAY."""
+    sql = sqlglot.transpile(statement, read="databricks", write="duckdb")[0]
+    return (
+        sql.replace("'ARRAY<STRING>'", "'[\"VARCHAR\"]'")
+        .replace("TIMESTAMPTZ", "TIMESTAMP")
+        .replace("CURRENT_DATE", f"DATE '{TODAY}'")
+    )
+
+
+class LocalWarehouse:
+    """Stand-in executor: the refresher's statements run as SQL against in-memory DuckDB.
+
+    Silver keeps a change log for `table_changes`; `DESCRIBE HISTORY` reports
+    its version. Everything else is the statement text itself, translated.
+    """
+
+    def __init__(self, silver_rows):
+        self.db = duckdb.connect()
+        for ddl in (_SILVER_DDL, _STATE_DDL, _WATERMARK_DDL, "CREATE TABLE silver_cdf (version BIGINT, case_id VARCHAR)"):
+            self.db.execute(ddl)
+        for row in silver_rows:
+            self._insert("silver", row)
+        gold_select = _GOLD_SELECT.format(silver_table="silver", state_table="state", case_filter="")
+        self.db.execute(f"CREATE TABLE gold AS SELECT * FROM ({_duckdb_sql(gold_select)}) WHERE false")
+        self.version = 0
+        self.statements = []
+
+    def _insert(self, table, row):
+        self.db.execute(f"INSERT INTO {table} BY NAME SELECT * FROM (SELECT {', '.join(f'${k} AS {k}' for k in row)})", row)
+
+    # --- mutations made by "other jobs" ---
+    def write_silver(self, row):
+        self.delete_silver(row["case_id"], log=False)
+        self._insert("silver", row)
+        self._log(row["case_id"])
+
+    def delete_silver(self, case_id, log=True):
+        self.db.execute("DELETE FROM silver WHERE case_id = $c", {"c": case_id})
+        if log:
+            self._log(case_id)
+
+    def _log(self, case_id):
+        self.version += 1
+        self.db.execute("INSERT INTO silver_cdf VALUES ($v, $c)", {"v": self.version, "c": case_id})
+
+    def write_state(self, case_id, status, at):
+        self.db.execute("DELETE FROM state WHERE case_id = $c", {"c": case_id})
+        self._insert("state", {"case_id": case_id, "status": status, "updated_at": at})
+
+    @property
+    def silver(self):
+        return self.db.execute("SELECT * FROM silver").df()
+
+    @property
+    def state(self):
+        return self.db.execute("SELECT * FROM state").df()
+
+    @property
+    def gold(self):
+        return self.db.execute("SELECT * FROM gold ORDER BY case_id").df()
+
+    @property
+    def mark(self):
+        row = self.db.execute("SELECT silver_version, state_updated_at FROM gold_refresh_watermark WHERE target = 'gold'").fetchone()
+        return None if row is None else (row[0], None if row[1] is None else pd.Timestamp(row[1]))
+
+    # --- executor interface ---
+    def _run(self, statement, params):
+        self.statements.append(statement)
+        sql = re.sub(
+            r"table_changes\('silver', (\d+), (\d+)\)",
+            r"(SELECT case_id FROM silver_cdf WHERE version BETWEEN \1 AND \2)",
+            statement,
+        )
+        return self.db.execute(_duckdb_sql(sql), params or None)
+
+    def fetch(self, statement, params=None):
+        if statement.startswith("DESCRIBE HISTORY"):
+            self.statements.append(statement)
+            return pd.DataFrame({"version": [self.version]})
+        return self._run(statement, params).df()
+
+    def exec(self, statement, params=None):
+        self._run(statement, params)
+
+
+def _rule(rule_id, **conds):
+    return OfficerRule(rule_id=rule_id, officer_email="o@x", rule_name=rule_id, filter_conditions=conds)
+
+
+def _refresher(wh, **kwargs):
+    return GoldRefresher(wh, gold_table="gold", silver_table="silver", state_table="state", watermark_table="gold_refresh_watermark", **kwargs)
+
+
+def _expected(wh):
+    silver = wh.silver
+    return derive_gold(silver[~silver["is_test_data"]], wh.state, TODAY).sort_values("case_id").reset_index(drop=True)
+
+
+def _assert_gold(wh):
+    pd.testing.assert_frame_equal(wh.gold, _expected(wh), check_dtype=False)
+
+
+def test_projection_matches_create_gold_sql() -> None:
+    def norm(sql):
+        return " ".join(re.sub(r"--[^\n]*", "", sql).split())
+
+    ours = norm(_GOLD_SELECT.format(silver_table="revenue_cases_silver", state_table="case_management_state", case_filter=""))
+    assert ours in norm(GOLD_SQL.read_text())
+
+
+def test_first_run_is_full_then_only_changed_cases(silver_row) -> None:
+    wh = LocalWarehouse([silver_row("C1"), silver_row("C2"), silver_row("C3", total_exposure=600000, risk_score=90)])
+    r = _refresher(wh)
+    first = r.refresh()
+    assert first.full and wh.mark == (0, None)
+    _assert_gold(wh)
+
+    assert not r.refresh().changed  # nothing new: no Gold MERGE
+    assert sum("MERGE INTO gold AS" in s for s in wh.statements) == 1
+
+    wh.write_silver(silver_row("C2", total_exposure=300000, risk_score=80))
+    wh.write_state("C1", "Closed", datetime(2025, 3, 1, 9))
+    wh.write_state("C3", "Investigation", datetime(2025, 3, 1, 10))
+    res = r.refresh()
+    assert not res.full and res.case_ids == ("C1", "C2", "C3")
+    assert wh.mark == (1, pd.Timestamp("2025-03-01 10:00"))
+    _assert_gold(wh)
+    assert "C1" not in set(wh.gold["case_id"])
+    assert wh.gold.set_index("case_id").loc["C2", "severity"] == "High"
+
+
+def test_deleted_silver_rows_leave_gold_and_merge_is_scoped(silver_row) -> None:
+    wh = LocalWarehouse([silver_row("C1"), silver_row("C2"), silver_row("C3")])
+    r = _refresher(wh)
+    r.refresh()
+    wh.delete_silver("C2")
+    wh.write_silver(silver_row("C3", is_test_data=True))
+    res = r.refresh()
+    assert res.case_ids == ("C2", "C3")
+    stmt = wh.statements[-2]
+    # Joined to the changed ids, with tombstones instead of a by-source scan of Gold.
+    assert "NOT MATCHED BY SOURCE" not in stmt and "array_contains" not in stmt
+    assert "LEFT JOIN" in stmt and "explode(from_json(:case_ids" in stmt
+    assert list(wh.gold["case_id"]) == ["C1"]
+    _assert_gold(wh)
+
+
+def test_dependants_refresh_for_the_same_cases(silver_row) -> None:
+    calls = []
+
+    class Rollup:
+        table = "rollup"
+
+        def refresh_cases(self, ids, silver_versions=None):
+            calls.append(("rollup", tuple(ids), silver_versions))
+
+        def rebuild(self):
+            calls.append(("rollup", None))
+
+    wh = LocalWarehouse([silver_row("C1"), silver_row("C2", risk_score=60)])
+    wh.db.execute("CREATE TABLE rm (rule_id VARCHAR, case_id VARCHAR, matched_at TIMESTAMP)")
+    store = RuleMatchStore(wh, gold_table="gold", matches_table="rm")
+    r = _refresher(wh, rollup=Rollup(), match_store=store)
+    risky = _rule("risky", risk_score_min=50)
+
+    def matches(rule_id):
+        return sorted(wh.db.execute("SELECT case_id FROM rm WHERE rule_id = $r", {"r": rule_id}).fetchall())
+
+    r.refresh(rules=[risky])
+    assert matches("risky") == [("C2",)] and r.fresh(["rm#risky"]) == {"rm#risky"}
+
+    wh.write_state("C1", "Under Review", datetime(2025, 3, 1))
+    wh.write_silver(silver_row("C1", risk_score=70))
+    assert r.fresh(["rm#risky"]) == {"rm#risky"}  # Gold's mark has not moved yet either
+    r.refresh(rules=[risky])
+    assert matches("risky") == [("C1",), ("C2",)] and r.fresh(["rm#risky"]) == {"rm#risky"}
+    # Silver moved from version 0 to 1: the rollup reads that change feed for C1's old partition.
+    assert calls == [("rollup", None), ("rollup", ("C1",), (1, 1))] and r.fresh(["rollup"]) == {"rollup"}
+    assert sum("MERGE INTO rm" in s for s in wh.statements) == 2  # full match once, then only C1
+
+    # A rule with no mark yet is behind: the next refresh matches it in full, off the read path.
+    fraud = _rule("fraud", case_domains=["Fraud"])
+    assert r.fresh(["rm#risky", "rm#fraud"]) == {"rm#risky"}
+    r.refresh(rules=[risky, fraud])
+    assert matches("fraud") == [("C1",), ("C2",)] and r.fresh(["rm#risky", "rm#fraud"]) == {"rm#risky", "rm#fraud"}
+
+    # A rollup whose mark is lost (e.g. rebuilt by hand) is rebuilt rather than patched.
+    wh.db.execute("DELETE FROM gold_refresh_watermark WHERE target = 'rollup'")
+    assert r.fresh(["rollup"]) == set()
+    wh.write_silver(silver_row("C2", risk_score=61))
+    r.refresh(rules=[risky, fraud])
+    assert calls[-1] == ("rollup", None) and r.fresh(["rollup"]) == {"rollup"}
+
+    # An edited rule is re-matched (and marked) straight away.
+    r.rematch_rule(_rule("risky", risk_score_min=65))
+    assert matches("risky") == [("C1",)] and r.fresh(["rm#risky"]) == {"rm#risky"}
+
+
+def test_failed_rematch_leaves_the_rule_behind(silver_row) -> None:
+    wh = LocalWarehouse([silver_row("C1")])
+    store = RuleMatchStore(wh, gold_table="gold", matches_table="rm")  # rm never created: matching fails
+    r = _refresher(wh, match_store=store)
+    r.refresh()
+    wh.exec(*r.watermark_stmt(*r.watermark(), ["rm#risky"]))
+    assert r.fresh(["rm#risky"]) == {"rm#risky"}
+    with pytest.raises(Exception):
+        r.rematch_rule(_rule("risky", risk_score_min=65))
+    assert r.fresh(["rm#risky"]) == set()
+
+
+def test_large_change_sets_and_lost_change_feed_fall_back_to_full(silver_row) -> None:
+    wh = LocalWarehouse([silver_row(f"C{i}") for i in range(5)])
+    r = _refresher(wh, max_incremental=2)
+    r.refresh()
+    for i in range(3):
+        wh.write_silver(silver_row(f"C{i}", risk_score=60))
+    assert r.refresh().full
+    _assert_gold(wh)
+
+    wh.write_silver(silver_row("C4", risk_score=99))
+    wh.db.execute("DELETE FROM silver_cdf")
+    wh.fetch = _failing_changes(wh.fetch)
+    assert r.refresh().full
+    _assert_gold(wh)
+
+
+def _failing_changes(fetch):
+    def wrapped(statement, params=None):
+        if "table_changes" in statement:
+            raise RuntimeError("change feed vacuumed")
+        return fetch(statement, params)
+
+    return wrapped
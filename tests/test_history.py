@@ -0,0 +1,131 @@
+import re
+
+import pandas as pd
+import pytest
+
+from qldrevenue.history import HISTORY_COLUMNS, CaseHistoryIndex
+
+
+class Warehouse:
+    """Stand-in executor: table versions, a checkpoint table, and recorded MERGEs."""
+
+    def __init__(self, versions):
+        self.versions = dict(versions)
+        self.checkpoint = {}
+        self.merges = []
+        self.fail_next_checkpoint = False
+        self.history = pd.DataFrame(columns=list(HISTORY_COLUMNS))
+        self.lookups = []
+
+    def fetch(self, statement, params=None):
+        if statement.startswith("DESCRIBE HISTORY"):
+            return pd.DataFrame({"version": [self.versions[statement.split()[2]]]})
+        if "FROM checkpoint" in statement:
+            return pd.DataFrame({"source_table": list(self.checkpoint), "version": list(self.checkpoint.values())})
+        assert "FROM history" in statement
+        self.lookups.append((statement, params))
+        ids = [v for k, v in params.items() if k.startswith("case_id_")]
+        return self.history[self.history["case_id"].isin(ids)].reset_index(drop=True)
+
+    def exec(self, statement, params=None):
+        if "MERGE INTO checkpoint" in statement:
+            if self.fail_next_checkpoint:
+                self.fail_next_checkpoint = False
+                raise RuntimeError("warehouse unavailable")
+            self.checkpoint[params["source_table"]] = params["version"]
+        else:
+            self.merges.append(" ".join(statement.split()))
+
+
+def _index(wh):
+    return CaseHistoryIndex(wh, history_table="history", checkpoint_table="checkpoint", silver_table="silver", events_table="events")
+
+
+def test_backfill_then_incremental_then_noop() -> None:
+    wh = Warehouse({"silver": 7, "events": 3})
+    idx = _index(wh)
+    first = idx.sync()
+    assert (first.silver, first.events) == ((0, 7), (0, 3))
+    silver, events = wh.merges
+    assert "table_changes('silver', 0, 7)" in silver
+    assert "FROM events VERSION AS OF 3" in events and "table_changes" not in events
+    assert wh.checkpoint == {"silver": 7, "events": 3}
+
+    wh.versions.update(silver=9, events=5)
+    second = idx.sync()
+    assert (second.silver, second.events) == ((8, 9), (4, 5))
+    assert "table_changes('silver', 8, 9)" in wh.merges[2]
+    assert "table_changes('events', 4, 5)" in wh.merges[3] and "_change_type = 'insert'" in wh.merges[3]
+
+    assert idx.sync() == type(second)(silver=None, events=None)
+    assert len(wh.merges) == 4
+
+
+def test_failed_checkpoint_replays_the_same_range_idempotently() -> None:
+    wh = Warehouse({"silver": 4, "events": 0})
+    idx = _index(wh)
+    idx.sync()
+    wh.versions["silver"] = 6
+    wh.fail_next_checkpoint = True
+    with pytest.raises(RuntimeError):
+        idx.sync()
+    idx.sync()
+    ranges = re.findall(r"table_changes\('silver', (\d+), (\d+)\)", " ".join(wh.merges))
+    assert ranges == [("0", "4"), ("5", "6"), ("5", "6")]
+    # Re-applying a range only inserts rows not yet indexed.
+    assert all("WHEN NOT MATCHED THEN INSERT *" in m and "WHEN MATCHED" not in m for m in wh.merges)
+
+
+def test_silver_rows_carry_changed_fields() -> None:
+    stmt = " ".join(_index(Warehouse({})).silver_stmt(1, 2).split())
+    assert "WHERE post._change_type != 'update_preimage'" in stmt
+    assert "IF(pre.case_id IS NULL OR NOT (post.status <=> pre.status), 'status', NULL)" in stmt
+    assert "t.commit_version = s.commit_version AND t.change_type = s.change_type" in stmt
+
+
+def test_batch_lookup_is_one_point_query() -> None:
+    wh = Warehouse({})
+    wh.history = pd.DataFrame(
+        [
+            {"case_id": "C1", "source": "silver", "changed_at": pd.Timestamp("2025-01-02"), "status": "Open"},
+            {"case_id": "C1", "source": "event", "changed_at": pd.Timestamp("2025-01-03"), "note": "called"},
+            {"case_id": "C2", "source": "silver", "changed_at": pd.Timestamp("2025-01-01"), "status": "Open"},
+        ],
+        columns=list(HISTORY_COLUMNS),
+    )
+    out = _index(wh).by_case(["C1", "C2", "C3", "C1"])
+    assert len(wh.lookups) == 1
+    stmt, params = wh.lookups[0]
+    assert "case_id IN (:case_id_0, :case_id_1, :case_id_2)" in stmt and "QUALIFY row_number()" in stmt
+    assert params["limit_per_case"] == 200
+    assert [len(out[c]) for c in ("C1", "C2", "C3")] == [2, 1, 0]
+
+    _index(wh).lookup(["C1"], source="event", limit_per_case=5)
+    stmt, params = wh.lookups[-1]
+    assert "source = :source" in stmt and params["source"] == "event" and params["limit_per_case"] == 5
+    assert _index(wh).lookup([]).empty and len(wh.lookups) == 2
+
+
+def test_merges_join_on_the_clustering_key() -> None:
+    idx = _index(Warehouse({}))
+    for stmt in (idx.silver_stmt(1, 2), idx.events_stmt(None, 3), idx.events_stmt(4, 5)):
+        on = " ".join(stmt.split()).split(" ON ")[-1]
+        assert "t.case_id = s.case_id" in on
+
+
+def test_current_sources_compares_checkpoints_with_latest_versions() -> None:
+    wh = Warehouse({"silver": 4, "events": 2})
+    idx = _index(wh)
+    assert idx.current_sources() == set()
+    idx.sync()
+    assert idx.current_sources() == {"silver", "events"}
+    wh.versions["silver"] = 5
+    assert idx.current_sources() == {"events"}
+
+
+def test_lookup_of_a_column_less_result_keeps_the_history_columns() -> None:
+    wh = Warehouse({})
+    wh.fetch = lambda statement, params=None: pd.DataFrame()
+    out = _index(wh).lookup(["C1"])
+    assert out.empty and list(out.columns) == list(HISTORY_COLUMNS)
+    assert out[out["source"] == "silver"].empty
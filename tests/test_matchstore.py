@@ -0,0 +1,122 @@
+import json
+import re
+import sqlite3
+
+import pandas as pd
+
+from qldrevenue.matchstore import RuleMatchStore
+from qldrevenue.rules import OfficerRule
+from qldrevenue.sqlbuilder import Where
+
+
+class RecordingExecutor:
+    def __init__(self, frame=None):
+        self.calls = []
+        self.frame = frame if frame is not None else pd.DataFrame()
+
+    def exec(self, statement, params=None):
+        self.calls.append((statement, dict(params or {})))
+
+    def fetch(self, statement, params=None):
+        self.calls.append((statement, dict(params or {})))
+        return self.frame
+
+
+def _rule(rule_id, **conds):
+    return OfficerRule(rule_id=rule_id, officer_email="o@x", rule_name=rule_id, filter_conditions=conds)
+
+
+def _markers(statement):
+    return set(re.findall(r":([A-Za-z_]\w*)", statement))
+
+
+def test_refresh_rule_merges_one_rule_with_named_params() -> None:
+    ex = RecordingExecutor()
+    store = RuleMatchStore(ex, gold_table="gold", matches_table="rm")
+    store.refresh_rule(_rule("r1", case_types=["Land Tax"], risk_score_min=60))
+
+    (stmt, params), = ex.calls
+    assert "MERGE INTO rm" in stmt and "FROM gold" in stmt
+    assert "WHEN NOT MATCHED BY SOURCE AND t.rule_id = :rule_id THEN DELETE" in stmt
+    assert params == {"rule_case_type_0": "Land Tax", "rule_risk_min": 60, "rule_id": "r1"}
+    assert _markers(stmt) == set(params)
+    assert "Land Tax" not in stmt
+
+
+def test_refresh_cases_params_are_disjoint_per_rule() -> None:
+    ex = RecordingExecutor()
+    store = RuleMatchStore(ex, gold_table="gold", matches_table="rm")
+    rules = [_rule("a", case_types=["Land Tax"], risk_score_min=50), _rule("b", case_types=["Land Tax"], risk_score_min=80)]
+    store.refresh_cases(rules, ["C1", "C2"])
+    store.refresh_cases(rules, [])
+    store.refresh_cases([], ["C1"])
+
+    (stmt, params), = ex.calls
+    assert stmt.count("UNION ALL") == 1
+    assert json.loads(params["case_ids"]) == ["C1", "C2"]
+    assert json.loads(params["rule_ids"]) == ["a", "b"]
+    assert params["r0_risk_min"] == 50 and params["r1_risk_min"] == 80
+    assert params["r0_rule_id"] == "a" and params["r1_rule_id"] == "b"
+    assert _markers(stmt) == set(params)
+
+
+def test_refresh_cases_source_matches_rule_semantics() -> None:
+    # Run the USING subquery on sqlite: only the listed cases, each against its rule.
+    ex = RecordingExecutor()
+    store = RuleMatchStore(ex, gold_table="gold", matches_table="rm")
+    rules = [_rule("a", case_types=["Land Tax"]), _rule("b", risk_score_min=80)]
+    store.refresh_cases(rules, ["C1", "C2"])
+    stmt, params = ex.calls[0]
+    source = stmt[stmt.index("USING (") + len("USING (") : stmt.index(") AS s")]
+
+    con = sqlite3.connect(":memory:")
+    con.create_function("from_json", 2, lambda s, _t: s)
+    con.create_function("array_contains", 2, lambda arr, v: v in json.loads(arr))
+    pd.DataFrame(
+        {
+            "case_id": ["C1", "C2", "C3"],
+            "case_type": ["Land Tax", "Payroll Tax", "Land Tax"],
+            "risk_score": [90, 85, 99],
+        }
+    ).to_sql("gold", con)
+    rows = con.execute(source, params).fetchall()
+    assert sorted(rows) == [("a", "C1"), ("b", "C1"), ("b", "C2")]
+
+
+def test_counts_defaults_missing_rules_to_zero() -> None:
+    ex = RecordingExecutor(pd.DataFrame({"rule_id": ["a"], "matches": [3]}))
+    store = RuleMatchStore(ex)
+    assert store.counts(["a", "b"]) == {"a": 3, "b": 0}
+    assert json.loads(ex.calls[0][1]["rule_ids"]) == ["a", "b"]
+    assert store.counts([]) == {}
+
+
+def test_cases_where_adds_semi_join() -> None:
+    where = Where().eq("rule_id", "x")
+    RuleMatchStore.cases_where(where, "r1")
+    assert where.params == {"rule_id": "x", "rule_id_1": "r1"}
+    assert "case_id IN (SELECT case_id FROM" in where.sql() and ":rule_id_1" in where.sql()
+
+
+def test_predicate_counts_are_one_union_all_over_gold() -> None:
+    con = sqlite3.connect(":memory:")
+    pd.DataFrame(
+        {
+            "case_id": ["C1", "C2", "C3"],
+            "case_type": ["Land Tax", "Payroll Tax", "Land Tax"],
+            "risk_score": [90, 85, 40],
+        }
+    ).to_sql("gold", con)
+
+    class SqliteExecutor(RecordingExecutor):
+        def fetch(self, statement, params=None):
+            super().fetch(statement, params)
+            return pd.read_sql_query(statement, con, params=params)
+
+    ex = SqliteExecutor()
+    store = RuleMatchStore(ex, gold_table="gold", matches_table="rm")
+    rules = [_rule("a", case_types=["Land Tax"]), _rule("b", risk_score_min=80), _rule("c", risk_score_min=95)]
+    assert store.predicate_counts(rules) == {"a": 2, "b": 2, "c": 0}
+    (stmt, params), = ex.calls
+    assert stmt.count("UNION ALL") == 2 and _markers(stmt) == set(params)
+    assert store.predicate_counts([]) == {} and len(ex.calls) == 1
@@ -1,6 +1,9 @@
+import sqlite3
+
 import pandas as pd
 
-from qldrevenue.metrics import kpis
+from qldrevenue.metrics import kpi_statement, kpis, kpis_from_frames, kpis_from_row
+from qldrevenue.sqlbuilder import Where
 
 
 def test_kpis_handles_string_decimals() -> None:
@@ -16,3 +19,37 @@ def test_kpis_handles_string_decimals() -> None:
     assert out["total_exposure"] == 12.75
     assert out["avg_shortfall"] == 2.0
     assert out["unique_taxpayers"] == 2
+
+
+def test_kpis_from_frames_matches_kpis() -> None:
+    df = pd.DataFrame(
+        {
+            "total_exposure": [10.5, 2.25, 7.0, None],
+            "tax_shortfall": [1.0, 3.0, 5.0, 7.0],
+            "taxpayer_abn": ["11", "22", "11", "33"],
+        }
+    )
+    assert kpis_from_frames([df.iloc[:1], df.iloc[1:3], df.iloc[3:]]) == kpis(df)
+    assert kpis_from_frames([])["total_cases"] == 0
+
+
+def test_kpi_statement_matches_local_kpis() -> None:
+    df = pd.DataFrame(
+        {
+            "case_type": ["Land Tax", "Land Tax", "Payroll Tax", "Land Tax"],
+            "total_exposure": [10.5, None, 7.0, 4.0],
+            "tax_shortfall": [1.0, 3.0, None, 8.0],
+            "taxpayer_abn": ["11", "22", "11", None],
+        }
+    )
+    con = sqlite3.connect(":memory:")
+    df.to_sql("gold", con)
+
+    where = Where().isin("case_type", ["Land Tax"])
+    stmt, params = kpi_statement("gold", where)
+    server = kpis_from_row(pd.read_sql_query(stmt, con, params=params))
+    assert server == kpis(df[df["case_type"] == "Land Tax"])
+
+    stmt, params = kpi_statement("gold", Where().eq("case_type", "x"))
+    empty = kpis_from_row(pd.read_sql_query(stmt, con, params=params))
+    assert empty == kpis(pd.DataFrame())
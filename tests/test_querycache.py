@@ -0,0 +1,157 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from qldrevenue.querycache import DeltaVersions, QueryCache, get_query_cache, normalise_statement, tables_in
+
+RULES = "qldrevenue.qro_fraud_detection.officer_case_rules"
+STATE = "qldrevenue.qro_fraud_detection.case_management_state"
+
+
+class CountingExecutor:
+    def __init__(self, delay_s=0.0):
+        self.delay_s = delay_s
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def fetch(self, statement, params=None):
+        with self.lock:
+            self.calls.append((statement, params))
+        time.sleep(self.delay_s)
+        return pd.DataFrame({"n": [len(self.calls)]})
+
+
+def test_key_normalises_whitespace_and_params() -> None:
+    cache, ex = QueryCache(), CountingExecutor()
+    cache.fetch(ex, f"SELECT *\n   FROM {RULES} WHERE a = :a", {"a": 1})
+    cache.fetch(ex, f"SELECT * FROM {RULES}  WHERE a = :a", {"a": 1})
+    cache.fetch(ex, f"SELECT * FROM {RULES} WHERE a = :a", {"a": 2})
+    assert len(ex.calls) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert normalise_statement(" a \n b ") == "a b"
+    assert tables_in(f"SELECT * FROM {RULES} r JOIN {STATE.upper()} s ON r.x = s.x") == (STATE, RULES)
+
+
+def test_invalidate_drops_only_entries_reading_the_table() -> None:
+    cache, ex = QueryCache(), CountingExecutor()
+    cache.fetch(ex, f"SELECT * FROM {RULES}")
+    cache.fetch(ex, f"SELECT * FROM {STATE}")
+    assert cache.invalidate(STATE) == 1
+    cache.fetch(ex, f"SELECT * FROM {RULES}")
+    cache.fetch(ex, f"SELECT * FROM {STATE}")
+    assert [s for s, _ in ex.calls] == [f"SELECT * FROM {RULES}", f"SELECT * FROM {STATE}", f"SELECT * FROM {STATE}"]
+
+
+def test_lru_bound() -> None:
+    cache, ex = QueryCache(max_entries=2), CountingExecutor()
+    for q in ("a", "b", "a", "c"):
+        cache.fetch(ex, f"SELECT '{q}' FROM {RULES}")
+    assert len(cache) == 2
+    cache.fetch(ex, f"SELECT 'a' FROM {RULES}")  # recently used: kept
+    cache.fetch(ex, f"SELECT 'b' FROM {RULES}")  # evicted: refetched
+    assert len(ex.calls) == 4
+
+
+def test_concurrent_misses_are_single_flight() -> None:
+    cache, ex = QueryCache(), CountingExecutor(delay_s=0.05)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        frames = list(pool.map(lambda _: cache.fetch(ex, f"SELECT * FROM {RULES}"), range(8)))
+    assert len(ex.calls) == 1
+    assert all(f is frames[0] for f in frames)
+
+
+def test_errors_are_not_cached() -> None:
+    cache = QueryCache()
+    calls = []
+
+    def boom():
+        calls.append(1)
+        raise RuntimeError("warehouse down")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute("q", None, boom, tables=[RULES])
+    assert len(calls) == 2 and len(cache) == 0
+
+
+def test_result_computed_across_invalidation_is_not_stored() -> None:
+    cache = QueryCache()
+    cache.get_or_compute("q", None, lambda: cache.invalidate(RULES), tables=[RULES])
+    assert len(cache) == 0
+
+
+class VersionExecutor:
+    def __init__(self):
+        self.version = 1
+        self.submitted = []
+
+    def submit(self, statement):
+        self.submitted.append(statement)
+        return statement
+
+    def gather(self, handles, return_exceptions=False):
+        return [pd.DataFrame({"version": [self.version]}) for _ in handles]
+
+
+def test_delta_version_change_misses_cache() -> None:
+    vex = VersionExecutor()
+    versions = DeltaVersions(vex, ttl_s=0)
+    cache, ex = QueryCache(versions=versions), CountingExecutor()
+    cache.fetch(ex, f"SELECT * FROM {RULES}")
+    cache.fetch(ex, f"SELECT * FROM {RULES}")
+    vex.version = 2  # another process committed to the table
+    cache.fetch(ex, f"SELECT * FROM {RULES}")
+    assert len(ex.calls) == 2
+    assert vex.submitted == [f"DESCRIBE HISTORY {RULES} LIMIT 1"] * 3
+
+
+def test_background_poller_keeps_hits_off_the_request_thread() -> None:
+    vex = VersionExecutor()
+    versions = DeltaVersions(vex, ttl_s=60.0)
+    cache, ex = QueryCache(versions=versions), CountingExecutor()
+    cache.fetch(ex, f"SELECT * FROM {RULES}")  # first sight of the table: polled inline
+    assert len(vex.submitted) == 1
+    versions.start()
+    try:
+        versions._versions[RULES] = (0.0, 1)  # long past its ttl
+        cache.fetch(ex, f"SELECT * FROM {RULES}")
+        assert len(vex.submitted) == 1 and len(ex.calls) == 1
+        # A commit elsewhere is picked up by the poller's next round, not by the read.
+        vex.version = 2
+        versions.poll(list(versions._versions))
+        cache.fetch(ex, f"SELECT * FROM {RULES}")
+        assert len(ex.calls) == 2
+    finally:
+        versions.stop()
+
+
+def test_background_poller_refreshes_seen_tables() -> None:
+    vex = VersionExecutor()
+    versions = DeltaVersions(vex, ttl_s=0.01)
+    versions.get([RULES])
+    versions.start()
+    try:
+        deadline = time.time() + 5
+        while len(vex.submitted) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        versions.stop()
+    assert len(vex.submitted) >= 3 and set(vex.submitted) == {f"DESCRIBE HISTORY {RULES} LIMIT 1"}
+
+
+def test_clear_keeps_write_generations() -> None:
+    cache, ex = QueryCache(), CountingExecutor()
+    cache.invalidate(RULES)
+    cache.fetch(ex, f"SELECT * FROM {RULES}")
+    cache.clear()
+    assert len(cache) == 0
+    (_, _, ((table, generation, _),)), = [cache._key(f"SELECT * FROM {RULES}", None, (RULES,))]
+    assert (table, generation) == (RULES, 1)
+
+
+def test_get_query_cache_is_process_wide() -> None:
+    assert get_query_cache("t1") is get_query_cache("t1")
+    assert get_query_cache("t1") is not get_query_cache("t2")
@@ -0,0 +1,109 @@
+from datetime import date, datetime
+
+import pandas as pd
+
+from qldrevenue.replica import CaseReplica
+
+AS_OF = date(2025, 3, 1)
+
+
+class FakeExecutor:
+    """Answers the replica's statements from in-memory tables."""
+
+    def __init__(self, silver, state):
+        self.version = 3
+        self.silver = silver
+        self.state = state
+        self.changes = pd.DataFrame()
+        self.statements = []
+
+    def fetch(self, statement, params=None):
+        self.statements.append((statement, params))
+        if statement.startswith("DESCRIBE HISTORY"):
+            return pd.DataFrame({"version": [self.version]})
+        if "table_changes" in statement:
+            if self.changes is None:
+                raise RuntimeError("VERSION_NOT_AVAILABLE")
+            return self.changes
+        if "updated_at >= :since" in statement:
+            return self.state[self.state["updated_at"] >= params["since"]]
+        return self.state
+
+    def fetch_arrow(self, statement, params=None):
+        self.statements.append((statement, params))
+        return self.silver.astype({"case_type": "category"})
+
+
+def _replica(silver_row, state_frame):
+    silver = pd.DataFrame([silver_row("A"), silver_row("B"), silver_row("C", is_test_data=True)])
+    silver = silver[silver["is_test_data"] == False]  # noqa: E712 - the load query filters test rows
+    state = state_frame([("A", "Under Review", None, None, datetime(2025, 2, 1))])
+    ex = FakeExecutor(silver, state)
+    replica = CaseReplica(ex, silver_table="silver", state_table="state")
+    replica.load()
+    assert "VERSION AS OF 3" in ex.statements[1][0]
+    return replica, ex
+
+
+def test_sync_applies_only_changes(silver_row, state_frame) -> None:
+    replica, ex = _replica(silver_row, state_frame)
+    assert sorted(replica.snapshot()["case_id"]) == ["A", "B"]
+    before = replica.snapshot()
+
+    ex.version = 5
+    ex.changes = pd.DataFrame(
+        [
+            dict(silver_row("B", risk_score=95, total_exposure=900000.0), _change_type="update_postimage", _commit_version=4, _commit_timestamp=None),
+            dict(silver_row("N"), _change_type="insert", _commit_version=4, _commit_timestamp=None),
+            dict(silver_row("N"), _change_type="delete", _commit_version=5, _commit_timestamp=None),
+            dict(silver_row("M"), _change_type="insert", _commit_version=5, _commit_timestamp=None),
+        ]
+    )
+    ex.state = state_frame(
+        [
+            ("A", "Under Review", None, None, datetime(2025, 2, 1)),
+            ("M", "Investigation", "me@x", None, datetime(2025, 2, 2)),
+        ]
+    )
+    changed = replica.sync()
+
+    assert changed == {"A", "B", "M", "N"}  # A re-read via the >= watermark; idempotent
+    snap = replica.snapshot().set_index("case_id")
+    assert sorted(snap.index) == ["A", "B", "M"]
+    assert snap.loc["B", "severity"] == "Critical"
+    assert snap.loc["M", "status"] == "Investigation"
+    assert snap.loc["A", "status"] == "Under Review"
+    assert replica.version == 5
+    assert "_change_type" not in snap.columns
+    assert sorted(before["case_id"]) == ["A", "B"]  # old snapshot untouched
+    assert "table_changes('silver', 4, 5)" in ex.statements[-2][0]
+
+
+def test_sync_reloads_when_change_feed_is_unavailable(silver_row, state_frame) -> None:
+    replica, ex = _replica(silver_row, state_frame)
+    ex.version = 9
+    ex.changes = None
+    assert replica.sync() == {"A", "B"}  # full load at the new version
+    assert "VERSION AS OF 9" in [s for s, _ in ex.statements if s.startswith("SELECT * FROM silver")][-1]
+    assert replica.version == 9
+    assert replica.get("A")["status"] == "Under Review"
+    assert replica.get("missing") is None
+
+
+def test_live_exposure_is_evaluated_at_the_as_of_date(silver_row, state_frame) -> None:
+    row = silver_row(
+        "A",
+        tax_shortfall=400000.0,
+        penalty_amount=80000.0,
+        interest_amount=0.0,
+        total_exposure=480000.0,
+        risk_score=90,
+        lodgement_due_date=datetime(2024, 3, 1),
+    )
+    silver = pd.DataFrame([row])
+    stale = CaseReplica(FakeExecutor(silver, state_frame([])))._derive(silver, state_frame([]), AS_OF)
+    live = CaseReplica(FakeExecutor(silver, state_frame([])), live_exposure=True)._derive(silver, state_frame([]), AS_OF)
+    assert stale.loc[0, "severity"] == "High"
+    # 365 days at 8% on $400,000 adds $32,000 and tips the case into Critical.
+    assert live.loc[0, "interest_amount"] == 32000.0 and live.loc[0, "total_exposure"] == 512000.0
+    assert live.loc[0, "severity"] == "Critical"
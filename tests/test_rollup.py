@@ -0,0 +1,130 @@
+import json
+import re
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from qldrevenue.metrics import kpis, kpis_from_row
+from qldrevenue.rollup import DIMENSIONS, STATIC_DIMENSIONS, CaseRollup
+
+
+class RecordingExecutor:
+    def __init__(self):
+        self.calls = []
+
+    def exec(self, statement, params=None):
+        self.calls.append((statement, dict(params or {})))
+
+
+class HllUnion:
+    """sqlite stand-in for hll_union_agg over exact JSON 'sketches'."""
+
+    def __init__(self):
+        self.values = set()
+
+    def step(self, sketch):
+        if sketch is not None:
+            self.values.update(json.loads(sketch))
+
+    def finalize(self):
+        return json.dumps(sorted(self.values))
+
+
+GOLD = pd.DataFrame(
+    {
+        "case_id": ["C1", "C2", "C3", "C4", "C5"],
+        "case_domain": ["Fraud", "Fraud", "Debt", "Fraud", "Debt"],
+        "case_type": ["Land Tax", "Land Tax", "Payroll Tax", "Payroll Tax", "Land Tax"],
+        "status": ["Open", "Open", "Investigation", "Open", "Open"],
+        "severity": ["High", "Low", "High", "High", "Low"],
+        "regional_office": ["Brisbane", "Brisbane", "Regional", "Brisbane", "Gold Coast"],
+        "financial_year": ["2024-25"] * 5,
+        "total_exposure": [100.0, 50.0, None, 25.0, 10.0],
+        "tax_shortfall": [10.0, None, 30.0, 5.0, 1.0],
+        "taxpayer_abn": ["11", "22", "11", None, "33"],
+    }
+)
+
+
+def _rollup_db() -> sqlite3.Connection:
+    # Same cells as CaseRollup.rebuild, with exact ABN lists in place of HLL sketches.
+    cells = (
+        GOLD.assign(tax_shortfall=GOLD["tax_shortfall"].fillna(0), total_exposure=GOLD["total_exposure"].fillna(0))
+        .groupby(list(DIMENSIONS), dropna=False)
+        .agg(
+            case_count=("case_id", "size"),
+            total_exposure=("total_exposure", "sum"),
+            total_shortfall=("tax_shortfall", "sum"),
+            taxpayer_sketch=("taxpayer_abn", lambda s: json.dumps(sorted(s.dropna().unique().tolist()))),
+        )
+        .reset_index()
+    )
+    con = sqlite3.connect(":memory:")
+    con.create_aggregate("hll_union_agg", 1, HllUnion)
+    con.create_function("hll_sketch_estimate", 1, lambda s: len(json.loads(s)) if s else None)
+    cells.to_sql("case_rollup", con)
+    return con
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {},
+        {"case_type": ["Land Tax"]},
+        {"case_domain": ["Fraud"], "status": ["Open"]},
+        {"case_type": ["Land Tax", "Payroll Tax"], "case_domain": ["Debt"]},
+        {"status": ["Closed"]},
+    ],
+)
+def test_rollup_kpis_match_case_level_kpis(filters) -> None:
+    con = _rollup_db()
+    stmt, params = CaseRollup(None, table="case_rollup").kpi_statement(filters)
+    out = kpis_from_row(pd.read_sql_query(stmt, con, params=params))
+
+    mask = pd.Series(True, index=GOLD.index)
+    for col, values in filters.items():
+        mask &= GOLD[col].isin(values)
+    assert out == pytest.approx(kpis(GOLD[mask]))
+
+
+def test_breakdown_groups_by_dimension() -> None:
+    con = _rollup_db()
+    stmt, params = CaseRollup(None, table="case_rollup").breakdown_statement("case_type", {"case_domain": ["Fraud"]})
+    df = pd.read_sql_query(stmt, con, params=params).set_index("case_type")
+    assert df.loc["Land Tax", "total_cases"] == 2 and df.loc["Payroll Tax", "total_cases"] == 1
+    assert df.loc["Land Tax", "unique_taxpayers"] == 2
+
+
+def test_can_serve_only_dimension_filters() -> None:
+    assert CaseRollup.can_serve({"case_type": ["Land Tax"], "status": []})
+    assert CaseRollup.can_serve({"risk_score": None})
+    assert not CaseRollup.can_serve({"case_type": ["Land Tax"], "risk_score": 60})
+    with pytest.raises(ValueError):
+        CaseRollup(None).kpi_statement({"risk_score": [60]})
+    with pytest.raises(ValueError):
+        CaseRollup(None).breakdown_statement("taxpayer_abn", {})
+
+
+def test_refresh_cases_scopes_merge_to_static_partitions() -> None:
+    ex = RecordingExecutor()
+    rollup = CaseRollup(ex, table="rm", gold_table="gold", silver_table="silver")
+    rollup.refresh_cases([])
+    rollup.refresh_cases(["C1", "C2"])
+
+    (stmt, params), = ex.calls
+    assert json.loads(params["case_ids"]) == ["C1", "C2"]
+    assert set(re.findall(r":([A-Za-z_]\w*)", stmt)) == {"case_ids"}
+    assert "MERGE INTO rm" in stmt and "FROM silver" in stmt and "FROM gold" in stmt
+    for d in STATIC_DIMENSIONS:
+        assert f"g.{d} <=> a.{d}" in stmt
+    assert "WHEN MATCHED AND s.is_stale THEN DELETE" in stmt
+    assert "table_changes" not in stmt
+
+
+def test_refresh_cases_covers_the_partition_a_case_moved_out_of() -> None:
+    ex = RecordingExecutor()
+    CaseRollup(ex, table="rm", gold_table="gold", silver_table="silver").refresh_cases(["C1"], (4, 7))
+    (stmt, params), = ex.calls
+    assert "FROM table_changes('silver', 4, 7)" in stmt and "UNION ALL" in stmt
+    assert set(re.findall(r":([A-Za-z_]\w*)", stmt)) == {"case_ids"}
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from qldrevenue.rulematch import CaseIndex, evaluate_rules
+from qldrevenue.rules import OfficerRule, to_rule_conditions
+
+
+def _cases() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    n = 500
+    case_type = rng.choice(["Payroll Tax", "Land Tax", "Transfer Duty"], n)
+    shortfall = rng.integers(0, 300000, n).astype(float)
+    shortfall[::37] = np.nan
+    sla = rng.choice([True, False], n).astype(object)
+    sla[::41] = None
+    return pd.DataFrame(
+        {
+            "case_id": [f"CASE-{i:05d}" for i in range(n)],
+            "case_type": pd.Categorical(case_type),
+            "case_domain": rng.choice(["Fraud", "Compliance", "Debt", "Service"], n),
+            "industry_code": np.where(case_type == "Payroll Tax", rng.choice(["0600", "4500", "3000"], n), None),
+            "tax_shortfall": shortfall,
+            "risk_score": rng.integers(0, 100, n),
+            "sla_breached": sla,
+            "financial_year": rng.choice(["2023-24", "2024-25"], n),
+            "regional_office": rng.choice(["Brisbane", "Gold Coast", "Regional"], n),
+        }
+    )
+
+
+def _rule(rule_id: str, **kwargs) -> OfficerRule:
+    return OfficerRule(rule_id, "officer@qro", rule_id, to_rule_conditions(**kwargs))
+
+
+RULES = [
+    _rule("all"),
+    _rule("mining", case_types=["Payroll Tax"], industry_codes=["0600"], tax_shortfall_min=50000, risk_score_min=60),
+    _rule("mining-dup", case_types=["Payroll Tax"], industry_codes=["0600"], tax_shortfall_min=50000, risk_score_min=60),
+    _rule("land-sla", case_types=["Land Tax"], sla_breached=True, regional_office="Gold Coast"),
+    _rule("debt-fy", case_domains=["Debt", "Fraud"], financial_year="2024-25", risk_score_min=99),
+    _rule("nothing", case_types=["Unknown"]),
+]
+
+
+def test_evaluate_rules_matches_per_rule_masks() -> None:
+    cases = _cases()
+    matches = evaluate_rules(RULES, cases)
+    expected = np.vstack([r.compile().mask(cases) for r in RULES])
+    assert (matches.dense() == expected).all()
+    assert matches.counts() == {r.rule_id: int(m.sum()) for r, m in zip(RULES, expected)}
+    assert matches.counts()["nothing"] == 0
+    assert matches.counts()["all"] == len(cases)
+
+
+def test_rule_matches_to_frame_and_shared_index() -> None:
+    cases = _cases()
+    index = CaseIndex(cases)
+    matches = evaluate_rules(RULES[1:3], cases, index=index)
+    pairs = matches.to_frame(cases["case_id"])
+    assert set(pairs["rule_id"]) == {"mining", "mining-dup"}
+    assert (pairs.groupby("rule_id").size() == len(matches.rows("mining"))).all()
+    assert (matches.rows("mining") == matches.rows("mining-dup")).all()
+    assert set(index._postings) == {"case_type", "industry_code"}
@@ -1,6 +1,11 @@
+import sqlite3
+
 import pandas as pd
+import pytest
+
+import numpy as np
 
-from qldrevenue.rules import apply_rule_df, to_rule_conditions
+from qldrevenue.rules import apply_rule_df, compile_rule, rule_mask, to_rule_conditions
 
 
 def test_mining_sector_high_risk_rule_filters_correctly() -> None:
@@ -42,3 +47,81 @@ def test_mining_sector_high_risk_rule_filters_correctly() -> None:
     )
     out = apply_rule_df(cases, conds)
     assert out["case_id"].tolist() == ["CASE-PT-FRAUD-MINING-001"]
+
+def _parity_cases() -> pd.DataFrame:
+    types = ["Payroll Tax", "Land Tax", "Transfer Duty"]
+    domains = ["Fraud", "Compliance", "Debt", "Service"]
+    rows = []
+    for i in range(120):
+        case_type = types[i % 3]
+        rows.append(
+            {
+                "case_id": f"CASE-{i:04d}",
+                "case_type": case_type,
+                "case_domain": domains[i % 4],
+                "industry_code": ["0600", "4500", "3000"][i % 3] if case_type == "Payroll Tax" else None,
+                "tax_shortfall": None if i % 17 == 0 else float((i * 7919) % 120000),
+                "risk_score": None if i % 23 == 0 else (i * 37) % 100,
+                "sla_breached": None if i % 29 == 0 else bool(i % 2),
+                "financial_year": ["2023-24", "2024-25"][i % 2],
+                "regional_office": ["Brisbane", "Gold Coast", "Regional"][i % 3],
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize(
+    "conds",
+    [
+        {},
+        to_rule_conditions(case_types=["Payroll Tax"], industry_codes=["0600"], risk_score_min=40),
+        to_rule_conditions(case_types=["Land Tax"], industry_codes=["0600"]),
+        to_rule_conditions(industry_codes=["4500", "3000"], tax_shortfall_min=50000),
+        to_rule_conditions(case_domains=["Fraud", "Debt"], sla_breached=True, financial_year="2024-25"),
+        to_rule_conditions(sla_breached=False, regional_office="Brisbane", tax_shortfall_min=0),
+    ],
+)
+def test_sql_and_pandas_backends_agree(conds) -> None:
+    cases = _parity_cases()
+    rule = compile_rule(conds)
+
+    con = sqlite3.connect(":memory:")
+    cases.to_sql("gold", con, index=False)
+    where = rule.where()
+    sql_ids = [r[0] for r in con.execute(f"SELECT case_id FROM gold WHERE {where.sql()} ORDER BY case_id", where.params)]
+
+    local_ids = cases.loc[rule.mask(cases), "case_id"].tolist()
+    assert local_ids == sql_ids
+
+
+def test_compile_rule_is_cached_and_hashable() -> None:
+    a = compile_rule({"case_types": ["Land Tax"], "industry_codes": ["0600"], "risk_score_min": 50})
+    b = compile_rule({"risk_score_min": 50, "industry_codes": ["0600"], "case_types": ["Land Tax"]})
+    assert a is b
+    assert hash(a) == hash(b)
+    assert a.industry_codes == () and a.industry_codes_skipped
+    assert a.columns == ("case_type", "risk_score")
+
+
+def test_rule_mask_matches_on_categorical_and_object_columns() -> None:
+    cases = _parity_cases()
+    categorical = cases.astype(
+        {c: "category" for c in ["case_type", "case_domain", "industry_code", "financial_year", "regional_office"]}
+    )
+    conds = to_rule_conditions(
+        case_types=["Payroll Tax", "Unknown"], case_domains=["Fraud", "Debt"], regional_office="Brisbane"
+    )
+    expected = rule_mask(cases, conds)
+    assert isinstance(expected, np.ndarray) and expected.dtype == bool
+    assert expected.any()
+    assert (rule_mask(categorical, conds) == expected).all()
+    assert not rule_mask(categorical, to_rule_conditions(financial_year="1999-00")).any()
+
+
+def test_apply_rule_df_leaves_input_untouched_and_reindexes() -> None:
+    cases = _parity_cases().iloc[::-1]
+    before = cases.copy()
+    out = apply_rule_df(cases, to_rule_conditions(case_types=["Land Tax"], risk_score_min=50))
+    pd.testing.assert_frame_equal(cases, before)
+    assert list(out.index) == list(range(len(out)))
+    assert (out["case_type"] == "Land Tax").all() and (out["risk_score"] >= 50).all()
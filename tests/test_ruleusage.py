@@ -0,0 +1,89 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from qldrevenue.ruleusage import RuleUsageTracker, get_rule_usage_tracker
+
+
+class RecordingExecutor:
+    def __init__(self, fail=False, use_count=True):
+        self.fail = fail
+        self.use_count = use_count
+        self.calls = []
+
+    def fetch(self, statement, params=None):
+        if not self.use_count and "use_count" in statement:
+            raise RuntimeError("UNRESOLVED_COLUMN: use_count")
+
+    def exec(self, statement, params=None):
+        if self.fail:
+            raise RuntimeError("warehouse unavailable")
+        self.calls.append((statement, params))
+
+
+def _usage(params):
+    return {r["rule_id"]: (r["last_used_at"], r["use_count"]) for r in json.loads(params["usage"])}
+
+
+def test_many_records_one_merge() -> None:
+    ex = RecordingExecutor()
+    t = RuleUsageTracker(ex, rules_table="rules")
+    t.record("R1", at=datetime(2025, 1, 1, 9))
+    t.record("R1", new_use=False, at=datetime(2025, 1, 1, 11))
+    t.record("R1", at=datetime(2025, 1, 1, 10))
+    t.record("R2", at=datetime(2025, 1, 2))
+    assert ex.calls == []
+
+    assert t.flush() == 2
+    (stmt, params), = ex.calls
+    assert "MERGE INTO rules" in stmt and "t.use_count = COALESCE(t.use_count, 0) + s.use_count" in stmt
+    assert _usage(params) == {"R1": ("2025-01-01 11:00:00", 2), "R2": ("2025-01-02 00:00:00", 1)}
+    assert t.flush() == 0 and len(ex.calls) == 1
+
+
+def test_failed_flush_is_retried_with_later_usage() -> None:
+    ex = RecordingExecutor(fail=True)
+    t = RuleUsageTracker(ex, rules_table="rules")
+    t.record("R1", at=datetime(2025, 1, 1))
+    with pytest.raises(RuntimeError):
+        t.flush()
+    t.record("R1", at=datetime(2025, 1, 3))
+    ex.fail = False
+    t.flush()
+    assert _usage(ex.calls[0][1]) == {"R1": ("2025-01-03 00:00:00", 2)}
+
+
+def test_stop_flushes_and_tracker_is_shared() -> None:
+    ex = RecordingExecutor()
+    t = get_rule_usage_tracker(ex, rules_table="shared_rules", flush_interval_s=60)
+    assert get_rule_usage_tracker(RecordingExecutor(), rules_table="shared_rules") is t
+    t.record("R9")
+    t.stop()
+    assert list(_usage(ex.calls[0][1])) == ["R9"]
+
+
+def test_shared_tracker_flushes_at_exit(monkeypatch) -> None:
+    registered = []
+    monkeypatch.setattr("qldrevenue.ruleusage.atexit.register", registered.append)
+    ex = RecordingExecutor()
+    t = get_rule_usage_tracker(ex, rules_table="exit_rules", flush_interval_s=60)
+    get_rule_usage_tracker(ex, rules_table="exit_rules")
+    assert registered == [t.stop]
+    t.record("R1")
+    registered[0]()
+    assert list(_usage(ex.calls[0][1])) == ["R1"]
+
+
+def test_before_the_use_count_migration_only_last_used_at_is_written() -> None:
+    ex = RecordingExecutor(use_count=False)
+    t = RuleUsageTracker(ex, rules_table="rules")
+    t.record("R1", at=datetime(2025, 1, 1))
+    assert t.flush() == 1 and t.pending() == {}
+    stmt, params = ex.calls[0]
+    assert "t.last_used_at = GREATEST" in stmt and "t.use_count" not in stmt
+
+    ex.use_count = True  # sql/10_rule_usage.sql applied
+    t.record("R1", at=datetime(2025, 1, 2))
+    t.flush()
+    assert "t.use_count = COALESCE(t.use_count, 0) + s.use_count" in ex.calls[1][0]
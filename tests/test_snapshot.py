@@ -0,0 +1,95 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from qldrevenue.replica import CaseReplica  # noqa: E402
+from qldrevenue.snapshot import read_snapshot, write_snapshot  # noqa: E402
+
+SILVER = pd.DataFrame(
+    {
+        "case_id": ["A", "B"],
+        "case_type": ["Land Tax", "Payroll Tax"],
+        "case_domain": ["Fraud", "Debt"],
+        "status": ["Open", "Open"],
+        "assigned_to": [None, "x@y"],
+        "compliance_officer": [None, None],
+        "tax_shortfall": [10.0, None],
+        "total_exposure": [100.0, 600000.0],
+        "risk_score": pd.array([40, None], dtype="Int64"),
+        "taxpayer_abn": ["11", "22"],
+        "taxpayer_postcode": ["4000", "4217"],
+        "tax_period_start": pd.to_datetime(["2024-07-01", "2024-01-01"]),
+        "created_at": pd.to_datetime(["2025-02-01 10:00", "2025-02-02 11:00"]),
+        "lodgement_due_date": pd.to_datetime(["2025-01-01", None]),
+        "is_test_data": [False, False],
+    }
+)
+STATE = pd.DataFrame(
+    {
+        "case_id": ["A"],
+        "status": ["Investigation"],
+        "assigned_to": ["me@x"],
+        "compliance_officer": [None],
+        "updated_at": pd.to_datetime(["2025-02-03 08:00"]),
+    }
+)
+
+
+def test_snapshot_roundtrip_keeps_version_and_dtypes(tmp_path) -> None:
+    write_snapshot(str(tmp_path), 7, SILVER, STATE, STATE["updated_at"].max())
+    snap = read_snapshot(str(tmp_path))
+    assert snap.version == 7
+    assert snap.state_watermark == pd.Timestamp("2025-02-03 08:00")
+    pd.testing.assert_frame_equal(snap.silver, SILVER)
+    pd.testing.assert_frame_equal(snap.state, STATE)
+
+
+def test_newer_snapshot_keeps_the_replaced_files_until_the_next_write(tmp_path) -> None:
+    def versions():
+        return sorted(n.split("-")[1] for n in os.listdir(tmp_path) if n.endswith(".arrow"))
+
+    write_snapshot(str(tmp_path), 7, SILVER, STATE)
+    write_snapshot(str(tmp_path), 9, SILVER.iloc[:1], STATE)
+    assert read_snapshot(str(tmp_path)).version == 9
+    assert versions() == ["v7", "v7", "v9", "v9"]  # a reader holding the v7 manifest can still open v7
+    write_snapshot(str(tmp_path), 12, SILVER, STATE)
+    assert versions() == ["v12", "v12", "v9", "v9"]
+    assert read_snapshot(str(tmp_path / "missing")) is None
+
+
+class ChangesOnlyExecutor:
+    """Fails on any full read: a restored replica may only ask for changes."""
+
+    def __init__(self):
+        self.statements = []
+
+    def fetch(self, statement, params=None):
+        self.statements.append(statement)
+        if statement.startswith("DESCRIBE HISTORY"):
+            return pd.DataFrame({"version": [8]})
+        if "table_changes('silver', 8, 8)" in statement:
+            return pd.DataFrame([dict(SILVER.iloc[1].to_dict(), risk_score=99, _change_type="update_postimage", _commit_version=8)])
+        if "updated_at >= :since" in statement:
+            return STATE
+        raise AssertionError(f"unexpected full read: {statement}")
+
+    def fetch_arrow(self, statement, params=None):
+        raise AssertionError("unexpected full Silver read")
+
+
+def test_replica_cold_starts_from_snapshot_and_syncs_changes(tmp_path) -> None:
+    write_snapshot(str(tmp_path), 7, SILVER, STATE, STATE["updated_at"].max())
+    ex = ChangesOnlyExecutor()
+    replica = CaseReplica(ex, silver_table="silver", state_table="state", snapshot_dir=str(tmp_path), snapshot_every_s=0)
+
+    changed = replica.sync()
+    assert changed == {"A", "B"}
+    assert replica.version == 8
+    snap = replica.snapshot().set_index("case_id")
+    assert snap.loc["A", "status"] == "Investigation"
+    assert snap.loc["B", "severity"] == "Critical"
+    # The advanced replica was written back for the next cold start.
+    assert read_snapshot(str(tmp_path)).version == 8
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from qldrevenue.sqlbuilder import Where, params_key, sql_param, to_parameters
+
+
+def test_where_text_depends_on_shape_not_values() -> None:
+    def build(types, risk):
+        w = Where()
+        w.isin("case_type", types)
+        w.gte("risk_score", risk, name="risk_min")
+        return w
+
+    a = build(["Payroll Tax", "Land Tax"], 60)
+    b = build(["Transfer Duty", "O'Brien"], 75)
+    assert a.sql() == b.sql() == "case_type IN (:case_type_0, :case_type_1) AND risk_score >= :risk_min"
+    assert b.params == {"case_type_0": "Transfer Duty", "case_type_1": "O'Brien", "risk_min": 75}
+
+
+def test_where_param_names_are_unique() -> None:
+    w = Where()
+    w.isin("case_type", ["Payroll Tax"])
+    w.isin("case_type", ["Land Tax", "Transfer Duty"])
+    assert w.sql() == "case_type IN (:case_type_0) AND case_type IN (:case_type_0_1, :case_type_1)"
+    assert len(w.params) == 3
+    assert Where().sql() == "1=1"
+
+
+def test_sql_param_types_and_wire_shape() -> None:
+    assert sql_param("n", 5).as_dict() == {"name": "n", "value": "5", "type": "BIGINT"}
+    assert sql_param("x", 1.5).as_dict() == {"name": "x", "value": "1.5", "type": "DOUBLE"}
+    assert sql_param("b", True).as_dict() == {"name": "b", "value": "true", "type": "BOOLEAN"}
+    assert sql_param("s", None).as_dict() == {"name": "s", "type": "STRING"}
+    assert sql_param("t", datetime(2024, 1, 2, 3, 4, 5)).value == "2024-01-02T03:04:05"
+    assert to_parameters({}) is None
+    assert [p.name for p in to_parameters({"a": 1, "b": "x"})] == ["a", "b"]
+    assert params_key({"b": 1, "a": 2}) == (("a", 2), ("b", 1))